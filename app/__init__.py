@@ -1,8 +1,8 @@
-from flask import Flask
-from sqlalchemy import create_engine
+import warnings
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from app.config import Config
+from database import engine_options, get_database_url, instrument_engine
 
 # Initialize SQLAlchemy components
 Base = declarative_base()
@@ -11,11 +11,19 @@ SessionLocal = None
 
 def create_app():
     """Flask application factory"""
+    # Imported here so the fetch CLI and worker can use the database layer without Flask
+    from flask import Flask
+    from app.config import Config
+    
     app = Flask(__name__)
     app.config.from_object(Config)
     
-    # Initialize database
-    init_db(app)
+    # Connect to the database; the schema is created by `python migrate.py`
+    init_engine(app.config['DATABASE_URL'])
+    
+    # Request latency and per-request database time for /metrics
+    from app.metrics import init_app as init_metrics
+    init_metrics(app, engine)
     
     # Import and register routes
     from app.routes import main
@@ -23,20 +31,54 @@ def create_app():
     
     return app
 
-def init_db(app):
-    """Initialize database connection and create tables"""
+def init_engine(database_url=None):
+    """Create the database engine and session factory once per process"""
     global engine, SessionLocal
     
-    engine = create_engine(app.config['DATABASE_URL'])
-    SessionLocal = sessionmaker(bind=engine)
+    if engine is None:
+        database_url = database_url or get_database_url()
+        engine = create_engine(database_url, **engine_options(database_url))
+        instrument_engine(engine)
+        SessionLocal = sessionmaker(bind=engine)
+    return engine
+
+def migrate(database_url=None):
+    """Create missing tables, columns and indexes"""
+    init_engine(database_url)
     
     # Import models to ensure they're registered with Base
     from app.models import Article
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    
+    # create_all doesn't alter existing tables, so add any new (nullable) columns
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.exec_driver_sql(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} '
+                        f'{column.type.compile(engine.dialect)}'
+                    )
+    
+    # create_all only builds indexes for new tables, so add any missing ones.
+    # Reflection warns about the full-text expression index, which is created below.
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='Skipped unsupported reflection of expression-based index')
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    
+    # The full-text GIN index is an expression index outside the model metadata
+    from app.search import ensure_search_index
+    ensure_search_index(engine)
     print("Database tables created successfully!")
 
 def get_db_session():
     """Get a database session"""
+    if SessionLocal is None:
+        init_engine()
     return SessionLocal()
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from app import get_db_session
+from app.models import IngestState
+
+# How long a process trusts its last read of the ingest version (seconds)
+CACHE_VERSION_TTL = float(os.getenv("CACHE_VERSION_TTL", "5"))
+COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", "1024"))
+# Articles kept per process for /api/articles/<id> and /api/articles/batch
+ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "2048"))
+
+# Response cache: 'memory' (per-process LRU), 'redis' or 'none'
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "21600"))
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "60"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_version_lock = threading.Lock()
+_version = {"value": None, "updated_at": None, "checked": 0.0}
+
+
+def ingest_stamp(session=None):
+    """Return (version, updated_at) of the last ingest, re-read at most every CACHE_VERSION_TTL seconds"""
+    with _version_lock:
+        if _version["value"] is not None and time.monotonic() - _version["checked"] < CACHE_VERSION_TTL:
+            return _version["value"], _version["updated_at"]
+    
+    own_session = session is None
+    session = session or get_db_session()
+    try:
+        state = session.query(IngestState.version, IngestState.updated_at)\
+            .filter(IngestState.id == 1)\
+            .first()
+    finally:
+        if own_session:
+            session.close()
+    
+    with _version_lock:
+        _version["value"], _version["updated_at"] = state if state else (0, None)
+        _version["checked"] = time.monotonic()
+        return _version["value"], _version["updated_at"]
+
+
+def current_version(session):
+    """Return the ingest version, re-reading it at most every CACHE_VERSION_TTL seconds"""
+    return ingest_stamp(session)[0]
+
+
+def invalidate():
+    """Forget the cached ingest version so the next read sees a fresh commit"""
+    with _version_lock:
+        _version["value"] = None
+    count_cache.clear()
+    article_cache.clear()
+    response_cache.clear()
+
+
+def normalize_filters(**filters):
+    """Stable cache key for a set of listing filters; empty values are dropped"""
+    return tuple(sorted((name, str(value).strip().lower()) for name, value in filters.items() if value))
+
+
+class CountCache:
+    """LRU of article totals per filter set, tied to one ingest version"""
+
+    def __init__(self, max_entries=COUNT_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._version = None
+
+    def get(self, session, key, compute):
+        """Return the cached total for ``key``, calling ``compute()`` on a miss"""
+        version = current_version(session)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        
+        total = compute()
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = total
+                if len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+count_cache = CountCache()
+
+
+class ArticleCache:
+    """LRU of serialized articles by id, tied to one ingest version.
+
+    Ids found not to exist are remembered too (as None), so repeated
+    lookups of deleted articles don't reach the database either.
+    """
+
+    def __init__(self, max_entries=ARTICLE_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._version = None
+
+    def get_many(self, session, ids, load):
+        """Return {id: article dict or None} for ``ids``, calling ``load(missing ids)`` once for the misses"""
+        version = current_version(session)
+        found, missing = {}, []
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            for article_id in ids:
+                if article_id in self._entries:
+                    self._entries.move_to_end(article_id)
+                    found[article_id] = self._entries[article_id]
+                else:
+                    missing.append(article_id)
+        
+        if missing:
+            loaded = load(missing)
+            with self._lock:
+                for article_id in missing:
+                    found[article_id] = loaded.get(article_id)
+                    if version == self._version:
+                        self._entries[article_id] = found[article_id]
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+article_cache = ArticleCache()
+
+
+class LRUBackend:
+    """In-process LRU of cached responses"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Responses shared by all workers through Redis; keys carry the version so stale ones just expire"""
+
+    def __init__(self, url=REDIS_URL, ttl=RESPONSE_CACHE_TTL):
+        import redis  # Optional dependency, only needed for this backend
+        self._client = redis.Redis.from_url(url)
+        self._ttl = ttl
+
+    def get(self, key):
+        try:
+            raw = self._client.get(f"response:{key}")
+        except Exception as e:
+            print(f"⚠️ Response cache read failed: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    def set(self, key, entry):
+        try:
+            self._client.set(f"response:{key}", json.dumps(entry), ex=self._ttl)
+        except Exception as e:
+            print(f"⚠️ Response cache write failed: {e}")
+
+    def clear(self):
+        pass
+
+
+class NullBackend:
+    """Disables response caching"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry):
+        pass
+
+    def clear(self):
+        pass
+
+
+def make_backend(name=RESPONSE_CACHE_BACKEND):
+    if name == "redis":
+        return RedisBackend()
+    if name == "none":
+        return NullBackend()
+    return LRUBackend()
+
+
+response_cache = make_backend()
+
+
+def response_key(version):
+    """Route plus normalized query args for the current request"""
+    from flask import request
+    args = sorted((name, value) for name, value in request.args.items(multi=True) if value != '')
+    return f"{request.endpoint}:{version}:{request.path}?{json.dumps(args, separators=(',', ':'))}"
+
+
+def cached_response(view):
+    """Serve a view from the response cache until the next ingest commit.
+
+    Only 200 responses are stored. Every response carries an ETag and
+    the last ingest time as Last-Modified, so conditional requests from
+    clients and CDNs get a 304.
+    """
+    # Imported here so the fetch pipeline can invalidate the cache without loading Flask
+    from flask import Response, make_response, request
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            version, updated_at = ingest_stamp()
+        except Exception as e:
+            # Without the ingest version nothing can be cached; the view reports database errors itself
+            print(f"⚠️ Response cache bypassed: {e}")
+            return view(*args, **kwargs)
+        key = response_key(version)
+        entry = response_cache.get(key)
+        
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data(as_text=True)
+            entry = {
+                "body": body,
+                "mimetype": response.mimetype,
+                "etag": hashlib.sha1(f"{version}:{body}".encode()).hexdigest(),
+            }
+            response_cache.set(key, entry)
+        
+        response = Response(entry["body"], mimetype=entry["mimetype"])
+        response.set_etag(entry["etag"])
+        if updated_at:
+            response.last_modified = updated_at
+        response.cache_control.public = True
+        response.cache_control.max_age = RESPONSE_MAX_AGE
+        return response.make_conditional(request)
+    
+    return wrapper
@@ -0,0 +1,192 @@
+import json
+import os
+import select
+import threading
+import time
+from sqlalchemy import func, text
+from app import get_db_session, init_engine
+from app.models import Article, IngestState, article_columns, article_serializer
+
+# Longest long-poll wait and Server-Sent Events stream (seconds); clients reconnect with their cursor
+CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT", "25"))
+CHANGES_STREAM_SECONDS = float(os.getenv("CHANGES_STREAM_SECONDS", "300"))
+# Without PostgreSQL LISTEN/NOTIFY, how often each web process checks the ingest version
+CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "2"))
+
+CHANGES_PAGE_SIZE = 100
+CHANGES_MAX_PAGE_SIZE = 500
+# Seconds between SSE keep-alive comments, so proxies don't drop an idle stream
+KEEPALIVE_SECONDS = 15
+CHANNEL = "news_articles"
+
+
+class ChangeNotifier:
+    """Wakes changefeed requests waiting in this process when an ingest commits.
+
+    One listener thread per process, started by the first waiter, turns a
+    PostgreSQL NOTIFY (or, on other databases, a new ingest version) into
+    a bump of ``generation``. Waiters read the generation before querying,
+    so a commit between their query and their wait is never missed.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self.generation = 0
+
+    def notify(self):
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """Block until the generation moves past ``generation`` or ``timeout`` passes; True if it moved"""
+        self.start()
+        with self._condition:
+            return self._condition.wait_for(lambda: self.generation != generation, timeout)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="changefeed-listener", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if init_engine().dialect.name == "postgresql":
+                    self._listen()
+                else:
+                    self._poll()
+            except Exception as e:
+                print(f"⚠️ Changefeed listener failed, retrying: {e}")
+                time.sleep(CHANGES_POLL_INTERVAL)
+
+    def _listen(self):
+        # A connection of its own, detached from the pool, stays in LISTEN for the life of the process
+        connection = init_engine().raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.connection
+            dbapi_connection.autocommit = True
+            dbapi_connection.cursor().execute(f"LISTEN {CHANNEL}")
+            # Waiters re-check once, in case a commit landed before the listener was up
+            self.notify()
+            while True:
+                if select.select([dbapi_connection], [], [], 60) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                if dbapi_connection.notifies:
+                    dbapi_connection.notifies.clear()
+                    self.notify()
+        finally:
+            connection.close()
+
+    def _poll(self):
+        version = ingest_version()
+        self.notify()
+        while True:
+            time.sleep(CHANGES_POLL_INTERVAL)
+            current = ingest_version()
+            if current != version:
+                version = current
+                self.notify()
+
+
+def ingest_version():
+    session = get_db_session()
+    try:
+        return session.query(IngestState.version).filter(IngestState.id == 1).scalar()
+    finally:
+        session.close()
+
+
+# Waiters in this process
+notifier = ChangeNotifier()
+
+
+def publish(session):
+    """Wake changefeed clients in every process after new articles were committed"""
+    if session.bind.dialect.name == "postgresql":
+        session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": CHANNEL})
+        session.commit()
+    notifier.notify()
+
+
+def latest_id(session):
+    """Cursor for "from now on": the newest article id, or 0"""
+    return session.query(func.max(Article.id)).scalar() or 0
+
+
+def articles_since(session, fields, since=None, since_time=None, limit=CHANGES_PAGE_SIZE):
+    """Up to ``limit`` articles inserted after article id ``since`` (or after
+    created_at ``since_time``), oldest first; returns (dicts, last id, has_more).
+
+    Ids are handed out in insert order and fetch jobs run one at a time, so
+    an id cursor never skips a row; created_at is kept on re-ingest, so a
+    time cursor only sees new articles as well.
+    """
+    query = session.query(*article_columns(fields, keys=('id', 'created_at')))
+    if since is not None:
+        query = query.filter(Article.id > since)
+    if since_time is not None:
+        query = query.filter(Article.created_at > since_time)
+    rows = query.order_by(Article.id).limit(limit + 1).all()
+    serialize = article_serializer(fields)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return [serialize(row) for row in rows], (rows[-1].id if rows else since), has_more
+
+
+def poll_changes(fields, since, since_time=None, limit=CHANGES_PAGE_SIZE, wait=0):
+    """Long-poll: return as soon as there are articles after the cursor, or after ``wait`` seconds.
+
+    A session is only held while querying, never while waiting.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        generation = notifier.generation
+        session = get_db_session()
+        try:
+            if since is None and since_time is None:
+                since = latest_id(session)
+            articles, cursor, has_more = articles_since(session, fields, since, since_time, limit)
+        finally:
+            session.close()
+        remaining = deadline - time.monotonic()
+        if articles or remaining <= 0 or not notifier.wait(generation, remaining):
+            return articles, cursor, has_more
+
+
+def sse_event(event, data, event_id=None):
+    """One Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_changes(fields, since, since_time=None, limit=CHANGES_PAGE_SIZE, seconds=CHANGES_STREAM_SECONDS):
+    """Yield SSE messages for every article inserted after the cursor, for ``seconds``.
+
+    Each article is an "article" event whose id is the article id, so a
+    reconnecting EventSource resumes through Last-Event-ID.
+    """
+    yield f"retry: {int(CHANGES_POLL_INTERVAL * 1000)}\n\n"
+    deadline = time.monotonic() + seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        # Only a stream with no cursor at all returns at once, to pin "now" as its id cursor
+        waiting = since is not None or since_time is not None
+        articles, cursor, has_more = poll_changes(fields, since, since_time, limit,
+                                                  wait=min(KEEPALIVE_SECONDS, remaining) if waiting else 0)
+        # Once there is an article id the id cursor takes over
+        if cursor is not None:
+            since, since_time = cursor, None
+        for article in articles:
+            yield sse_event("article", article, article["id"])
+        if not articles:
+            yield ": keep-alive\n\n"
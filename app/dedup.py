@@ -0,0 +1,275 @@
+import hashlib
+import os
+from array import array
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import bindparam, func
+from app.models import Article, FingerprintBand
+from app.search import tokenize
+
+# Estimated Jaccard similarity of word 3-shingles at which two articles are the same story
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+# Texts with fewer tokens than this get no fingerprint (too short to compare reliably)
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "40"))
+
+# MinHash signature of 64 slots, indexed as 16 LSH bands of 4 slots: pairs at the
+# threshold share a band ~99% of the time, pairs below 0.3 rarely do
+SIGNATURE_SLOTS = 64
+BAND_ROWS = 4
+DEDUP_BANDS = SIGNATURE_SLOTS // BAND_ROWS
+SHINGLE_SIZE = 3
+CHUNK_SIZE = 500
+
+# Query parameters that only identify where a click came from
+TRACKING_PARAMS = frozenset((
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "ref", "ref_src", "ref_url", "cmpid", "ocid", "smid", "smtyp", "taid", "at_medium", "at_campaign",
+    "rss", "cid", "icid", "mbid", "partner", "soc_src", "soc_trk", "spm", "feature",
+))
+TRACKING_PREFIXES = ("utm_", "ns_", "pk_", "mtm_", "at_", "itm_", "oly_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url):
+    """``url`` with a lower-case scheme and host and without tracking parameters or fragment"""
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def choose_canonical(link, canonical_link=None):
+    """The page's rel=canonical when it names a specific http(s) page, else the link itself"""
+    if canonical_link and canonical_link != link:
+        parts = urlsplit(canonical_link)
+        # Some sites point every page's canonical at their homepage
+        if parts.scheme in ("http", "https") and parts.netloc and parts.path.strip("/"):
+            return canonical_url(canonical_link)
+    return canonical_url(link)
+
+
+def minhash(text):
+    """MinHash signature of the text's word 3-shingles as bytes, or None for short texts.
+
+    Uses one-permutation hashing: each shingle hash picks a slot with its
+    low bits and competes for that slot's minimum with its high bits, so a
+    text is hashed once rather than once per slot.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < DEDUP_MIN_WORDS:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    slots = [None] * SIGNATURE_SLOTS
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        slot, value = value % SIGNATURE_SLOTS, value >> 32
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+
+    # Empty slots borrow the next filled slot's value so short texts still compare slot by slot
+    filled = [slot for slot, value in enumerate(slots) if value is not None]
+    for slot, value in enumerate(slots):
+        if value is None:
+            slots[slot] = slots[next((other for other in filled if other > slot), filled[0])]
+    return array("I", slots).tobytes()
+
+
+def signature(fingerprint):
+    """A stored fingerprint as one integer, for similarity()"""
+    # PostgreSQL hands bytea back as memoryview
+    return int.from_bytes(bytes(fingerprint), "little")
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signature() values: the share of equal slots"""
+    return array("I", (a ^ b).to_bytes(SIGNATURE_SLOTS * 4, "little")).count(0) / SIGNATURE_SLOTS
+
+
+def fingerprint_bands(fingerprint):
+    """(band, value) LSH keys for a signature"""
+    fingerprint, width = bytes(fingerprint), BAND_ROWS * 4
+    return [
+        (band, int.from_bytes(hashlib.blake2b(fingerprint[band * width:(band + 1) * width], digest_size=4).digest(),
+                              "little") & 0x7FFFFFFF)
+        for band in range(DEDUP_BANDS)
+    ]
+
+
+def dedup_text(row):
+    """The text a row's fingerprint is computed from"""
+    return row.get("content") or row.get("summary") or ""
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _band_candidates(session, keys, exclude):
+    """Cluster leaders with any of the (band, value) ``keys``, as {key: [(id, signature)]}"""
+    by_band = defaultdict(list)
+    values_by_band = defaultdict(set)
+    for band, value in keys:
+        values_by_band[band].add(value)
+    for band, values in values_by_band.items():
+        for chunk in _chunks(values):
+            matches = session.query(FingerprintBand.value, Article.id, Article.fingerprint)\
+                .join(Article, Article.id == FingerprintBand.article_id)\
+                .filter(FingerprintBand.band == band, FingerprintBand.value.in_(chunk))
+            for value, article_id, fingerprint in matches:
+                if article_id not in exclude and fingerprint is not None:
+                    by_band[(band, value)].append((article_id, signature(fingerprint)))
+    return by_band
+
+
+def _canonical_candidates(session, links, exclude):
+    """Articles sharing any of the canonical ``links``, as {link: [(id, leader or None)]}"""
+    by_link = defaultdict(list)
+    for chunk in _chunks(links):
+        matches = session.query(Article.canonical_link, Article.id, Article.duplicate_of)\
+            .filter(Article.canonical_link.in_(chunk))
+        for link, article_id, leader in matches:
+            if article_id not in exclude:
+                by_link[link].append((article_id, leader))
+    return by_link
+
+
+def index_duplicates(session, rows):
+    """Assign story clusters for upserted article rows; returns how many are duplicates.
+
+    Rows are dicts with at least link, canonical_link and fingerprint. Each
+    one joins the cluster of the oldest article that shares its canonical
+    link or whose signature is at least DEDUP_THRESHOLD similar, found
+    through the LSH bands of cluster leaders. The caller commits.
+    """
+    if not rows:
+        return 0
+
+    stored = {}
+    for chunk in _chunks(row["link"] for row in rows):
+        stored.update(
+            (link, (article_id, leader)) for link, article_id, leader in
+            session.query(Article.link, Article.id, Article.duplicate_of).filter(Article.link.in_(chunk))
+        )
+    rows = sorted((row for row in rows if row["link"] in stored), key=lambda row: stored[row["link"]][0])
+    ids = {stored[row["link"]][0] for row in rows}
+
+    for chunk in _chunks(ids):
+        session.query(FingerprintBand)\
+            .filter(FingerprintBand.article_id.in_(chunk))\
+            .delete(synchronize_session=False)
+
+    keys = {key for row in rows if row.get("fingerprint") is not None for key in fingerprint_bands(row["fingerprint"])}
+    by_band = _band_candidates(session, keys, ids)
+    by_link = _canonical_candidates(session, {row["canonical_link"] for row in rows if row.get("canonical_link")}, ids)
+
+    # Oldest first, so rows earlier in the batch can lead later ones
+    duplicates, bands, changed = 0, [], []
+    for row in rows:
+        article_id, previous = stored[row["link"]]
+        fingerprint = row.get("fingerprint")
+        leaders = [
+            leader or other_id for other_id, leader in by_link.get(row.get("canonical_link"), ())
+            if other_id < article_id
+        ]
+        if fingerprint is not None:
+            row_keys, slots = fingerprint_bands(fingerprint), signature(fingerprint)
+            # Leaders sharing several bands are compared once
+            candidates = {
+                other_id: other for key in row_keys for other_id, other in by_band.get(key, ()) if other_id < article_id
+            }
+            leaders.extend(
+                other_id for other_id, other in candidates.items() if similarity(slots, other) >= DEDUP_THRESHOLD
+            )
+        leader = min(leaders) if leaders else None
+
+        if leader:
+            duplicates += 1
+        elif fingerprint is not None:
+            for key in row_keys:
+                by_band[key].append((article_id, slots))
+                bands.append({"band": key[0], "value": key[1], "article_id": article_id})
+        if row.get("canonical_link"):
+            by_link[row["canonical_link"]].append((article_id, leader))
+        if leader != previous:
+            changed.append({"_id": article_id, "_leader": leader, "_previous": previous})
+
+    for chunk in _chunks(bands):
+        session.bulk_insert_mappings(FingerprintBand, chunk)
+
+    if changed:
+        table = Article.__table__
+        session.execute(
+            table.update().where(table.c.id == bindparam("_id")).values(duplicate_of=bindparam("_leader")),
+            changed,
+        )
+        # A former leader that joined an older story takes its own duplicates along
+        for change in changed:
+            if change["_previous"] is None and change["_leader"] is not None:
+                session.query(Article)\
+                    .filter(Article.duplicate_of == change["_id"])\
+                    .update({Article.duplicate_of: change["_leader"]}, synchronize_session=False)
+    return duplicates
+
+
+def delete_fingerprints(session, article_ids_query):
+    """Remove the articles selected by ``article_ids_query`` from their story clusters.
+
+    Each deleted leader hands its cluster to its oldest surviving duplicate,
+    which is added to the band index in its place.
+    """
+    successors = session.query(Article.duplicate_of, func.min(Article.id))\
+        .filter(Article.duplicate_of.in_(article_ids_query), Article.id.notin_(article_ids_query))\
+        .group_by(Article.duplicate_of)\
+        .all()
+    for old, new in successors:
+        session.query(Article)\
+            .filter(Article.duplicate_of == old, Article.id != new)\
+            .update({Article.duplicate_of: new}, synchronize_session=False)
+        session.query(Article)\
+            .filter(Article.id == new)\
+            .update({Article.duplicate_of: None}, synchronize_session=False)
+
+    session.query(FingerprintBand)\
+        .filter(FingerprintBand.article_id.in_(article_ids_query))\
+        .delete(synchronize_session=False)
+
+    new_leaders = [new for _, new in successors]
+    for chunk in _chunks(new_leaders):
+        rows = session.query(Article.id, Article.fingerprint)\
+            .filter(Article.id.in_(chunk), Article.fingerprint.isnot(None))
+        session.bulk_insert_mappings(FingerprintBand, [
+            {"band": band, "value": value, "article_id": article_id}
+            for article_id, fingerprint in rows
+            for band, value in fingerprint_bands(fingerprint)
+        ])
+
+
+def collapse_duplicates(query):
+    """Restrict an Article query to story cluster leaders"""
+    return query.filter(Article.duplicate_of.is_(None))
+
+
+def duplicate_counts(session, article_ids):
+    """{leader id: number of duplicates} for the given article ids"""
+    if not article_ids:
+        return {}
+    return dict(
+        session.query(Article.duplicate_of, func.count(Article.id))
+        .filter(Article.duplicate_of.in_(list(article_ids)))
+        .group_by(Article.duplicate_of)
+    )
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+from app.models import Article
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_MAX_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+# Article data columns; internal ones (thumbnail_hash, fingerprint, duplicate_of) are not exported
+EXPORT_COLUMNS = ('id', 'title', 'link', 'summary', 'content', 'author', 'published', 'updated',
+                  'categories', 'created_at', 'thumbnail_url', 'canonical_link')
+
+
+def parse_columns(value):
+    """Column names from a comma-separated list; all columns when empty"""
+    if not value:
+        return list(EXPORT_COLUMNS)
+    columns = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def parse_since(value):
+    """ISO 8601 timestamp (a trailing Z is accepted), or None"""
+    if not value:
+        return None
+    try:
+        since = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid since timestamp: {value}")
+    # created_at is stored as naive UTC
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def parse_batch_size(value):
+    if value is None:
+        return EXPORT_BATCH_SIZE
+    return min(max(value, 1), EXPORT_MAX_BATCH_SIZE)
+
+
+def stream_articles(conn, columns, since=None, batch_size=EXPORT_BATCH_SIZE):
+    """Run the export query and return an iterator of row batches.
+
+    ``conn`` is a Session or Connection. stream_results makes psycopg2 use a
+    named server-side cursor, so only ``batch_size`` rows are held in memory
+    at a time. ``since`` limits the export to rows ingested after it.
+    """
+    table = Article.__table__
+    query = select(*[table.c[name] for name in columns]).order_by(table.c.id)
+    if since is not None:
+        query = query.where(table.c.created_at > since)
+    query = query.execution_options(stream_results=True, max_row_buffer=batch_size)
+    return conn.execute(query).partitions(batch_size)
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def export_chunks(batches, columns, fmt='ndjson'):
+    """Encode row batches as NDJSON or CSV, yielding one string per batch"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([[_value(value) for value in row] for row in batch])
+            yield buffer.getvalue()
+        return
+
+    for batch in batches:
+        yield ''.join(
+            json.dumps({name: _value(value) for name, value in zip(columns, row)}) + '\n'
+            for row in batch
+        )
@@ -0,0 +1,154 @@
+import json
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from app.models import FetchJob
+
+# Seconds a claimed job stays leased without a heartbeat, and how often a job may be retried
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def _json(value):
+    return json.loads(value) if value else None
+
+
+def job_to_dict(job):
+    """Convert a job row to a JSON-serializable dict"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'worker_id': job.worker_id,
+        'attempts': job.attempts,
+        'progress': _json(job.progress),
+        'feed_results': _json(job.feed_results),
+        'report': _json(job.report),
+        'checkpoint': _json(job.checkpoint),
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'lease_expires_at': job.lease_expires_at.isoformat() if job.lease_expires_at else None,
+        'duration': job.duration,
+    }
+
+
+def active_job(session, kind='fetch'):
+    """The queued or running job of ``kind``, if any"""
+    return session.query(FetchJob)\
+        .filter(FetchJob.kind == kind, FetchJob.status.in_(ACTIVE_STATUSES))\
+        .order_by(FetchJob.id)\
+        .first()
+
+
+def enqueue_job(session, kind='fetch'):
+    """Queue a job unless one of the same kind is already queued or running.
+
+    Returns (job, created). A partial unique index on kind makes this
+    safe when several web workers enqueue at the same moment.
+    """
+    existing = active_job(session, kind)
+    if existing:
+        return existing, False
+
+    job = FetchJob(kind=kind, status='queued', created_at=datetime.utcnow())
+    session.add(job)
+    try:
+        session.commit()
+        return job, True
+    except IntegrityError:
+        session.rollback()
+        return active_job(session, kind), False
+
+
+def claim_job(session, worker_id, kinds=None):
+    """Lease the oldest runnable job with FOR UPDATE SKIP LOCKED and mark it running.
+
+    Runnable means queued, or running with an expired lease (its worker
+    died). A reclaimed job keeps its checkpoint, so the run resumes where
+    the dead worker stopped. Jobs that have used up JOB_MAX_ATTEMPTS are
+    failed instead.
+    """
+    now = datetime.utcnow()
+    query = session.query(FetchJob).filter(or_(
+        FetchJob.status == 'queued',
+        and_(FetchJob.status == 'running', FetchJob.lease_expires_at < now),
+    ))
+    if kinds:
+        query = query.filter(FetchJob.kind.in_(kinds))
+
+    while True:
+        job = query.order_by(FetchJob.id).with_for_update(skip_locked=True).first()
+        if job is None:
+            session.commit()
+            return None
+
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = 'failed'
+            job.error = job.error or f"Lease expired after {job.attempts} attempts"
+            job.finished_at = now
+            session.commit()
+            continue
+
+        job.status = 'running'
+        job.worker_id = worker_id
+        job.attempts += 1
+        job.started_at = job.started_at or now
+        job.lease_expires_at = now + timedelta(seconds=JOB_LEASE_SECONDS)
+        session.commit()
+        return job
+
+
+def heartbeat(session, job_id, worker_id, progress=None, feed_results=None, report=None, checkpoint=None):
+    """Extend the lease and store progress; False if the lease was lost to another worker"""
+    values = {FetchJob.lease_expires_at: datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}
+    if progress is not None:
+        values[FetchJob.progress] = json.dumps(progress)
+    if feed_results is not None:
+        values[FetchJob.feed_results] = json.dumps(feed_results)
+    if report is not None:
+        values[FetchJob.report] = json.dumps(report)
+    if checkpoint is not None:
+        values[FetchJob.checkpoint] = json.dumps(checkpoint)
+    updated = session.query(FetchJob)\
+        .filter(FetchJob.id == job_id, FetchJob.worker_id == worker_id, FetchJob.status == 'running')\
+        .update(values, synchronize_session=False)
+    session.commit()
+    return bool(updated)
+
+
+def finish_job(session, job_id, worker_id, status, report=None, error=None,
+               progress=None, feed_results=None):
+    """Record the outcome of a job run by ``worker_id``"""
+    job = session.query(FetchJob)\
+        .filter(FetchJob.id == job_id, FetchJob.worker_id == worker_id)\
+        .first()
+    if job is None:
+        return False
+
+    now = datetime.utcnow()
+    job.status = status
+    job.finished_at = now
+    job.lease_expires_at = None
+    job.duration = (now - job.started_at).total_seconds() if job.started_at else None
+    job.report = json.dumps(report) if report is not None else job.report
+    job.error = error
+    if progress is not None:
+        job.progress = json.dumps(progress)
+    if feed_results is not None:
+        job.feed_results = json.dumps(feed_results)
+    session.commit()
+    return True
+
+
+def latest_jobs(session, kind='fetch'):
+    """Return (current active job or None, last finished job or None)"""
+    finished = session.query(FetchJob)\
+        .filter(FetchJob.kind == kind, FetchJob.status.in_(('succeeded', 'failed')))\
+        .order_by(FetchJob.id.desc())\
+        .first()
+    return active_job(session, kind), finished
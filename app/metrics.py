@@ -0,0 +1,198 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from fast queries up to slow article downloads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with Prometheus-style buckets"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """JSON-able {"buckets": [[le, cumulative count], ...], "sum", "count"}"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            running += count
+            cumulative.append([bound, running])
+        return {"buckets": cumulative, "sum": round(total, 6), "count": running}
+
+
+class Registry:
+    """Named histograms and counters, each keyed by a tuple of label pairs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+
+    def histogram(self, name, help_text="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.help.setdefault(name, help_text)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            return self.histograms[key]
+
+    def observe(self, name, value, help_text="", **labels):
+        self.histogram(name, help_text, **labels).observe(value)
+
+    def incr(self, name, amount=1, help_text="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.help.setdefault(name, help_text)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """JSON-able view of every metric, for /cron/status/"""
+        with self._lock:
+            histograms, counters = list(self.histograms.items()), list(self.counters.items())
+        return {
+            "histograms": [dict(name=name, labels=dict(labels), **h.snapshot()) for (name, labels), h in histograms],
+            "counters": [dict(name=name, labels=dict(labels), value=value) for (name, labels), value in counters],
+        }
+
+    def render(self):
+        lines = []
+        with self._lock:
+            histograms, counters = sorted(self.histograms.items()), sorted(self.counters.items())
+        for name, items in _group(histograms):
+            lines.append(f"# HELP {name} {self.help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in items:
+                lines.extend(histogram_lines(name, dict(labels), histogram.snapshot()))
+        for name, items in _group(counters):
+            lines.append(f"# HELP {name} {self.help.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in items:
+                lines.append(f"{name}{format_labels(dict(labels))} {value}")
+        return lines
+
+
+def _group(items):
+    grouped = {}
+    for (name, labels), value in items:
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped.items()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+def histogram_lines(name, labels, snapshot):
+    """Prometheus exposition lines for a Histogram.snapshot()"""
+    lines = [
+        f"{name}_bucket{format_labels(dict(labels, le=bound))} {count}"
+        for bound, count in snapshot["buckets"]
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def gauge_lines(name, help_text, samples):
+    """Exposition lines for a gauge from [(labels, value), ...]"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples if value is not None)
+    return lines
+
+
+def fetch_report_lines(report):
+    """Exposition lines for a fetch run report (RunStats.report()) stored on a job"""
+    lines = [
+        "# HELP news_fetch_stage_seconds Fetch pipeline stage timings in the latest run",
+        "# TYPE news_fetch_stage_seconds histogram",
+    ]
+    for stage, snapshot in sorted(report.get("histograms", {}).items()):
+        lines.extend(histogram_lines("news_fetch_stage_seconds", {"stage": stage}, snapshot))
+    lines.append("# HELP news_fetch_events_total Fetch pipeline counters (failures, skips, bytes) in the latest run")
+    lines.append("# TYPE news_fetch_events_total counter")
+    lines.extend(
+        f"news_fetch_events_total{format_labels({'event': name})} {value}"
+        for name, value in sorted(report.get("counters", {}).items())
+    )
+    lines.extend(gauge_lines("news_fetch_run_wall_seconds", "Wall time of the latest fetch run",
+                             [({}, report.get("wall_seconds"))]))
+    lines.extend(gauge_lines("news_fetch_circuit_open", "1 if a failing publisher host's circuit breaker was open "
+                             "at the end of the latest run", [
+                                 ({"host": host}, int(breaker["state"] != "closed"))
+                                 for host, breaker in sorted(report.get("circuit_breakers", {}).items())
+                             ]))
+    return lines
+
+
+# Metrics for this web process
+registry = Registry()
+
+
+def init_app(app, engine):
+    """Time every request and the database queries it runs"""
+    # Imported here so the fetch pipeline can use Histogram without Flask hooks
+    from flask import g, request
+    from sqlalchemy import event
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.db_seconds = 0.0
+        g.db_queries = 0
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        registry.observe("news_http_request_duration_seconds", time.perf_counter() - start,
+                         "Flask request latency", endpoint=endpoint, method=request.method)
+        registry.observe("news_http_request_db_seconds", g.get("db_seconds", 0.0),
+                         "Database time per Flask request", endpoint=endpoint)
+        registry.incr("news_http_requests_total", 1, "Flask requests by status",
+                      endpoint=endpoint, status=response.status_code)
+        return response
+
+    # The engine is shared by every app in the process, so only hook it once
+    if not event.contains(engine, "after_cursor_execute", _end_query):
+        event.listen(engine, "before_cursor_execute", _start_query)
+        event.listen(engine, "after_cursor_execute", _end_query)
+        event.listen(engine, "handle_error", _failed_query)
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    from flask import g, has_request_context
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    registry.observe("news_db_query_seconds", seconds, "Database query time")
+    if has_request_context() and "db_seconds" in g:
+        g.db_seconds += seconds
+        g.db_queries += 1
+
+
+def _failed_query(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
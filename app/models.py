@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, Float, LargeBinary, String, Text, DateTime, Index, ForeignKey, text, and_, or_
+from sqlalchemy.orm import query_expression
 from app import Base
 from datetime import datetime
 
@@ -28,6 +29,27 @@ class Article(Base):
     
     # Media (optional)
     thumbnail_url = Column(String(1000))      # Article image if available
+    thumbnail_hash = Column(String(64))       # Local resized copy, served from /thumb/<hash> (thumbnails.py)
+    
+    # Near-duplicate detection (app/dedup.py)
+    canonical_link = Column(String(1000))     # rel=canonical or the link, without tracking parameters
+    fingerprint = Column(LargeBinary)         # MinHash signature of the text, NULL when too short
+    duplicate_of = Column(Integer)            # Story cluster leader's id; NULL for leaders
+    
+    # Listing flag loaded with with_expression(Article.has_details, article_has_details())
+    has_details = query_expression()
+    
+    __table_args__ = (
+        # Serves newest-first listings and keyset pagination on (published, id)
+        Index('ix_articles_published_id', 'published', 'id'),
+        # Serves incremental exports (created_at > since)
+        Index('ix_articles_created_at', 'created_at'),
+        # Serve exact canonical-link matches and story cluster lookups
+        Index('ix_articles_canonical_link', 'canonical_link'),
+        Index('ix_articles_duplicate_of', 'duplicate_of'),
+        # Finds the source image of a thumbnail that is missing from a web process's cache
+        Index('ix_articles_thumbnail_hash', 'thumbnail_hash'),
+    )
     
     def __repr__(self):
         return f'<Article {self.title[:50]}...>'
@@ -45,10 +67,57 @@ class Article(Base):
             'updated': self.updated.isoformat() if self.updated else None,
             'categories': self.categories,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'thumbnail_url': self.thumbnail_url
+            'thumbnail_url': self.thumbnail_url,
+            'thumbnail_hash': self.thumbnail_hash,
+            'duplicate_of': self.duplicate_of
         }
 
 
+# Fields serialized by Article.to_dict(), in order
+ARTICLE_FIELDS = ('id', 'title', 'link', 'summary', 'content', 'author', 'published',
+                  'updated', 'categories', 'created_at', 'thumbnail_url', 'thumbnail_hash', 'duplicate_of')
+
+# Default /api/articles projection: everything but the full extracted content
+ARTICLE_LIST_FIELDS = tuple(name for name in ARTICLE_FIELDS if name != 'content')
+
+# Columns the listing template reads; has_details stands in for content/summary
+ARTICLE_CARD_FIELDS = ('id', 'title', 'link', 'author', 'published', 'categories', 'thumbnail_url',
+                       'thumbnail_hash')
+
+_DATETIME_FIELDS = {'published', 'updated', 'created_at'}
+
+
+def article_has_details():
+    """SQL form of the templates' `content and content != summary` check"""
+    return and_(Article.content.isnot(None), Article.content != '',
+                or_(Article.summary.is_(None), Article.content != Article.summary))
+
+
+def article_columns(fields, keys=('id', 'published')):
+    """Columns to select for ``fields``, followed by any missing sort ``keys``"""
+    names = list(fields) + [name for name in keys if name not in fields]
+    return [getattr(Article, name) for name in names]
+
+
+def article_serializer(fields):
+    """Row-to-dict function for rows selected with article_columns(fields).
+
+    Gives the same values as Article.to_dict() for those fields without
+    building ORM objects.
+    """
+    fields = tuple(fields)
+    dates = [name for name in fields if name in _DATETIME_FIELDS]
+    
+    def serialize(row):
+        data = dict(zip(fields, row))
+        for name in dates:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return data
+    
+    return serialize
+
+
 class RssArticles(Base):
     __tablename__ = 'rss_articles'
 
@@ -56,3 +125,144 @@ class RssArticles(Base):
     title = Column(String(500), nullable=False)
     link = Column(String(1000), unique=True, nullable=False)
     published = Column(DateTime)
+
+
+class FeedState(Base):
+    """Polling state for one RSS feed, keyed by the feed URL in the rss table"""
+    __tablename__ = 'feed_state'
+
+    feed_url = Column(String(1000), primary_key=True)
+
+    # Conditional GET validators from the last 200 response
+    etag = Column(String(500))
+    last_modified = Column(String(100))
+
+    seen_guids = Column(Text)                 # JSON list of entry GUIDs in the last body
+    min_interval = Column(Integer)            # Seconds between polls from <ttl> / sy:updatePeriod
+
+    # Last poll result
+    last_polled = Column(DateTime)
+    last_status = Column(String(200))         # 'ok', 'not_modified' or 'error: ...'
+    last_http_status = Column(Integer)
+
+    # Per-feed NLP setting: always, never or auto; NULL uses EXTRACT_NLP
+    nlp = Column(String(10))
+
+    # Adaptive schedule (scheduler.py)
+    next_poll_at = Column(DateTime)           # NULL polls on the next tick
+    poll_interval = Column(Integer)           # Seconds between healthy polls, from the publish rate
+    publish_rate = Column(Float)              # Moving average of entries per hour
+    error_count = Column(Integer)             # Consecutive failed polls, for backoff
+
+
+class IngestState(Base):
+    """Single-row ingestion counter, bumped each time fetched articles are committed"""
+    __tablename__ = 'ingest_state'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Increments on every ingest commit
+    article_count = Column(Integer)                      # Total articles after the last ingest
+    updated_at = Column(DateTime)
+
+
+class Category(Base):
+    """Distinct category/tag, matched case-insensitively through ``key``"""
+    __tablename__ = 'categories'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String(200), unique=True, nullable=False)   # Lower-cased, whitespace-collapsed name
+    name = Column(String(200), nullable=False)               # Name as first seen
+
+
+class ArticleCategory(Base):
+    """Link table between articles and categories"""
+    __tablename__ = 'article_categories'
+
+    article_id = Column(Integer, ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        # Serves "articles with category X" lookups
+        Index('ix_article_categories_category_article', 'category_id', 'article_id'),
+    )
+
+
+class Author(Base):
+    """Distinct author, matched case-insensitively through ``key``"""
+    __tablename__ = 'authors'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(String(200), unique=True, nullable=False)
+    name = Column(String(200), nullable=False)
+
+
+class ArticleAuthor(Base):
+    """Link table between articles and authors"""
+    __tablename__ = 'article_authors'
+
+    article_id = Column(Integer, ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    author_id = Column(Integer, ForeignKey('authors.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_article_authors_author_article', 'author_id', 'article_id'),
+    )
+
+
+class SearchPosting(Base):
+    """Inverted-index posting used for full-text search on databases without tsvector"""
+    __tablename__ = 'search_postings'
+
+    term = Column(String(64), primary_key=True)
+    article_id = Column(Integer, ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    weight = Column(Float, nullable=False)    # Field-weighted term frequency
+
+    __table_args__ = (
+        Index('ix_search_postings_article', 'article_id'),
+    )
+
+
+class FingerprintBand(Base):
+    """One LSH band of a story cluster leader's MinHash; articles sharing a band are near-duplicate candidates"""
+    __tablename__ = 'fingerprint_bands'
+
+    band = Column(Integer, primary_key=True)  # Band number, 0..DEDUP_BANDS-1
+    value = Column(Integer, primary_key=True) # Hash of the band's signature slots
+    article_id = Column(Integer, ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_fingerprint_bands_article', 'article_id'),
+    )
+
+
+class FetchJob(Base):
+    """Durable fetch job, claimed by worker processes through a lease"""
+    __tablename__ = 'fetch_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(50), nullable=False, default='fetch')
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+
+    # Lease held by the worker running the job
+    worker_id = Column(String(200))
+    lease_expires_at = Column(DateTime)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Progress and results (JSON)
+    progress = Column(Text)                   # {"done": n, "total": m}
+    feed_results = Column(Text)               # {feed_url: {"status": ..., "articles": n}}
+    report = Column(Text)                     # Run report from fetch.main1
+    checkpoint = Column(Text)                 # {"feeds": [...], "finished": [...], "links": n} to resume from
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration = Column(Float)                  # Seconds
+
+    __table_args__ = (
+        Index('ix_fetch_jobs_status_id', 'status', 'id'),
+        # At most one queued or running job per kind
+        Index('uq_fetch_jobs_active_kind', 'kind', unique=True,
+              postgresql_where=text("status IN ('queued', 'running')"),
+              sqlite_where=text("status IN ('queued', 'running')")),
+    )
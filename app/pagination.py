@@ -0,0 +1,99 @@
+import base64
+import json
+from sqlalchemy import asc, desc, tuple_
+
+
+def encode_cursor(values, direction):
+    """Opaque cursor pointing just past a row with sort key ``values``"""
+    payload = json.dumps(list(values) + [direction])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (key values, direction) from a cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        *values, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev') or not values:
+            raise ValueError(direction)
+        return values, direction
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _page_result(items, page, has_prev, has_next, key_of):
+    return {
+        'items': items,
+        'page': page,
+        'has_prev': has_prev,
+        'has_next': has_next,
+        'prev_page': page - 1 if page and has_prev else None,
+        'next_page': page + 1 if page and has_next else None,
+        'prev_cursor': encode_cursor(key_of(items[0]), 'prev') if has_prev and items else None,
+        'next_cursor': encode_cursor(key_of(items[-1]), 'next') if has_next and items else None,
+    }
+
+
+def paginate(query, keys, per_page, page=1, cursor=None, key_of=None, parse_key=None):
+    """Fetch one page of ``query`` ordered by ``keys``, largest first.
+
+    With a ``cursor`` the page is found by a keyset seek on ``keys``;
+    otherwise the legacy ``page`` number is used with OFFSET. Either way
+    the result carries cursors for the neighbouring pages. ``key_of(row)``
+    returns the JSON-able sort key of a row and ``parse_key(values)``
+    turns it back into query parameters.
+    """
+    key = tuple_(*keys)
+    
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        try:
+            bound = tuple_(*parse_key(values))
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if direction == 'next':
+            rows = query.filter(key < bound)\
+                .order_by(*[desc(k) for k in keys])\
+                .limit(per_page + 1)\
+                .all()
+            has_next, has_prev = len(rows) > per_page, True
+            items = rows[:per_page]
+        else:
+            rows = query.filter(key > bound)\
+                .order_by(*[asc(k) for k in keys])\
+                .limit(per_page + 1)\
+                .all()
+            has_next, has_prev = True, len(rows) > per_page
+            items = list(reversed(rows[:per_page]))
+        page = None
+    else:
+        rows = query.order_by(*[desc(k) for k in keys])\
+            .offset((page - 1) * per_page)\
+            .limit(per_page + 1)\
+            .all()
+        has_next, has_prev = len(rows) > per_page, page > 1
+        items = rows[:per_page]
+    
+    return _page_result(items, page, has_prev, has_next, key_of)
+
+
+def paginate_list(items, per_page, page=1, cursor=None, key_of=None):
+    """Same contract as ``paginate`` for an in-memory list sorted by ``key_of``, largest first"""
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        bound = tuple(values)
+        if direction == 'next':
+            rest = [item for item in items if tuple(key_of(item)) < bound]
+            has_next, has_prev = len(rest) > per_page, True
+            page_items = rest[:per_page]
+        else:
+            rest = [item for item in items if tuple(key_of(item)) > bound]
+            has_next, has_prev = True, len(rest) > per_page
+            page_items = rest[-per_page:]
+        page = None
+    else:
+        start = (page - 1) * per_page
+        page_items = items[start:start + per_page]
+        has_next, has_prev = len(items) > start + per_page, page > 1
+    
+    return _page_result(page_items, page, has_prev, has_next, key_of)
@@ -1,160 +1,310 @@
-from flask import Blueprint, render_template, request, jsonify
-from sqlalchemy import desc, func, text
+from flask import Blueprint, Response, render_template, request, jsonify, url_for
+from sqlalchemy import func, text
+from sqlalchemy.orm import load_only, with_expression
 from app import get_db_session
-from app.models import Article
+from app.models import (
+    ARTICLE_CARD_FIELDS, ARTICLE_FIELDS, ARTICLE_LIST_FIELDS, Article, Author, FeedState, IngestState,
+    article_columns, article_has_details, article_serializer,
+)
 from app.config import Config
-from fetch import main1
+from app.cache import article_cache, cached_response, count_cache, normalize_filters
+from app.changes import CHANGES_MAX_PAGE_SIZE, CHANGES_MAX_WAIT, CHANGES_PAGE_SIZE, poll_changes, stream_changes
+from app.dedup import collapse_duplicates, duplicate_counts
+from app.tags import FACETS, facet_counts, filter_by_tags, split_tags
+from app.pagination import paginate
+from app.search import count_matches, search_articles
+from app.jobs import enqueue_job, job_to_dict, latest_jobs
+from app.metrics import fetch_report_lines, gauge_lines, registry
+from app.export import EXPORT_FORMATS, export_chunks, parse_batch_size, parse_columns, parse_since, stream_articles
+from database import engine_pool_stats
+from thumbnails import THUMB_SIZES, ThumbnailError, download_image, get_thumbnail_cache
+from datetime import datetime
+import calendar
+import json
 import os
-import threading
-import time
 
 
 main = Blueprint('main', __name__)
 
+# Most article ids one /api/articles/batch request may ask for
+ARTICLE_BATCH_MAX = int(os.getenv("ARTICLE_BATCH_MAX", "100"))
+
 def get_count_efficient(session, model):
     """Efficiently count rows without subqueries"""
     return session.query(func.count(model.id)).scalar()
 
+@main.app_template_global()
+def page_url(**changes):
+    """This page's URL with every filter argument kept and ``changes`` (a cursor or page) applied"""
+    args = request.args.to_dict(flat=False)
+    args.pop('cursor', None)
+    args.pop('page', None)
+    args.update({name: value for name, value in changes.items() if value is not None})
+    return url_for(request.endpoint, **request.view_args, **args)
+
+def parse_tag_arg(name):
+    """Tag keys from a repeated and/or comma-separated query argument"""
+    keys = set()
+    for value in request.args.getlist(name):
+        keys.update(split_tags(value))
+    return sorted(keys)
+
+def parse_match_arg():
+    """'all' (AND, the default) or 'any' (OR) across multiple tags"""
+    return 'any' if request.args.get('match', '').lower() in ('any', 'or') else 'all'
+
+def parse_fields_arg(default=ARTICLE_LIST_FIELDS):
+    """Article fields from fields= in to_dict() order; 'all' or '*' for every field"""
+    value = request.args.get('fields', '').strip()
+    if not value:
+        return default
+    if value in ('all', '*'):
+        return ARTICLE_FIELDS
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = sorted(requested - set(ARTICLE_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(name for name in ARTICLE_FIELDS if name in requested)
+
+def parse_ids_arg():
+    """Article ids from a repeated and/or comma-separated ids= argument, in request order without repeats"""
+    ids = []
+    for value in request.args.getlist('ids'):
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit() or int(part) < 1:
+                raise ValueError(f"Invalid article id: {part}")
+            if int(part) not in ids:
+                ids.append(int(part))
+    if not ids:
+        raise ValueError("ids is required")
+    if len(ids) > ARTICLE_BATCH_MAX:
+        raise ValueError(f"At most {ARTICLE_BATCH_MAX} ids per request")
+    return ids
+
+def parse_collapse_arg():
+    """collapse=1 lists one article per story cluster"""
+    return request.args.get('collapse', '').lower() in ('1', 'true', 'yes')
+
+def parse_story_arg():
+    """story=<id> lists the articles of one story cluster"""
+    return request.args.get('story', type=int)
+
+def filtered_articles(session, authors, categories, match, collapse=False, story=None):
+    """Article query restricted by exact author and category tags and story clusters"""
+    query = session.query(Article)
+    query = filter_by_tags(query, 'author', authors, match)
+    query = filter_by_tags(query, 'category', categories, match)
+    if story:
+        query = query.filter((Article.id == story) | (Article.duplicate_of == story))
+    elif collapse:
+        query = collapse_duplicates(query)
+    return query
+
+def tag_filters(authors, categories, match, collapse=False, story=None):
+    """Cache key parts for a set of tag filters"""
+    return dict(author=','.join(authors), category=','.join(categories),
+                match=match if len(authors) > 1 or len(categories) > 1 else None,
+                collapse=collapse and not story, story=story)
+
+def estimate_total(session):
+    """Unfiltered article total from the ingest counter or table statistics"""
+    total = session.query(IngestState.article_count).filter(IngestState.id == 1).scalar()
+    if total is not None:
+        return total
+    
+    if session.bind.dialect.name == 'postgresql':
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'articles'")
+        ).scalar()
+        if estimate and estimate > 0:
+            return estimate
+    
+    return get_count_efficient(session, Article)
+
+def count_articles(session, query, **filters):
+    """Total for a filtered listing, cached per filter set until the next ingest"""
+    key = normalize_filters(**filters)
+    if not key:
+        return count_cache.get(session, key, lambda: estimate_total(session))
+    return count_cache.get(session, key, query.count)
+
+def lookup_articles(session, ids):
+    """{id: article dict or None} for ``ids`` through the per-id article cache; misses load in one IN query"""
+    serialize = article_serializer(ARTICLE_FIELDS)
+    
+    def load(missing):
+        rows = session.query(*article_columns(ARTICLE_FIELDS))\
+            .filter(Article.id.in_(missing))\
+            .all()
+        return {row.id: serialize(row) for row in rows}
+    
+    return article_cache.get_many(session, ids, load)
+
+def paginate_articles(query, per_page, page=1, cursor=None):
+    """Fetch one page ordered by (published, id) newest first, by page number or cursor"""
+    result = paginate(
+        query, (Article.published, Article.id), per_page, page, cursor,
+        key_of=lambda article: [article.published.isoformat(), article.id],
+        parse_key=lambda values: (datetime.fromisoformat(values[0]), int(values[1])),
+    )
+    result['articles'] = result.pop('items')
+    return result
+
 @main.route('/')
+@cached_response
 def index():
     """Homepage with paginated articles showing enhanced data"""
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    cursor = request.args.get('cursor', '').strip()
     per_page = Config.ARTICLES_PER_PAGE
     
     # Get filter parameters
     author_filter = request.args.get('author', '').strip()
     category_filter = request.args.get('category', '').strip()
     # source_filter = request.args.get('source', '').strip()
-    
-    # Calculate offset for pagination
-    offset = (page - 1) * per_page
+    authors, categories, match = parse_tag_arg('author'), parse_tag_arg('category'), parse_match_arg()
+    collapse, story = parse_collapse_arg(), parse_story_arg()
     
     # Get database session
     session = get_db_session()
     
     try:
         # Build query with filters
-        query = session.query(Article)
-        
-        if author_filter:
-            query = query.filter(Article.author.ilike(f'%{author_filter}%'))
-        
-        if category_filter:
-            query = query.filter(Article.categories.ilike(f'%{category_filter}%'))
+        query = filtered_articles(session, authors, categories, match, collapse, story)
             
         # if source_filter:
         #     query = query.filter(Article.source_feed.ilike(f'%{source_filter}%'))
         
         # Get total count efficiently
-        total_articles = query.count()
+        total_articles = count_articles(session, query, **tag_filters(authors, categories, match, collapse, story))
         
-        # Get articles for current page with enhanced data
-        articles = query.order_by(desc(Article.published))\
-            .offset(offset)\
-            .limit(per_page)\
-            .all()
+        # Get articles for current page, loading only the columns the cards show
+        result = paginate_articles(query.options(
+            load_only(*ARTICLE_CARD_FIELDS),
+            with_expression(Article.has_details, article_has_details()),
+        ), per_page, page, cursor)
+        
+        # Other sources carrying each story
+        duplicates = duplicate_counts(session, [article.id for article in result['articles']]) if collapse else {}
         
         # Get unique authors, sources for filter dropdowns
-        authors = session.query(Article.author)\
-            .filter(Article.author.isnot(None))\
-            .distinct().all()
+        author_names = session.query(Author.name).order_by(Author.name).all()
         
         # sources = session.query(Article.source_feed)\
         #     .filter(Article.source_feed.isnot(None))\
         #     .distinct().limit(10).all()
         
-        # Calculate pagination info
-        has_prev = page > 1
-        has_next = offset + per_page < total_articles
-        prev_page = page - 1 if has_prev else None
-        next_page = page + 1 if has_next else None
-        
         return render_template('index.html',
-                             articles=articles,
-                             has_prev=has_prev,
-                             has_next=has_next,
-                             prev_page=prev_page,
-                             next_page=next_page,
-                             current_page=page,
+                             articles=result['articles'],
+                             has_prev=result['has_prev'],
+                             has_next=result['has_next'],
+                             prev_page=result['prev_page'],
+                             next_page=result['next_page'],
+                             prev_cursor=result['prev_cursor'],
+                             next_cursor=result['next_cursor'],
+                             current_page=result['page'],
                              total_articles=total_articles,
-                             authors=[a[0] for a in authors],
+                             authors=[a[0] for a in author_names],
                             #  sources=[s[0] for s in sources],
                              current_author=author_filter,
-                             current_category=category_filter
+                             current_category=category_filter,
+                             collapse=collapse,
+                             duplicates=duplicates
                             #  current_source=source_filter)
         )
     
+    except ValueError as e:
+        return render_template('error.html',
+                             error="Invalid page",
+                             message=str(e)), 400
+    
     except Exception as e:
         print(f"Error fetching articles: {e}")
-        return render_template('index.html', articles=[], error="Error loading articles")
+        return render_template('index.html', articles=[], error="Error loading articles"), 500
     
     finally:
         session.close()
 
 @main.route('/api/articles')
+@cached_response
 def api_articles():
     """JSON API endpoint for articles with enhanced metadata"""
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    cursor = request.args.get('cursor', '').strip()
     per_page = Config.ARTICLES_PER_PAGE
     
     # Get filter parameters
     author_filter = request.args.get('author', '').strip()
     category_filter = request.args.get('category', '').strip()
     # source_filter = request.args.get('source', '').strip()
+    authors, categories, match = parse_tag_arg('author'), parse_tag_arg('category'), parse_match_arg()
+    collapse, story = parse_collapse_arg(), parse_story_arg()
     
-    # Calculate offset for pagination
-    offset = (page - 1) * per_page
+    # include_total=false skips counting; has_next comes from fetching one extra row
+    include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
     
     # Get database session
     session = get_db_session()
     
     try:
-        # Build query with filters
-        query = session.query(Article)
+        # Only the requested fields are selected; content is left out unless asked for
+        fields = parse_fields_arg()
         
-        if author_filter:
-            query = query.filter(Article.author.ilike(f'%{author_filter}%'))
-        
-        if category_filter:
-            query = query.filter(Article.categories.ilike(f'%{category_filter}%'))
+        # Build query with filters
+        query = filtered_articles(session, authors, categories, match, collapse, story)
             
         # if source_filter:
         #     query = query.filter(Article.source_feed.ilike(f'%{source_filter}%'))
         
         # Get total count efficiently
-        total_articles = query.count()
+        total_articles = None
+        if include_total:
+            total_articles = count_articles(session, query, **tag_filters(authors, categories, match, collapse, story))
         
-        # Get articles for current page
-        articles = query.order_by(desc(Article.published))\
-            .offset(offset)\
-            .limit(per_page)\
-            .all()
+        # Get column rows for current page
+        result = paginate_articles(query.with_entities(*article_columns(fields)), per_page, page, cursor)
         
-        # Convert to dictionaries with enhanced fields
-        articles_data = [article.to_dict() for article in articles]
+        # Convert to dictionaries with the selected fields
+        serialize = article_serializer(fields)
+        articles_data = [serialize(row) for row in result['articles']]
         
-        # Calculate pagination info
-        has_prev = page > 1
-        has_next = offset + per_page < total_articles
+        # Collapsed listings say how many other sources carry each story
+        if collapse and not story:
+            duplicates = duplicate_counts(session, [row.id for row in result['articles']])
+            for row, data in zip(result['articles'], articles_data):
+                data['duplicate_count'] = duplicates.get(row.id, 0)
         
         return jsonify({
             'articles': articles_data,
             'pagination': {
-                'page': page,
+                'page': result['page'],
                 'per_page': per_page,
                 'total': total_articles,
-                'has_prev': has_prev,
-                'has_next': has_next,
-                'prev_page': page - 1 if has_prev else None,
-                'next_page': page + 1 if has_next else None
+                'has_prev': result['has_prev'],
+                'has_next': result['has_next'],
+                'prev_page': result['prev_page'],
+                'next_page': result['next_page'],
+                'cursor': cursor or None,
+                'prev_cursor': result['prev_cursor'],
+                'next_cursor': result['next_cursor']
             },
             'filters': {
                 'author': author_filter,
-                'category': category_filter
+                'category': category_filter,
+                'match': match,
+                'collapse': collapse,
+                'story': story
                 # 'source': source_filter
-            }
+            },
+            'fields': list(fields)
         })
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         print(f"Error fetching articles: {e}")
         return jsonify({'error': 'Error loading articles'}), 500
@@ -162,7 +312,227 @@ def api_articles():
     finally:
         session.close()
 
+@main.route('/api/articles/<int:article_id>')
+@cached_response
+def api_article(article_id):
+    """JSON for one article; every field unless fields= narrows it"""
+    session = get_db_session()
+    
+    try:
+        fields = parse_fields_arg(default=ARTICLE_FIELDS)
+        article = lookup_articles(session, [article_id])[article_id]
+        
+        if article is None:
+            return jsonify({'error': 'Article not found'}), 404
+        
+        return jsonify({name: article[name] for name in fields})
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        print(f"Error fetching article {article_id}: {e}")
+        return jsonify({'error': 'Error loading article'}), 500
+    
+    finally:
+        session.close()
+
+# Not response-cached: id sets rarely repeat, and the per-id article cache already serves the rows
+@main.route('/api/articles/batch')
+def api_articles_batch():
+    """JSON for up to ARTICLE_BATCH_MAX articles by id, in request order; unknown ids are listed under missing"""
+    session = get_db_session()
+    
+    try:
+        ids = parse_ids_arg()
+        fields = parse_fields_arg(default=ARTICLE_FIELDS)
+        found = lookup_articles(session, ids)
+        
+        return jsonify({
+            'articles': [{name: found[article_id][name] for name in fields}
+                         for article_id in ids if found[article_id] is not None],
+            'missing': [article_id for article_id in ids if found[article_id] is None],
+            'fields': list(fields)
+        })
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        print(f"Error fetching articles by id: {e}")
+        return jsonify({'error': 'Error loading articles'}), 500
+    
+    finally:
+        session.close()
+
+@main.route('/api/search')
+@cached_response
+def api_search():
+    """Ranked full-text search over article title, summary and content"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Missing search query (q)'}), 400
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    cursor = request.args.get('cursor', '').strip()
+    per_page = Config.ARTICLES_PER_PAGE
+    include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
+    
+    session = get_db_session()
+    
+    try:
+        result = search_articles(session, q, per_page, page, cursor)
+        
+        total = result['total']
+        if include_total and total is None:
+            total = count_cache.get(session, ('search', ' '.join(q.lower().split())),
+                                    lambda: count_matches(session, q))
+        
+        return jsonify({
+            'query': q,
+            'results': [
+                dict(article.to_dict(), score=score, snippet=snippet)
+                for article, score, snippet in result['results']
+            ],
+            'pagination': {
+                'page': result['page'],
+                'per_page': per_page,
+                'total': total if include_total else None,
+                'has_prev': result['has_prev'],
+                'has_next': result['has_next'],
+                'prev_page': result['prev_page'],
+                'next_page': result['next_page'],
+                'cursor': cursor or None,
+                'prev_cursor': result['prev_cursor'],
+                'next_cursor': result['next_cursor']
+            }
+        })
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        print(f"Error searching articles: {e}")
+        return jsonify({'error': 'Error searching articles'}), 500
+    
+    finally:
+        session.close()
+
+@main.route('/api/facets')
+@cached_response
+def api_facets():
+    """Article counts per category or author, within any author/category filters"""
+    facet = request.args.get('type', 'category')
+    if facet not in FACETS:
+        return jsonify({'error': f"Unknown facet type: {facet}"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    authors, categories, match = parse_tag_arg('author'), parse_tag_arg('category'), parse_match_arg()
+    
+    session = get_db_session()
+    
+    try:
+        query = filtered_articles(session, authors, categories, match)
+        key = ('facets', facet, limit) + normalize_filters(**tag_filters(authors, categories, match))
+        facets = count_cache.get(session, key, lambda: [
+            {'name': name, 'key': key, 'count': count}
+            for name, key, count in facet_counts(query, facet, limit)
+        ])
+        
+        return jsonify({
+            'type': facet,
+            'facets': facets,
+            'filters': {
+                'author': authors,
+                'category': categories,
+                'match': match
+            }
+        })
+    
+    except Exception as e:
+        print(f"Error fetching facets: {e}")
+        return jsonify({'error': 'Error loading facets'}), 500
+    
+    finally:
+        session.close()
+
+@main.route('/api/export')
+def api_export():
+    """Stream the article archive as NDJSON or CSV with constant memory use"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unknown export format: {fmt}"}), 400
+    
+    try:
+        columns = parse_columns(request.args.get('columns', '').strip())
+        since = parse_since(request.args.get('since', '').strip())
+        batch_size = parse_batch_size(request.args.get('batch_size', type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    session = get_db_session()
+    
+    try:
+        batches = stream_articles(session, columns, since, batch_size)
+    except Exception as e:
+        session.close()
+        print(f"Error exporting articles: {e}")
+        return jsonify({'error': 'Error exporting articles'}), 500
+    
+    # The session stays open until the last batch has been sent
+    def generate():
+        try:
+            yield from export_chunks(batches, columns, fmt)
+        except Exception as e:
+            # Headers are already sent; re-raising aborts the transfer so clients don't take a truncated body as complete
+            print(f"Error streaming article export: {e}")
+            raise
+        finally:
+            session.close()
+    
+    response = Response(generate(), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=articles.{fmt}'
+    return response
+
+@main.route('/api/changes')
+def api_changes():
+    """Articles inserted after a cursor, as JSON (optionally long-polled) or a Server-Sent Events stream"""
+    try:
+        fields = parse_fields_arg()
+        since = request.args.get('since', type=int)
+        if since is None and request.args.get('since', '').strip():
+            raise ValueError(f"Invalid since cursor: {request.args['since']}")
+        since_time = parse_since(request.args.get('since_time', '').strip())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The cursor is an article id, so it is always returned
+    fields = fields if 'id' in fields else ('id',) + fields
+    limit = min(max(request.args.get('limit', CHANGES_PAGE_SIZE, type=int), 1), CHANGES_MAX_PAGE_SIZE)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), CHANGES_MAX_WAIT)
+    
+    if 'text/event-stream' in request.headers.get('Accept', '') or request.args.get('stream') == '1':
+        # A reconnecting EventSource sends the id of the last article it received
+        since = request.headers.get('Last-Event-ID', since, type=int)
+        response = Response(stream_changes(fields, since, since_time, limit), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
+    try:
+        articles, cursor, has_more = poll_changes(fields, since, since_time, limit, wait)
+    except Exception as e:
+        print(f"Error fetching article changes: {e}")
+        return jsonify({'error': 'Error loading article changes'}), 500
+    
+    return jsonify({
+        'articles': articles,
+        'cursor': cursor,
+        'has_more': has_more,
+        'fields': list(fields)
+    })
+
 @main.route('/article/<int:article_id>')
+@cached_response
 def article_detail(article_id):
     """Individual article page showing full content"""
     session = get_db_session()
@@ -186,72 +556,174 @@ def article_detail(article_id):
     finally:
         session.close()
 
+@main.route('/thumb/<thumb_hash>')
+def thumbnail(thumb_hash):
+    """Resized article image from the local thumbnail cache, cacheable for a year"""
+    size = request.args.get('size', 'list')
+    if size not in THUMB_SIZES or len(thumb_hash) != 64 or not all(c in '0123456789abcdef' for c in thumb_hash):
+        return jsonify({'error': 'Unknown thumbnail'}), 404
+    thumbnail_cache = get_thumbnail_cache()
+    if thumbnail_cache is None:
+        return jsonify({'error': 'Thumbnails are disabled'}), 404
+    
+    data = thumbnail_cache.get(thumb_hash, size)
+    if data is None:
+        # Evicted, or made by a fetch worker with its own disk: rebuild it from the source image
+        source = thumbnail_cache.source_url(thumb_hash)
+        if source is None:
+            session = get_db_session()
+            try:
+                source = session.query(Article.thumbnail_url)\
+                    .filter(Article.thumbnail_hash == thumb_hash)\
+                    .limit(1)\
+                    .scalar()
+            finally:
+                session.close()
+        if not source:
+            return jsonify({'error': 'Unknown thumbnail'}), 404
+        try:
+            digest = thumbnail_cache.put(source, download_image(source))
+        except ThumbnailError as e:
+            print(f"Error rebuilding thumbnail {thumb_hash}: {e}")
+            return jsonify({'error': 'Thumbnail unavailable'}), 502
+        data = thumbnail_cache.get(digest, size)
+        if data is None:
+            return jsonify({'error': 'Thumbnail unavailable'}), 502
+        if digest != thumb_hash:
+            # The publisher has since changed the image; serve it, but don't let it be cached as this hash
+            response = Response(data, mimetype='image/jpeg')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    
+    response = Response(data, mimetype='image/jpeg')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['ETag'] = f'"{thumb_hash}-{size}"'
+    return response
 
-# Here we define a route to trigger the fetch process manually
-
-CRON_SECRET = os.getenv("CRON_SECRET", "changeme")
 
-# Global variable to track fetch status
-fetch_status = {
-    "running": False,
-    "last_run": None,
-    "last_status": "idle"
-}
+# Here we define a route to trigger the fetch process manually.
+# Fetches run in worker.py processes; the web app only queues jobs and reads their state.
 
-def background_fetch():
-    """Run the fetch process in background"""
-    global fetch_status
-    try:
-        fetch_status["running"] = True
-        fetch_status["last_status"] = "running"
-        print("🚀 Starting background RSS fetch...")
-        
-        main1()  # This can take as long as needed
-        
-        fetch_status["last_status"] = "success"
-        fetch_status["last_run"] = time.time()
-        print("✅ Background RSS fetch completed successfully")
-        
-    except Exception as e:
-        fetch_status["last_status"] = f"error: {str(e)}"
-        print(f"❌ Background RSS fetch failed: {e}")
-    finally:
-        fetch_status["running"] = False
+CRON_SECRET = os.getenv("CRON_SECRET", "changeme")
 
 @main.route("/cron/fetch/", methods=["POST", "GET"])
 def cron_fetch():
-    """Trigger RSS fetch in background thread"""
+    """Queue an RSS fetch job for the fetch worker"""
     token = request.args.get("token")
     if token != CRON_SECRET:
         return jsonify({"error": "Unauthorized"}), 403
     
-    # Check if fetch is already running
-    if fetch_status["running"]:
+    session = get_db_session()
+    
+    try:
+        job, created = enqueue_job(session)
+        
+        # Check if fetch is already queued or running
+        if not created:
+            return jsonify({
+                "status": "already_running" if job.status == "running" else "already_queued",
+                "message": f"Fetch job {job.id} is already {job.status}",
+                "job": job_to_dict(job)
+            }), 202
+        
         return jsonify({
-            "status": "already_running",
-            "message": "Fetch process is already running"
-        }), 202
+            "status": "queued",
+            "message": "RSS fetch queued for the fetch worker",
+            "job": job_to_dict(job)
+        })
     
-    # Start background thread
-    thread = threading.Thread(target=background_fetch)
-    thread.daemon = True  # Thread will die when main process dies
-    thread.start()
+    except Exception as e:
+        print(f"Error queueing fetch job: {e}")
+        return jsonify({"error": "Error queueing fetch job"}), 500
     
-    return jsonify({
-        "status": "started",
-        "message": "RSS fetch started in background"
-    })
+    finally:
+        session.close()
 
 
 
 @main.route("/cron/status/", methods=["GET"])
 def cron_status():
-    """Check the status of RSS fetch process"""
-    return jsonify({
-        "running": fetch_status["running"],
-        "last_run": fetch_status["last_run"],
-        "last_status": fetch_status["last_status"],
-        "last_run_time": time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(fetch_status["last_run"])) if fetch_status["last_run"] else None
-    })
+    """Check the status of RSS fetch jobs shared by all workers"""
+    session = get_db_session()
+    
+    try:
+        current, last = latest_jobs(session)
+        last_run = last.finished_at if last else None
+        
+        return jsonify({
+            "running": bool(current and current.status == "running"),
+            "last_run": calendar.timegm(last_run.utctimetuple()) if last_run else None,
+            "last_status": current.status if current else (last.status if last else "idle"),
+            "last_run_time": last_run.strftime('%Y-%m-%d %H:%M:%S UTC') if last_run else None,
+            "current_job": job_to_dict(current) if current else None,
+            "last_job": job_to_dict(last) if last else None,
+            "schedule": feed_schedule(session),
+            "metrics": {
+                "fetch": latest_report(current, last),
+                "http": registry.snapshot()
+            }
+        })
+    
+    except Exception as e:
+        print(f"Error reading fetch status: {e}")
+        return jsonify({"error": "Error reading fetch status"}), 500
+    
+    finally:
+        session.close()
+
+
+def feed_schedule(session):
+    """Feeds due at the next tick and when the next one after that comes up"""
+    now = datetime.utcnow()
+    due = session.query(func.count(FeedState.feed_url))\
+        .filter((FeedState.next_poll_at.is_(None)) | (FeedState.next_poll_at <= now))\
+        .scalar()
+    upcoming = session.query(func.min(FeedState.next_poll_at))\
+        .filter(FeedState.next_poll_at > now)\
+        .scalar()
+    backing_off = session.query(func.count(FeedState.feed_url))\
+        .filter(FeedState.error_count > 0)\
+        .scalar()
+    return {
+        "due": due,
+        "backing_off": backing_off,
+        "next_poll_at": upcoming.isoformat() + 'Z' if upcoming else None
+    }
+
+
+def latest_report(current, last):
+    """Run report of the running job (live, from heartbeats) or else the last finished one"""
+    for job in (current, last):
+        if job is not None and job.report:
+            return json.loads(job.report)
+    return None
 
 
+@main.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus-style metrics for requests, database time and the fetch pipeline"""
+    lines = registry.render()
+    session = get_db_session()
+    
+    try:
+        current, last = latest_jobs(session)
+        lines += gauge_lines("news_fetch_job_running", "1 while a fetch job is running",
+                             [({}, int(bool(current and current.status == "running")))])
+        if last and last.finished_at:
+            lines += gauge_lines("news_fetch_last_finished_timestamp_seconds", "When the last fetch job finished",
+                                 [({"status": last.status}, calendar.timegm(last.finished_at.utctimetuple()))])
+        report = latest_report(current, last)
+        if report:
+            lines += fetch_report_lines(report)
+        
+        pool = engine_pool_stats(session.bind)
+        lines += gauge_lines("news_db_pool_connections", "SQLAlchemy pool connections by state",
+                             [({"state": state}, pool.get(state)) for state in ("size", "checked_out", "overflow")])
+    
+    except Exception as e:
+        print(f"Error collecting metrics: {e}")
+    
+    finally:
+        session.close()
+    
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
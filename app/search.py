@@ -0,0 +1,218 @@
+import math
+import re
+from collections import Counter, defaultdict
+from markupsafe import escape
+from sqlalchemy import cast, func, literal, literal_column, text
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from app.models import Article, SearchPosting
+from app.pagination import paginate, paginate_list
+
+# Weighted search document; queries must use exactly this expression for the GIN index to apply
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(articles.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(articles.summary, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(articles.content, '')), 'C')"
+)
+SEARCH_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_articles_search ON articles "
+    f"USING gin (({SEARCH_VECTOR_SQL.replace('articles.', '')}))"
+)
+# ts_headline marks matches with private-use sentinels, so the text can be HTML-escaped before they become <mark>
+HEADLINE_START, HEADLINE_STOP = "\ue000", "\ue001"
+HEADLINE_OPTIONS = f"MaxFragments=2, MaxWords=30, MinWords=10, StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}"
+
+# Field weights and tokenizer settings for the inverted-index fallback
+FIELD_WEIGHTS = (('title', 3.0), ('summary', 2.0), ('content', 1.0))
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in is it its of on or "
+    "she that the their there they this to was were will with".split()
+)
+SNIPPET_CHARS = 160
+CHUNK_SIZE = 500
+
+
+def uses_tsvector(session_or_engine):
+    """True when the database provides tsvector full-text search"""
+    bind = getattr(session_or_engine, 'bind', session_or_engine)
+    return bind.dialect.name == 'postgresql'
+
+
+def ensure_search_index(engine):
+    """Create the tsvector GIN expression index on PostgreSQL"""
+    if uses_tsvector(engine):
+        with engine.begin() as connection:
+            connection.execute(text(SEARCH_INDEX_DDL))
+
+
+def tokenize(value):
+    """Lower-cased word tokens without stopwords, for indexing and querying"""
+    return [
+        token[:64] for token in TOKEN_RE.findall((value or '').lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def index_articles(session, rows):
+    """Refresh inverted-index postings for upserted article rows.
+
+    A no-op on PostgreSQL, where the GIN expression index is maintained
+    by the database as rows are written.
+    """
+    if uses_tsvector(session) or not rows:
+        return
+    
+    links = [row['link'] for row in rows]
+    article_ids = {}
+    for start in range(0, len(links), CHUNK_SIZE):
+        chunk = links[start:start + CHUNK_SIZE]
+        article_ids.update(session.query(Article.link, Article.id).filter(Article.link.in_(chunk)))
+    
+    ids = list(article_ids.values())
+    for start in range(0, len(ids), CHUNK_SIZE):
+        session.query(SearchPosting)\
+            .filter(SearchPosting.article_id.in_(ids[start:start + CHUNK_SIZE]))\
+            .delete(synchronize_session=False)
+    
+    postings = []
+    for row in rows:
+        if row['link'] not in article_ids:
+            continue
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(row.get(field)):
+                weights[token] += weight
+        postings.extend(
+            {'term': term, 'article_id': article_ids[row['link']], 'weight': weight}
+            for term, weight in weights.items()
+        )
+    for start in range(0, len(postings), CHUNK_SIZE):
+        session.bulk_insert_mappings(SearchPosting, postings[start:start + CHUNK_SIZE])
+
+
+def delete_postings(session, article_ids_query):
+    """Remove postings for the articles selected by ``article_ids_query``"""
+    if uses_tsvector(session):
+        return
+    session.query(SearchPosting)\
+        .filter(SearchPosting.article_id.in_(article_ids_query))\
+        .delete(synchronize_session=False)
+
+
+def search_articles(session, q, per_page, page=1, cursor=None):
+    """Ranked search over title, summary and content.
+
+    Returns the same pagination dict as ``paginate`` with ``results`` as
+    (article, score, snippet) tuples. ``total`` is filled in when it
+    comes for free, otherwise it is None and ``count_matches`` gives it.
+    """
+    if uses_tsvector(session):
+        return _tsvector_search(session, q, per_page, page, cursor)
+    return _inverted_index_search(session, q, per_page, page, cursor)
+
+
+def count_matches(session, q):
+    """Number of articles matching ``q``"""
+    if uses_tsvector(session):
+        vector = literal_column(f"({SEARCH_VECTOR_SQL})")
+        return session.query(func.count(Article.id))\
+            .filter(vector.op('@@')(func.websearch_to_tsquery('english', q)))\
+            .scalar()
+    return _inverted_index_search(session, q, 1)['total']
+
+
+def _tsvector_search(session, q, per_page, page, cursor):
+    vector = literal_column(f"({SEARCH_VECTOR_SQL})")
+    tsquery = func.websearch_to_tsquery('english', q)
+    # ts_rank_cd is a float4; as float8 the score survives the round trip through a JSON cursor
+    # exactly, so the keyset seek never matches the boundary row again
+    score = cast(func.ts_rank_cd(vector, tsquery), DOUBLE_PRECISION)
+    matches = session.query(Article, score.label('score')).filter(vector.op('@@')(tsquery))
+    
+    result = paginate(
+        matches, (score, Article.id), per_page, page, cursor,
+        key_of=lambda row: [row.score, row.Article.id],
+        parse_key=lambda values: (cast(literal(float(values[0])), DOUBLE_PRECISION), int(values[1])),
+    )
+    
+    # Headlines are only computed for the rows on this page
+    snippets = {}
+    ids = [row.Article.id for row in result['items']]
+    if ids:
+        document = func.translate(func.concat_ws(' ', Article.title, Article.summary, Article.content),
+                                  HEADLINE_START + HEADLINE_STOP, '')
+        snippets = {
+            article_id: escape_headline(headline)
+            for article_id, headline in session.query(
+                Article.id, func.ts_headline('english', document, tsquery, HEADLINE_OPTIONS))
+            .filter(Article.id.in_(ids))
+        }
+    
+    result['results'] = [(row.Article, row.score, snippets.get(row.Article.id)) for row in result.pop('items')]
+    result['total'] = None
+    return result
+
+
+def escape_headline(headline):
+    """ts_headline output HTML-escaped like make_snippet(), with only the match markers as <mark>"""
+    if headline is None:
+        return None
+    return str(escape(headline)).replace(HEADLINE_START, '<mark>').replace(HEADLINE_STOP, '</mark>')
+
+
+def _inverted_index_search(session, q, per_page, page=1, cursor=None):
+    terms = sorted(set(tokenize(q)))
+    
+    # Every query term must match, as with websearch_to_tsquery
+    weights = defaultdict(dict)
+    if terms:
+        for term, article_id, weight in session.query(
+                SearchPosting.term, SearchPosting.article_id, SearchPosting.weight)\
+                .filter(SearchPosting.term.in_(terms)):
+            weights[term][article_id] = weight
+    candidates = set.intersection(*(set(weights[term]) for term in terms)) if terms else set()
+    
+    scored = []
+    if candidates:
+        total_docs = max(session.query(func.count(Article.id)).scalar() or 0, 1)
+        idf = {term: math.log(1 + total_docs / len(weights[term])) for term in terms}
+        scored = sorted(
+            ([round(sum(weights[term][article_id] * idf[term] for term in terms), 6), article_id]
+             for article_id in candidates),
+            reverse=True,
+        )
+    
+    result = paginate_list(scored, per_page, page, cursor, key_of=lambda item: item)
+    ids = [article_id for _, article_id in result['items']]
+    articles = {article.id: article for article in session.query(Article).filter(Article.id.in_(ids))} if ids else {}
+    result['results'] = [
+        (articles[article_id], score, make_snippet(articles[article_id], terms))
+        for score, article_id in result.pop('items')
+        if article_id in articles
+    ]
+    result['total'] = len(scored)
+    return result
+
+
+def make_snippet(article, terms):
+    """Text around the first matching term, HTML-escaped, with matches in <mark>"""
+    fields = [article.summary or '', article.content or '', article.title or '']
+    document = next((field for field in fields if any(term in field.lower() for term in terms)),
+                    fields[0] or fields[1] or fields[2])
+    lowered = document.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    start = max(min(positions) - SNIPPET_CHARS // 3, 0) if positions else 0
+    excerpt = document[start:start + SNIPPET_CHARS]
+    
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+    parts = []
+    last = 0
+    for match in pattern.finditer(excerpt):
+        parts.append(str(escape(excerpt[last:match.start()])))
+        parts.append(f"<mark>{escape(match.group(0))}</mark>")
+        last = match.end()
+    parts.append(str(escape(excerpt[last:])))
+    
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if start + SNIPPET_CHARS < len(document) else ''
+    return prefix + ''.join(parts) + suffix
@@ -0,0 +1,126 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import Article, ArticleAuthor, ArticleCategory, Author, Category
+
+# (lookup model, link model, link column) for each filterable facet
+FACETS = {
+    'category': (Category, ArticleCategory, ArticleCategory.category_id),
+    'author': (Author, ArticleAuthor, ArticleAuthor.author_id),
+}
+
+# Rows per IN (...) list when resolving links and names
+CHUNK_SIZE = 500
+
+
+def tag_key(name):
+    """Normalized lookup key: whitespace collapsed and lower-cased"""
+    return ' '.join(name.split()).lower()[:200]
+
+
+def split_tags(value):
+    """Split a comma-separated categories/authors string into distinct names"""
+    names = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())[:200]
+        if name:
+            names.setdefault(tag_key(name), name)
+    return names
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def _insert_ignore(session, table, rows):
+    """INSERT ... ON CONFLICT DO NOTHING for lookup and link rows"""
+    insert = postgresql.insert if session.bind.dialect.name == 'postgresql' else sqlite.insert
+    for chunk in _chunks(rows):
+        session.execute(insert(table).values(chunk).on_conflict_do_nothing())
+
+
+def _resolve_ids(session, model, names):
+    """Ensure every name exists in a lookup table and return {key: id}"""
+    if not names:
+        return {}
+    _insert_ignore(session, model.__table__, [{'key': key, 'name': name} for key, name in names.items()])
+    ids = {}
+    for chunk in _chunks(names):
+        ids.update(session.query(model.key, model.id).filter(model.key.in_(chunk)))
+    return ids
+
+
+def index_article_tags(session, rows):
+    """Refresh category and author links for upserted article rows.
+
+    ``rows`` are dicts with at least link, categories and author; the
+    caller commits.
+    """
+    if not rows:
+        return
+    
+    article_ids = {}
+    for chunk in _chunks(row['link'] for row in rows):
+        article_ids.update(session.query(Article.link, Article.id).filter(Article.link.in_(chunk)))
+    
+    for facet, column in (('category', 'categories'), ('author', 'author')):
+        model, link_model, link_column = FACETS[facet]
+        tags = {row['link']: split_tags(row[column]) for row in rows if row['link'] in article_ids}
+        
+        names = {}
+        for row_tags in tags.values():
+            names.update(row_tags)
+        ids = _resolve_ids(session, model, names)
+        
+        for chunk in _chunks(article_ids[link] for link in tags):
+            session.query(link_model)\
+                .filter(link_model.article_id.in_(chunk))\
+                .delete(synchronize_session=False)
+        links = [
+            {'article_id': article_ids[link], link_column.key: ids[key]}
+            for link, row_tags in tags.items()
+            for key in row_tags
+        ]
+        _insert_ignore(session, link_model.__table__, links)
+
+
+def delete_article_tags(session, article_ids_query):
+    """Remove link rows for the articles selected by ``article_ids_query``"""
+    for _, link_model, _ in FACETS.values():
+        session.query(link_model)\
+            .filter(link_model.article_id.in_(article_ids_query))\
+            .delete(synchronize_session=False)
+
+
+def filter_by_tags(query, facet, keys, match='all'):
+    """Restrict an Article query to articles tagged with ``keys``.
+
+    ``match='all'`` requires every tag (AND); ``match='any'`` requires at
+    least one (OR). Both resolve through the indexed link tables.
+    """
+    if not keys:
+        return query
+    model, link_model, link_column = FACETS[facet]
+    
+    matching = query.session.query(link_model.article_id)\
+        .join(model, model.id == link_column)\
+        .filter(model.key.in_(keys))
+    if match == 'all' and len(keys) > 1:
+        matching = matching.group_by(link_model.article_id)\
+            .having(func.count(link_column.distinct()) == len(keys))
+    return query.filter(Article.id.in_(matching))
+
+
+def facet_counts(query, facet, limit=20):
+    """Article counts per category/author among the articles matched by ``query``"""
+    model, link_model, link_column = FACETS[facet]
+    article_ids = query.with_entities(Article.id)
+    count = func.count(link_model.article_id)
+    return query.session.query(model.name, model.key, count.label('count'))\
+        .join(link_model, link_column == model.id)\
+        .filter(link_model.article_id.in_(article_ids))\
+        .group_by(model.id, model.name, model.key)\
+        .order_by(count.desc(), model.key)\
+        .limit(limit)\
+        .all()
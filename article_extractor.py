@@ -0,0 +1,223 @@
+"""
+Article Extractor
+
+The CPU-bound half of article extraction: newspaper3k's parse() and nlp()
+(lxml parsing, NLTK tokenization, keyword and summary scoring). Fetch
+threads download the HTML and hand it to an ExtractionPool, which parses
+it in worker processes so extraction can use every core.
+"""
+
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from newspaper import Article
+
+# Parse/NLP worker processes (0 parses in the calling thread) and seconds allowed per article
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+EXTRACT_START_METHOD = os.getenv("EXTRACT_START_METHOD", "forkserver")
+
+# Extra seconds the parent waits past EXTRACT_TIMEOUT before giving up on a stuck worker
+EXTRACT_GRACE = 5
+
+
+class ExtractionTimeout(Exception):
+    """An article took longer than EXTRACT_TIMEOUT to parse"""
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout(f"Extraction exceeded {EXTRACT_TIMEOUT}s")
+
+
+def parse_article(url, html, nlp=True, timeout=EXTRACT_TIMEOUT):
+    """Parse downloaded HTML and optionally run NLP; returns (data, stage timings).
+
+    Runs in a pool worker, where the timeout is enforced with SIGALRM so a
+    pathological page raises ExtractionTimeout instead of hanging.
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer") \
+        and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    timings = {}
+    try:
+        article = Article(url)
+        article.download(input_html=html)
+
+        start = time.perf_counter()
+        article.parse()
+        timings["article_parse"] = time.perf_counter() - start
+
+        # Apply NLP for keywords and summary
+        if nlp:
+            start = time.perf_counter()
+            try:
+                article.nlp()
+            except ExtractionTimeout:
+                raise
+            except Exception:
+                pass  # NLP might fail, but other data is still usable
+            timings["article_nlp"] = time.perf_counter() - start
+
+        return {
+            'title': article.title or 'No Title',
+            'text': article.text or '',  # Clean text, no HTML!
+            'summary': article.summary or '',
+            'authors': article.authors or [],
+            'publish_date': article.publish_date,
+            'top_image': article.top_image or '',
+            'keywords': article.keywords or [],
+            'meta_keywords': article.meta_keywords or [],
+            'canonical_link': article.canonical_link or url
+        }, timings
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+# Set in each pool worker: the queue it reports started articles on
+_started = None
+
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+
+def _parse_in_worker(token, url, html, nlp, timeout):
+    """parse_article, after telling the parent that the worker has picked up ``token``"""
+    _started.put(token)
+    return parse_article(url, html, nlp, timeout)
+
+
+class ExtractionPool:
+    """Process pool running parse_article with a per-article timeout.
+
+    A worker that crashes breaks the pool, and one stuck in C code past
+    the timeout is killed; either way the pool is rebuilt, the articles
+    in flight fall back to RSS data and the run carries on. With
+    ``workers=0`` articles are parsed inline in the calling thread.
+    """
+
+    def __init__(self, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._tokens = itertools.count()
+        # When a worker was seen to start each in-flight article, by token
+        self._starts = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking from a process with running fetch threads is unsafe
+                context = multiprocessing.get_context(
+                    EXTRACT_START_METHOD
+                    if EXTRACT_START_METHOD in multiprocessing.get_all_start_methods() else None
+                )
+                if context.get_start_method() == "forkserver":
+                    context.set_forkserver_preload(["article_extractor"])
+                started = context.SimpleQueue()
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                     initializer=_init_worker, initargs=(started,))
+                self._executor.started = started
+            return self._executor
+
+    def _started_at(self, future):
+        """When a worker picked up ``future``'s article, or None while it is still queued"""
+        with self._lock:
+            started = future.executor.started
+            while not started.empty():
+                self._starts[started.get()] = time.monotonic()
+            return self._starts.get(future.token)
+
+    def _restart(self, executor):
+        """Drop a broken or stuck executor so the next submit starts a fresh one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, url, html, nlp=True):
+        """Queue HTML for parsing and return a Future of (data, timings)"""
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(parse_article(url, html, nlp, self.timeout))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        token = next(self._tokens)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_parse_in_worker, token, url, html, nlp, self.timeout)
+        except BrokenProcessPool:
+            self._restart(executor)
+            executor = self._get_executor()
+            future = executor.submit(_parse_in_worker, token, url, html, nlp, self.timeout)
+        future.executor = executor
+        future.token = token
+        return future
+
+    def result(self, future, url, stats):
+        """Wait for a submitted article; returns its data, or None if it failed"""
+        try:
+            return self._result(future, url, stats)
+        finally:
+            with self._lock:
+                self._starts.pop(getattr(future, "token", None), None)
+
+    def _result(self, future, url, stats):
+        while True:
+            try:
+                data, timings = future.result(timeout=1)
+                break
+            except FutureTimeoutError:
+                # The worker's SIGALRM fires EXTRACT_TIMEOUT after it starts the article; only
+                # a worker stuck where the alarm can't interrupt it outlives the grace period
+                started = self._started_at(future)
+                if started is None or time.monotonic() < started + self.timeout + EXTRACT_GRACE:
+                    continue
+                print(f"  ⏰ Extraction stuck for {url}, restarting parse workers")
+                self._restart(future.executor)
+                stats.incr("extract_timeouts")
+                return None
+            except ExtractionTimeout:
+                print(f"  ⏰ Extraction timed out for {url}")
+                stats.incr("extract_timeouts")
+                return None
+            except BrokenProcessPool:
+                print(f"  💥 Parse worker crashed while extracting {url}")
+                self._restart(future.executor)
+                stats.incr("extract_crashes")
+                return None
+            except Exception as e:
+                print(f"  ⚠️ newspaper3k extraction failed for {url}: {e}")
+                return None
+
+        for stage, seconds in timings.items():
+            stats.record(stage, seconds)
+        return data
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
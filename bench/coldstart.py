@@ -0,0 +1,70 @@
+"""
+Cold-start timings for the web app and the fetch CLI.
+
+Each probe runs in a fresh interpreter, so imports and engine setup are
+measured from scratch, and reports the heavy modules it ended up loading.
+
+Usage:
+    python -m bench.coldstart                 # Uses DATABASE_URL
+    python -m bench.coldstart --runs 10 --output coldstart.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("flask", "jinja2", "newspaper", "nltk", "lxml", "feedparser", "PIL")
+
+PROBES = {
+    # gunicorn imports wsgi.py, which builds the app
+    "web_boot": "from app import create_app; create_app()",
+    # The fetch CLI up to its first database session
+    "fetch_startup": "import fetch; fetch.get_session().close()",
+}
+
+PROBE_TEMPLATE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def run_probe(code, cwd):
+    script = PROBE_TEMPLATE.format(code=code, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure web app and fetch CLI cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for name, code in PROBES.items():
+        runs = [run_probe(code, cwd) for _ in range(args.runs)]
+        seconds = [run["seconds"] for run in runs]
+        results[name] = {
+            "median_seconds": round(statistics.median(seconds), 4),
+            "min_seconds": round(min(seconds), 4),
+            "max_seconds": round(max(seconds), 4),
+            "heavy_modules": runs[-1]["modules"],
+        }
+        print(f"⏱️ {name}: median {results[name]['median_seconds']}s "
+              f"(loads {', '.join(results[name]['heavy_modules']) or 'none of the heavy modules'})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage:
+    python -m bench.compare bench/results/before.json bench/results/after.json
+    python -m bench.compare old.json new.json --threshold 0.1
+
+Exits with status 1 when any metric is worse than the baseline by more
+than the threshold (a fraction, default 0.15).
+"""
+
+import argparse
+import json
+import sys
+
+
+def metrics(results):
+    """Flatten a results file into {name: (value, higher_is_better)}"""
+    flat = {}
+    for name, run in results.get("refresh", {}).items():
+        flat[f"refresh.{name}.wall_seconds"] = (run["wall_seconds"], False)
+        if name == "cold" and run.get("articles_per_second"):
+            flat[f"refresh.{name}.articles_per_second"] = (run["articles_per_second"], True)
+    for name, run in results.get("ingest", {}).items():
+        flat[f"ingest.{name}.rows_per_second"] = (run["rows_per_second"], True)
+    for size, entry in results.get("routes", {}).items():
+        for route, summary in entry["routes"].items():
+            for stat in ("p50_ms", "p95_ms", "p99_ms"):
+                flat[f"routes.{size}.{route}.{stat}"] = (summary[stat], False)
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Return rows of (metric, baseline, current, change, regressed)"""
+    before, after = metrics(baseline), metrics(current)
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        (old, higher_is_better), (new, _) = before[name], after[name]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        rows.append((name, old, new, change, worse > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    width = max((len(name) for name, *_ in rows), default=10)
+    print(f"📊 {baseline.get('commit')} → {current.get('commit')}")
+    changed = sorted(key for key in baseline.get("config", {})
+                     if baseline["config"][key] != current.get("config", {}).get(key))
+    if changed:
+        print(f"⚠️ Runs used different settings: {', '.join(changed)}")
+    for name, old, new, change, regressed in rows:
+        flag = "❌" if regressed else "  "
+        print(f"{flag} {name:<{width}}  {old:>12}  {new:>12}  {change:+.1%}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"❌ {len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Benchmark Runner
+
+Runs the fetch pipeline against local stand-in publishers (bench/server.py)
+and a scratch database, then measures ingestion throughput and route
+latency at growing archive sizes. Results are written as JSON so runs can
+be compared with ``python -m bench.compare``.
+
+Usage:
+    python -m bench.run                                   # SQLite scratch database
+    python -m bench.run --database-url postgresql:///bench --archive-sizes 1000,10000,100000
+    python -m bench.run --feeds 40 --items 25 --latency 0.2 --error-rate 0.05
+
+Never point --database-url at a database you care about: the benchmark
+writes thousands of synthetic articles to it.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from bench.server import WORDS
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def latency_summary(samples):
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Swallow the pipeline's per-article progress output"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def synthetic_records(start, count, now=None):
+    """Article records in the shape fetch.build_article_record produces"""
+    now = now or datetime.utcnow()
+    records = []
+    for n in range(start, start + count):
+        published = now - timedelta(seconds=(n * 7919) % (20 * 86400))
+        records.append({
+            "title": f"Synthetic article {n} about the economy and climate policy",
+            "link": f"https://bench.invalid/archive/{n}",
+            "summary": f"Summary of synthetic article {n}. " * 4,
+            # Distinct bodies, so near-duplicate detection sees unrelated stories
+            "content": f"Body text of synthetic article {n}. " + " ".join(random.Random(n).choices(WORDS, k=400)),
+            "author": f"Reporter {n % 50}",
+            "published_parsed": published.timetuple(),
+            "updated_parsed": None,
+            "categories": ",".join(("World", "Politics", "Business", "Tech", "Science")[i] for i in (n % 5, (n + 2) % 5)),
+            "thumbnail_url": None,
+        })
+    return records
+
+
+def make_feeds_due(fetch):
+    """Clear every feed's next poll time so the next tick polls them all"""
+    from app.models import FeedState
+    session = fetch.get_session()
+    try:
+        session.query(FeedState).update({FeedState.next_poll_at: None}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+
+def bench_refresh(fetch, feed_urls, verbose):
+    """Two full runs of fetch.main1: cold (everything new) and warm (nothing changed)"""
+    fetch.get_rss_feeds = lambda: [(url,) for url in feed_urls]
+    results = {}
+    for name in ("cold", "warm"):
+        # The scheduler would otherwise leave just-polled feeds alone
+        make_feeds_due(fetch)
+        with quiet(not verbose):
+            report = fetch.main1()
+        counters = report["counters"]
+        articles = counters.get("articles_extracted", 0) + counters.get("articles_failed", 0)
+        results[name] = {
+            "wall_seconds": report["wall_seconds"],
+            "articles": articles,
+            "articles_per_second": round(articles / report["wall_seconds"], 2) if report["wall_seconds"] else None,
+            "stages": report["stages"],
+            "counters": counters,
+        }
+        print(f"🔄 {name} refresh: {articles} articles in {report['wall_seconds']}s")
+    return results
+
+
+def bench_ingest(fetch, start, count, batch_size, verbose):
+    """Rows/sec for save_articles_to_db inserting new rows, then re-saving unchanged ones"""
+    records = synthetic_records(start, count)
+    results = {}
+    for name in ("insert", "unchanged"):
+        began = time.perf_counter()
+        with quiet(not verbose):
+            for offset in range(0, count, batch_size):
+                fetch.save_articles_to_db(records[offset:offset + batch_size])
+        seconds = time.perf_counter() - began
+        results[name] = {"rows": count, "seconds": round(seconds, 3), "rows_per_second": round(count / seconds, 1)}
+        print(f"💾 ingest {name}: {count} rows at {results[name]['rows_per_second']} rows/s")
+    return results
+
+
+def fill_archive(fetch, target, batch_size, verbose):
+    """Insert synthetic articles until the archive holds at least ``target`` rows"""
+    from app.models import Article
+    session = fetch.get_session()
+    try:
+        current = session.query(Article).count()
+    finally:
+        session.close()
+    # Offset past the links used by bench_ingest
+    start = 10_000_000 + current
+    with quiet(not verbose):
+        while current < target:
+            count = min(batch_size, target - current)
+            fetch.save_articles_to_db(synthetic_records(start, count))
+            start, current = start + count, current + count
+    return current
+
+
+def bench_routes(client, routes, requests, warmup=5):
+    results = {}
+    for route in routes:
+        for _ in range(warmup):
+            client.get(route)
+        samples, statuses = [], set()
+        for _ in range(requests):
+            began = time.perf_counter()
+            response = client.get(route)
+            samples.append(time.perf_counter() - began)
+            statuses.add(response.status_code)
+        results[route] = dict(latency_summary(samples), statuses=sorted(statuses))
+        print(f"  🌐 {route}: p50 {results[route]['p50_ms']}ms, p95 {results[route]['p95_ms']}ms, "
+              f"p99 {results[route]['p99_ms']}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch, ingestion and route latency")
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--hosts", type=int, default=4, help="Loopback addresses to spread feeds over")
+    parser.add_argument("--page-kb", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per article page response")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of article pages that return 500")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--image-kb", type=int, default=0, help="Size of each article image (0: no images)")
+    parser.add_argument("--ingest-rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--archive-sizes", default="1000,10000")
+    parser.add_argument("--route", action="append", dest="routes", help="Route to time (repeatable)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route and archive size")
+    parser.add_argument("--response-cache", default="none", help="RESPONSE_CACHE_BACKEND while timing routes")
+    parser.add_argument("--output", default=None, help="Results file (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+
+    # Configure the app before it is imported; the raw cache would skew timings
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("RSS_FEEDS", "bench")
+    os.environ["RAW_CACHE_DIR"] = ""
+    os.environ["THUMB_CACHE_DIR"] = os.path.join(workdir, "thumbs")
+    os.environ["RESPONSE_CACHE_BACKEND"] = args.response_cache
+    os.environ["SCHEDULE_TICK_BUDGET"] = str(args.feeds)
+
+    import fetch
+    from bench.server import SyntheticPublisher, start_servers, stop_servers
+
+    publisher = SyntheticPublisher(args.feeds, args.items, args.page_kb, args.latency,
+                                   error_rate=args.error_rate, seed=args.seed, image_kb=args.image_kb)
+    feed_urls, servers = start_servers(publisher, args.hosts)
+    print(f"📡 {len(feed_urls)} synthetic feeds on {args.hosts} hosts, database {database_url.split('@')[-1]}")
+
+    from app import create_app, migrate
+    with quiet(not args.verbose):
+        migrate(database_url)
+    client = create_app().test_client()
+
+    results = {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": database_url.split(":", 1)[0],
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose", "database_url")},
+    }
+    try:
+        results["refresh"] = bench_refresh(fetch, feed_urls, args.verbose)
+
+        results["routes"] = {}
+        routes = args.routes or ["/", "/api/articles"]
+        for size in sorted(int(value) for value in args.archive_sizes.split(",") if value.strip()):
+            actual = fill_archive(fetch, size, args.batch_size, args.verbose)
+            print(f"📚 Archive at {actual} articles")
+            results["routes"][str(size)] = dict(articles=actual, routes=bench_routes(client, routes, args.requests))
+
+        # Last, so its rows don't distort the smaller archive sizes
+        results["ingest"] = bench_ingest(fetch, 0, args.ingest_rows, args.batch_size, args.verbose)
+    finally:
+        stop_servers(servers)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        datetime.utcnow().strftime("%Y%m%d-%H%M%S") + ".json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Stand-in publisher for benchmarks.
+
+Serves synthetic RSS feeds, article pages and (optionally) article
+images from a local HTTP server with configurable latency, page size and
+error rate. Output is
+deterministic for a given seed, and feeds honour If-None-Match so
+repeat runs exercise the conditional GET path.
+
+Usage:
+    python -m bench.server --port 8765 --feeds 10 --items 20 --latency 0.05
+"""
+
+import argparse
+import email.utils
+import functools
+import hashlib
+import io
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+WORDS = (
+    "market economy government election climate energy policy health science research "
+    "technology company report minister council court city region school study data "
+    "growth price budget talks agreement security network industry workers union bank"
+).split()
+
+CATEGORIES = ("World", "Politics", "Business", "Tech", "Science", "Health", "Sport", "Culture")
+
+
+def sentence(rng, words=14):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+class SyntheticPublisher:
+    """Feed and page content plus the failure/latency profile of one benchmark"""
+
+    def __init__(self, feeds=10, items=20, page_kb=20, latency=0.05, jitter=0.5,
+                 error_rate=0.0, seed=42, image_kb=0):
+        self.feeds = feeds
+        self.items = items
+        self.page_kb = page_kb
+        self.image_kb = image_kb
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.started = time.time()
+
+    def delay(self, rng):
+        if self.latency > 0:
+            spread = self.latency * self.jitter
+            time.sleep(max(0.0, rng.uniform(self.latency - spread, self.latency + spread)))
+
+    def feed_xml(self, base_url, feed):
+        rng = random.Random(f"{self.seed}:feed:{feed}")
+        items = []
+        for item in range(self.items):
+            published = self.started - (feed * self.items + item) * 60
+            categories = "".join(
+                f"<category>{name}</category>" for name in rng.sample(CATEGORIES, 2)
+            )
+            items.append(
+                f"<item><title>{sentence(rng, 8)}</title>"
+                f"<link>{base_url}/article/{feed}/{item}</link>"
+                f"<guid>bench-{feed}-{item}</guid>"
+                f"<description>{sentence(rng)}</description>"
+                f"<author>reporter{rng.randrange(20)}@example.com (Reporter {rng.randrange(20)})</author>"
+                f"{categories}"
+                f"<pubDate>{email.utils.formatdate(published, usegmt=True)}</pubDate></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>Bench feed {feed}</title><link>{base_url}/</link>"
+            f"<description>Synthetic feed {feed}</description>{''.join(items)}</channel></rss>"
+        ).encode()
+
+    def article_html(self, base_url, feed, item):
+        rng = random.Random(f"{self.seed}:article:{feed}:{item}")
+        title = sentence(rng, 8)
+        paragraphs, size = [], 0
+        while size < self.page_kb * 1024:
+            paragraph = "<p>" + " ".join(sentence(rng) for _ in range(5)) + "</p>"
+            paragraphs.append(paragraph)
+            size += len(paragraph)
+        image = f'<meta property="og:image" content="{base_url}/image/{feed}">' if self.image_kb else ""
+        return (
+            f"<html><head><title>{title}</title>"
+            f'<meta name="author" content="Reporter {rng.randrange(20)}">{image}'
+            f"</head><body><article><h1>{title}</h1>{''.join(paragraphs)}</article></body></html>"
+        ).encode()
+
+
+@functools.lru_cache(maxsize=None)
+def image_jpeg(size_kb, feed):
+    """A noise JPEG of roughly ``size_kb``, one per feed (agency photos are shared across a feed's stories)"""
+    from PIL import Image
+
+    width = max(int((size_kb * 1024 * 16 / 9) ** 0.5), 16)
+    height = width * 9 // 16
+    # Seeded by feed, so every request (and every server thread) gets the same bytes
+    noise = random.Random(feed).randbytes(width * height)
+    image = Image.frombytes("L", (width, height), noise).convert("RGB")
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        publisher = self.server.publisher
+        parts = urlparse(self.path).path.strip("/").split("/")
+        rng = random.Random(f"{publisher.seed}:{self.path}:{time.monotonic_ns()}")
+        base_url = f"http://{self.headers.get('Host')}"
+
+        try:
+            if len(parts) == 2 and parts[0] == "feed":
+                body = publisher.feed_xml(base_url, int(parts[1]))
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_body(200, body, "application/rss+xml", {"ETag": etag})
+            elif len(parts) == 3 and parts[0] == "article":
+                publisher.delay(rng)
+                if rng.random() < publisher.error_rate:
+                    self.send_body(500, b"Synthetic error", "text/plain")
+                    return
+                self.send_body(200, publisher.article_html(base_url, int(parts[1]), int(parts[2])),
+                               "text/html; charset=utf-8")
+            elif len(parts) == 2 and parts[0] == "image" and publisher.image_kb:
+                self.send_body(200, image_jpeg(publisher.image_kb, int(parts[1])), "image/jpeg")
+            else:
+                self.send_body(404, b"Not found", "text/plain")
+        except ValueError:
+            self.send_body(400, b"Bad request", "text/plain")
+
+
+def start_servers(publisher, hosts=1, port=0):
+    """Serve ``publisher`` on 127.0.0.1..127.0.0.N in background threads.
+
+    Separate loopback addresses look like separate publishers to the
+    fetcher's per-host limit. Returns (feed URLs, servers).
+    """
+    servers = []
+    for index in range(hosts):
+        server = ThreadingHTTPServer((f"127.0.0.{index + 1}", port), Handler)
+        server.daemon_threads = True
+        server.publisher = publisher
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    feed_urls = [
+        "http://%s:%d/feed/%d" % (*servers[feed % hosts].server_address[:2], feed)
+        for feed in range(publisher.feeds)
+    ]
+    return feed_urls, servers
+
+
+def stop_servers(servers):
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic RSS feeds and article pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--hosts", type=int, default=1)
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--page-kb", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--image-kb", type=int, default=0, help="Size of each article image (0: no images)")
+    args = parser.parse_args()
+
+    publisher = SyntheticPublisher(args.feeds, args.items, args.page_kb, args.latency,
+                                   error_rate=args.error_rate, seed=args.seed, image_kb=args.image_kb)
+    feed_urls, servers = start_servers(publisher, args.hosts, args.port)
+    print("📡 Serving synthetic feeds:")
+    for url in feed_urls:
+        print(f"  {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stop_servers(servers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,306 @@
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import execute_batch
 from dotenv import load_dotenv  
 
 # Load environment variables
 load_dotenv()
 
-def get_db_connection():
-    """Create a new database connection"""
+# Connection pool settings, shared with the SQLAlchemy engine in app.init_engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))                # Connections kept open
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))  # Extra connections under load
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))       # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))       # Reconnect connections older than this
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() not in ("0", "false", "no")
+
+def get_database_url():
     DATABASE_URL = os.getenv("DATABASE_URL")
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL environment variable is required")
-    return psycopg2.connect(DATABASE_URL)
+    return DATABASE_URL
+
+def get_db_connection():
+    """Create a new, unpooled database connection"""
+    return psycopg2.connect(get_database_url())
+
+def engine_options(database_url):
+    """create_engine() keyword arguments applying the same pool settings"""
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolTimeout(Exception):
+    """No connection became free within DB_POOL_TIMEOUT"""
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 connection pool with health checks and stats.
+
+    Keeps up to ``size`` idle connections, opens up to ``max_overflow``
+    more under load and makes further callers wait up to ``timeout``
+    seconds. Connections older than ``recycle`` seconds are replaced and,
+    with ``pre_ping``, each checkout is verified with ``SELECT 1``.
+    """
+
+    def __init__(self, dsn, size=DB_POOL_SIZE, max_overflow=DB_POOL_MAX_OVERFLOW,
+                 timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE, pre_ping=DB_POOL_PRE_PING):
+        self.dsn = dsn
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created = {}
+        self._open = 0
+        self._stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "recycled": 0,
+            "invalidated": 0,
+            "overflow_peak": 0,
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        self._created[id(conn)] = time.monotonic()
+        with self._cond:
+            self._stats["connects"] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if self.recycle and time.monotonic() - self._created.get(id(conn), 0) > self.recycle:
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if self.pre_ping:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                with self._cond:
+                    self._stats["invalidated"] += 1
+                return False
+        return True
+
+    def getconn(self):
+        """Check out a healthy connection, waiting if the pool is exhausted"""
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    conn = None
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                self._cond.wait(remaining)
+            if waited:
+                self._stats["wait_seconds"] += time.monotonic() - started
+            self._stats["checkouts"] += 1
+            self._stats["overflow_peak"] = max(self._stats["overflow_peak"], self._open - self.size)
+        
+        try:
+            if conn is not None and not self._healthy(conn):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; broken, surplus or discarded ones are closed"""
+        if not conn.closed and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            self._stats["checkins"] += 1
+            if discard or conn.closed or len(self._idle) >= self.size:
+                self._open -= 1
+                keep = False
+            else:
+                self._idle.append(conn)
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                wait_seconds=round(self._stats["wait_seconds"], 3),
+                size=self.size,
+                max_overflow=self.max_overflow,
+                open=self._open,
+                idle=len(self._idle),
+                checked_out=self._open - len(self._idle),
+                overflow=max(0, self._open - self.size),
+            )
+
+    def closeall(self):
+        with self._cond:
+            while self._idle:
+                self._open -= 1
+                self._discard(self._idle.pop())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Process-wide connection pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(get_database_url())
+        return _pool
+
+@contextmanager
+def get_cursor():
+    """Pooled cursor; the transaction commits when the block exits cleanly"""
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+def pool_stats():
+    """Stats for the database.py connection pool"""
+    return get_pool().stats() if _pool is not None else None
+
+
+_engine_stats = {}
+
+def instrument_engine(engine):
+    """Count checkouts, connects and invalidations on a SQLAlchemy engine's pool"""
+    from sqlalchemy import event
+    
+    stats = _engine_stats.setdefault(id(engine), {"checkouts": 0, "checkins": 0, "connects": 0, "invalidated": 0})
+    
+    def counter(name):
+        def listener(*args):
+            stats[name] += 1
+        return listener
+    
+    event.listen(engine, "checkout", counter("checkouts"))
+    event.listen(engine, "checkin", counter("checkins"))
+    event.listen(engine, "connect", counter("connects"))
+    event.listen(engine, "invalidate", counter("invalidated"))
+
+def engine_pool_stats(engine):
+    """Stats for a SQLAlchemy engine's pool, in the same shape as pool_stats()"""
+    stats = dict(_engine_stats.get(id(engine), {}))
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(0, pool.overflow()))
+    return stats
 
 def truncate_articles():
     """Clean the entire articles table and reset IDs"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("TRUNCATE TABLE articles RESTART IDENTITY CASCADE;")
-        conn.commit()
+        with get_cursor() as cur:
+            cur.execute("TRUNCATE TABLE articles RESTART IDENTITY CASCADE;")
         print("🧨 Articles table truncated (IDs reset).")
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error truncating table: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 def fetch_all_articles():
     """Fetch all articles from the articles table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT * FROM articles;")
-        articles = cur.fetchall()
+        with get_cursor() as cur:
+            cur.execute("SELECT * FROM articles;")
+            articles = cur.fetchall()
         return articles
     except Exception as e:
         print(f"❌ Error fetching articles: {e}")
         return []
-    finally:
-        cur.close()
-        conn.close()
 
 def get_rss_feeds():
     """Fetch all RSS feed URLs from Supabase 'rss' table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT url FROM rss;")
-        feeds = cur.fetchall()
+        with get_cursor() as cur:
+            cur.execute("SELECT url FROM rss;")
+            feeds = cur.fetchall()
         return feeds
     except Exception as e:
         print(f"❌ Error fetching RSS feeds from database: {e}")
         return []
-    finally:
-        cur.close()
-        conn.close()
 
 def insert_articles(articles):
     """Insert multiple articles into the articles table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     sql = """
     INSERT INTO articles (title, link, summary, content, author, published, updated, categories, thumbnail_url, relevence)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     ON CONFLICT (link) DO NOTHING;
     """
     try:
-        execute_batch(cur, sql, articles)
-        conn.commit()
-        print(f"✅ Inserted {cur.rowcount} new articles.")
+        with get_cursor() as cur:
+            execute_batch(cur, sql, articles)
+            inserted = cur.rowcount
+        print(f"✅ Inserted {inserted} new articles.")
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error inserting articles: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 def create_new_table():
     """Create rss_articles table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     sql = """ CREATE TABLE IF NOT EXISTS rss_articles(
             id BIGSERIAL PRIMARY KEY,
             title TEXT,
@@ -89,47 +308,33 @@ def create_new_table():
             published TIMESTAMPTZ
         );"""
     try:
-        cur.execute(sql)
-        conn.commit()
+        with get_cursor() as cur:
+            cur.execute(sql)
         print("✅ Table rss_articles created successfully.")
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error creating table: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 def insert_rss_articles(articles):
     """Insert multiple articles into the rss_articles table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     sql = """
     INSERT INTO rss_articles (title, link, published)
     VALUES (%s, %s, %s)
     ON CONFLICT (link) DO NOTHING;
     """
     try:
-        execute_batch(cur, sql, articles)
-        conn.commit()
+        with get_cursor() as cur:
+            execute_batch(cur, sql, articles)
         print(f"✅ Inserted {len(articles)} new articles.")
     except Exception as e:
-        conn.rollback()
         print(f"❌ Error inserting articles: {e}")
-    finally:
-        cur.close()
-        conn.close()
 
 def get_urls_for_article():
     """Get all article URLs from rss_articles table"""
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("SELECT link FROM rss_articles;")
-        feeds = cur.fetchall()
+        with get_cursor() as cur:
+            cur.execute("SELECT link FROM rss_articles;")
+            feeds = cur.fetchall()
         return feeds
     except Exception as e:
         print(f"❌ Error fetching article URLs from database: {e}")
         return []
-    finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
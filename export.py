@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Article Export
+
+Streams the articles table to NDJSON or CSV through a server-side cursor,
+so memory use stays flat however large the archive is.
+
+Usage:
+    python export.py > articles.ndjson
+    python export.py --format csv --columns id,title,link,published -o articles.csv
+    python export.py --since 2025-01-01T00:00:00Z   # Only rows ingested after this
+"""
+
+import argparse
+import sys
+import time
+from sqlalchemy import create_engine
+from app.export import EXPORT_FORMATS, export_chunks, parse_batch_size, parse_columns, parse_since, stream_articles
+from database import engine_options, get_database_url
+
+
+def export_articles(out, fmt='ndjson', columns=None, since=None, batch_size=None):
+    """Write the export to the file object ``out``; returns the number of rows"""
+    database_url = get_database_url()
+    engine = create_engine(database_url, **engine_options(database_url))
+    exported = 0
+
+    def counted(batches):
+        nonlocal exported
+        for batch in batches:
+            exported += len(batch)
+            yield batch
+
+    try:
+        with engine.connect() as conn:
+            batches = stream_articles(conn, columns, since, batch_size)
+            for chunk in export_chunks(counted(batches), columns, fmt):
+                out.write(chunk)
+    finally:
+        engine.dispose()
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream the article archive as NDJSON or CSV")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--columns", default="", help="Comma-separated column names (default: all)")
+    parser.add_argument("--since", default="", help="Only export rows ingested after this ISO timestamp")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per server-side cursor fetch")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        columns = parse_columns(args.columns)
+        since = parse_since(args.since)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    start = time.time()
+    try:
+        exported = export_articles(out, args.format, columns, since, parse_batch_size(args.batch_size))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ Exported {exported} articles in {time.time() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
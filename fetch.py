@@ -7,201 +7,1149 @@ This gives you the best of both worlds: RSS metadata + clean article content.
 """
 
 import os
+import json
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
 import feedparser
-from newspaper import Article
+from newspaper import Config as NewspaperConfig
+from newspaper.network import get_html_2XX_only
 from dotenv import load_dotenv
-from datetime import datetime
-from app import create_app, get_db_session
-from app.models import Article as ArticleModel
-from database import truncate_articles ,get_rss_feeds # Reuse existing truncate function
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import cache, get_db_session, init_engine
+from app import changes, search
+from app.dedup import canonical_url, choose_canonical, dedup_text, delete_fingerprints, index_duplicates, minhash
+from app.metrics import Histogram
+from app.tags import delete_article_tags, index_article_tags
+from app.models import Article as ArticleModel, FeedState, IngestState, RssArticles
+from article_extractor import ExtractionPool, parse_article
+from database import get_rss_feeds
+from http_client import get_client
+from raw_cache import content_hash, get_raw_cache
+from thumbnails import fetch_thumbnail, get_thumbnail_cache
+from scheduler import FEED_MAX_POLL_INTERVAL, SCHEDULE_TICK_BUDGET, due_feeds, update_schedule
 
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-def extract_with_newspaper3k(url):
-    """Extract clean article content using newspaper3k"""
-    try:
-        # Create newspaper3k article object
-        article = Article(url)
-        article.download()
-        article.parse()
-        
-        # Apply NLP for keywords and summary
+# Concurrency limits for the fetch engine
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+FETCH_PER_HOST_LIMIT = int(os.getenv("FETCH_PER_HOST_LIMIT", "2"))
+
+# Ingestion settings: rows per upsert statement and how long articles are kept (0 keeps forever)
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "500"))
+ARTICLE_RETENTION_DAYS = int(os.getenv("ARTICLE_RETENTION_DAYS", "30"))
+
+# A run commits whole feeds once this many articles are pending, or this many seconds after the last commit
+FETCH_COMMIT_ARTICLES = int(os.getenv("FETCH_COMMIT_ARTICLES", "200"))
+FETCH_COMMIT_SECONDS = float(os.getenv("FETCH_COMMIT_SECONDS", "30"))
+
+# Feed polling read timeout (when each feed is polled is up to scheduler.py; other limits are in http_client.py)
+FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", "20"))
+
+# Article pages are requested the way newspaper3k would request them
+ARTICLE_HEADERS = {"User-Agent": NewspaperConfig().browser_user_agent}
+
+# NLP per article: always, never, or auto (only when the feed's own summary is short).
+# A feed_state.nlp value overrides this for one feed.
+EXTRACT_NLP = os.getenv("EXTRACT_NLP", "auto").lower()
+EXTRACT_NLP_MIN_SUMMARY = int(os.getenv("EXTRACT_NLP_MIN_SUMMARY", "200"))
+
+# Seconds per sy:updatePeriod value
+UPDATE_PERIODS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 7 * 86400,
+    "monthly": 30 * 86400,
+    "yearly": 365 * 86400,
+}
+
+
+class RunStats:
+    """Thread-safe per-stage timings, histograms and counters for one fetch run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages = defaultdict(lambda: {"count": 0, "seconds": 0.0, "max": 0.0})
+        self.histograms = defaultdict(Histogram)
+        self.counters = defaultdict(int)
+        self.feeds = defaultdict(dict)
+
+    @contextmanager
+    def time(self, stage):
+        """Time a block; the yielded dict gets the elapsed "seconds" on exit"""
+        timing = {}
+        start = time.perf_counter()
         try:
-            article.nlp()
-        except:
-            pass  # NLP might fail, but other data is still usable
-        
-        return {
-            'title': article.title or 'No Title',
-            'text': article.text or '',  # Clean text, no HTML!
-            'summary': article.summary or '',
-            'authors': article.authors or [],
-            'publish_date': article.publish_date,
-            'top_image': article.top_image or '',
-            'keywords': article.keywords or [],
-            'meta_keywords': article.meta_keywords or [],
-            'canonical_link': article.canonical_link or url
-        }
+            yield timing
+        finally:
+            timing["seconds"] = time.perf_counter() - start
+            self.record(stage, timing["seconds"])
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self.stages[stage]
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            histogram = self.histograms[stage]
+        histogram.observe(seconds)
+
+    def feed(self, url, **values):
+        """Merge per-feed details (timings, bytes, entries, status) into the report"""
+        with self._lock:
+            self.feeds[url].update(values)
+
+    def incr(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def report(self):
+        """Return a JSON-serializable summary of the run"""
+        with self._lock:
+            return {
+                "wall_seconds": round(time.perf_counter() - self.started, 3),
+                "stages": {
+                    stage: {
+                        "count": entry["count"],
+                        "seconds": round(entry["seconds"], 3),
+                        "avg": round(entry["seconds"] / entry["count"], 3) if entry["count"] else 0.0,
+                        "max": round(entry["max"], 3),
+                    }
+                    for stage, entry in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "histograms": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()},
+                "feeds": {url: dict(values) for url, values in self.feeds.items()},
+                "circuit_breakers": get_client().breaker_report(),
+            }
+
+    def print_report(self):
+        report = self.report()
+        print(f"⏱️ Run took {report['wall_seconds']}s")
+        for stage, entry in report["stages"].items():
+            print(f"  ⏱️ {stage}: {entry['count']} calls, {entry['seconds']}s total, "
+                  f"{entry['avg']}s avg, {entry['max']}s max")
+
+
+class RunStopped(Exception):
+    """The run's checkpoint was stopped (its job lease was lost) before the next batch was committed"""
+
+
+class RunCheckpoint:
+    """Feeds planned for one run and those whose articles are already committed.
+
+    ``save(data)`` persists the checkpoint (worker.py stores it on the job
+    row); a run given the saved data back polls only the unfinished feeds.
+    Committed links need no list of their own: they are in the articles
+    table, which KnownLinkIndex loads at the start of every run. After
+    stop(), the run raises RunStopped instead of committing more batches.
+    """
+
+    def __init__(self, data=None, save=None):
+        data = data or {}
+        self.feeds = data.get("feeds")
+        self.finished = list(data.get("finished", ()))
+        self.links = data.get("links", 0)
+        self._save = save
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    @property
+    def resumed(self):
+        return self.feeds is not None
+
+    def plan(self, feed_urls):
+        """Remember the feeds this run will poll"""
+        self.feeds = list(feed_urls)
+        self.save()
+
+    def remaining(self):
+        finished = set(self.finished)
+        return [url for url in self.feeds or () if url not in finished]
+
+    def commit(self, feed_urls, links):
+        """Record feeds whose articles (``links`` of them) were just committed"""
+        self.finished.extend(feed_urls)
+        self.links += links
+        self.save()
+
+    def save(self):
+        if self._save:
+            self._save(self.to_dict())
+
+    def to_dict(self):
+        return {"feeds": self.feeds, "finished": self.finished, "links": self.links}
+
+
+class FetchEngine:
+    """Thread pool with a global worker bound and a per-host in-flight limit.
+
+    Work for a host that is already at its limit waits in a per-host queue
+    instead of occupying a pool thread, so one slow publisher can only ever
+    hold ``per_host_limit`` workers.
+    """
+
+    def __init__(self, max_workers=FETCH_MAX_WORKERS, per_host_limit=FETCH_PER_HOST_LIMIT):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._per_host_limit = max(1, per_host_limit)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._active = defaultdict(int)
+        self._waiting = defaultdict(deque)
+
+    def submit(self, url, fn, *args, **kwargs):
+        """Schedule ``fn`` for the host of ``url`` and return a Future"""
+        host = urlparse(url).netloc.lower()
+        future = Future()
+        job = (future, fn, args, kwargs)
+        with self._lock:
+            if self._active[host] >= self._per_host_limit:
+                self._waiting[host].append(job)
+                return future
+            self._active[host] += 1
+        self._start(host, job)
+        return future
+
+    def _start(self, host, job):
+        future, fn, args, kwargs = job
+
+        def run():
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = fn(*args, **kwargs)
+                    except BaseException as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+            finally:
+                self._release(host)
+
+        # A run dropped from the pool's queue by a cancelling shutdown cancels its caller's future too
+        self._pool.submit(run).add_done_callback(lambda task: future.cancel() if task.cancelled() else None)
+
+    def _release(self, host):
+        with self._lock:
+            waiting = self._waiting[host]
+            if not waiting:
+                self._active[host] -= 1
+                self._idle.notify_all()
+                return
+            job = waiting.popleft()
+        self._start(host, job)
+
+    def shutdown(self, cancel=False):
+        """Wait for running and queued work; with ``cancel``, work that hasn't started is dropped"""
+        with self._lock:
+            if cancel:
+                waiting = [job for jobs in self._waiting.values() for job in jobs]
+                self._waiting.clear()
+            else:
+                # Queued per-host work is handed to the pool as earlier work finishes, so the
+                # pool can only be shut down once every host has drained
+                waiting = []
+                self._idle.wait_for(lambda: not any(self._active.values()))
+        for future, *_ in waiting:
+            future.cancel()
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # A run that is abandoned (an error, or its consumer stopped) doesn't download the rest
+        self.shutdown(cancel=exc_type is not None)
+
+
+class KnownLinkIndex:
+    """In-memory set of article links that are already stored.
+
+    Loaded in bulk once per run; links are claimed as they are scheduled so
+    the same story listed by several feeds is only extracted once. Canonical
+    links are included, so a URL that only differs by tracking parameters
+    is skipped too.
+    """
+
+    def __init__(self, links=()):
+        self._lock = threading.Lock()
+        self._links = set(links)
+
+    @classmethod
+    def load(cls):
+        """Load every link and canonical link from the articles and rss_articles tables"""
+        session = get_session()
+        try:
+            query = session.query(ArticleModel.link)\
+                .union(session.query(ArticleModel.canonical_link).filter(ArticleModel.canonical_link.isnot(None)))\
+                .union(session.query(RssArticles.link))
+            return cls(link for (link,) in query)
+        except Exception as e:
+            print(f"❌ Error loading known article links: {e}")
+            return cls()
+        finally:
+            session.close()
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, link):
+        # Links are stored truncated to 200 characters in the articles table
+        return link in self._links or link[:200] in self._links
+
+    def claim(self, *links):
+        """Return True and remember ``links`` if none of them has been seen before"""
+        with self._lock:
+            if any(link in self for link in links):
+                return False
+            self._links.update(links)
+            return True
+
+
+def cache_raw(url, body, kind):
+    """Keep a downloaded body in the raw cache, if enabled"""
+    raw_cache = get_raw_cache()
+    if raw_cache is None:
+        return None
+    try:
+        return raw_cache.put(url, body, kind)
+    except Exception as e:
+        print(f"  ⚠️ Could not cache {url}: {e}")
+        return None
+
+def download_article(url, stats=None):
+    """Download an article page through the shared HTTP client, returning its HTML or None"""
+    stats = stats or RunStats()
+    try:
+        with stats.time("article_download"):
+            response = get_client().get(url, headers=ARTICLE_HEADERS, stats=stats)
+            response.raise_for_status()
+            # Decoded the same way newspaper3k decodes its own downloads
+            html = get_html_2XX_only(url, response=response)
+        if not html:
+            stats.incr("article_download_errors")
+            return None
+        stats.incr("article_bytes", len(html))
+        cache_raw(url, html, "article")
+        return html
+    except Exception as e:
+        print(f"  ⚠️ Article download failed for {url}: {e}")
+        stats.incr("article_download_errors")
+        return None
+
+def download_for_extraction(url, extractor, nlp, stats):
+    """Download in a fetch thread, then queue the HTML on the parse/NLP pool"""
+    html = download_article(url, stats)
+    return extractor.submit(url, html, nlp) if html else None
+
+def extract_with_newspaper3k(url, stats=None, nlp=True):
+    """Extract clean article content using newspaper3k, all in the calling thread"""
+    stats = stats or RunStats()
+    html = download_article(url, stats)
+    if not html:
+        return None
+    try:
+        data, timings = parse_article(url, html, nlp)
     except Exception as e:
         print(f"  ⚠️ newspaper3k extraction failed for {url}: {e}")
         return None
+    for stage, seconds in timings.items():
+        stats.record(stage, seconds)
+    return data
+
+def wants_nlp(entry, state=None):
+    """Whether to run NLP for an entry under its feed's nlp setting"""
+    mode = (state or {}).get("nlp") or EXTRACT_NLP
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    # auto: feeds that ship a real summary don't need one generated
+    return len(getattr(entry, 'summary', '') or '') < EXTRACT_NLP_MIN_SUMMARY
+
+def new_feed_state(feed_url):
+    """Empty polling state for a feed that has never been fetched"""
+    return {
+        "feed_url": feed_url,
+        "etag": None,
+        "last_modified": None,
+        "seen_guids": [],
+        "min_interval": None,
+        "last_polled": None,
+        "last_status": None,
+        "last_http_status": None,
+        "nlp": None,
+        "next_poll_at": None,
+        "poll_interval": None,
+        "publish_rate": None,
+        "error_count": 0,
+    }
+
+def load_feed_states(feed_urls):
+    """Load polling state for every feed in one query, keyed by feed URL"""
+    states = {url: new_feed_state(url) for url in feed_urls}
+    session = get_session()
+    try:
+        for row in session.query(FeedState).filter(FeedState.feed_url.in_(feed_urls)):
+            states[row.feed_url].update(
+                etag=row.etag,
+                last_modified=row.last_modified,
+                seen_guids=json.loads(row.seen_guids) if row.seen_guids else [],
+                min_interval=row.min_interval,
+                last_polled=row.last_polled,
+                last_status=row.last_status,
+                last_http_status=row.last_http_status,
+                nlp=row.nlp,
+                next_poll_at=row.next_poll_at,
+                poll_interval=row.poll_interval,
+                publish_rate=row.publish_rate,
+                error_count=row.error_count or 0,
+            )
+    except Exception as e:
+        print(f"❌ Error loading feed state: {e}")
+    finally:
+        session.close()
+    return states
+
+def advertised_interval(feed):
+    """Poll interval in seconds from <ttl> or sy:updatePeriod, or None"""
+    intervals = []
+    try:
+        intervals.append(int(feed.feed.get("ttl")) * 60)
+    except (TypeError, ValueError):
+        pass
+    period = UPDATE_PERIODS.get(str(feed.feed.get("sy_updateperiod", "")).strip().lower())
+    if period:
+        try:
+            frequency = max(1, int(feed.feed.get("sy_updatefrequency", 1)))
+        except (TypeError, ValueError):
+            frequency = 1
+        intervals.append(period // frequency)
+    intervals = [i for i in intervals if i > 0]
+    if not intervals:
+        return None
+    return min(max(intervals), FEED_MAX_POLL_INTERVAL)
+
+def parse_feed_body(feed_url, body, stats, headers=None, digest=None):
+    """feedparser result for a feed body, reused from the raw cache when the body is unchanged"""
+    raw_cache = get_raw_cache()
+    if raw_cache is not None:
+        digest = digest or content_hash(body)
+        feed = raw_cache.get_parsed(digest, feedparser.__version__)
+        if feed is not None:
+            stats.incr("feed_parse_cached")
+            stats.feed(feed_url, parse_seconds=0.0, parse_cached=True)
+            return feed
+    
+    with stats.time("feed_parse") as timing:
+        feed = feedparser.parse(body, response_headers=headers or {"content-location": feed_url})
+    stats.feed(feed_url, parse_seconds=round(timing["seconds"], 4))
+    if raw_cache is not None:
+        raw_cache.put_parsed(digest, feedparser.__version__, feed)
+    return feed
 
-def fetch_articles_from_feed(feed_url):
+def entry_times(entries):
+    """Publish (or update) times of the dated entries in a feed body"""
+    times = []
+    for entry in entries:
+        parsed = getattr(entry, 'published_parsed', None) or getattr(entry, 'updated_parsed', None)
+        try:
+            times.append(datetime(*parsed[:6]))
+        except (TypeError, ValueError):
+            pass
+    return times
+
+def parse_feed(feed_url, stats=None, state=None):
+    """Download and parse one RSS feed, returning its new entries.
+
+    With a ``state`` the request is conditional: a 304 returns no entries
+    without parsing, and entries whose GUID was in the previous body are
+    dropped. ``state`` is updated in place with the poll result and the
+    feed's next poll time.
+    """
+    stats = stats or RunStats()
+    state = state if state is not None else new_feed_state(feed_url)
     print(f"📡 Fetching from: {feed_url}")
     
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if state["etag"]:
+        headers["If-None-Match"] = state["etag"]
+    if state["last_modified"]:
+        headers["If-Modified-Since"] = state["last_modified"]
+    previous_poll, state["last_polled"] = state["last_polled"], datetime.utcnow()
+    
     try:
-        feed = feedparser.parse(feed_url)
+        with stats.time("feed_download") as timing:
+            response = get_client().get(feed_url, headers=headers, read_timeout=FEED_TIMEOUT, stats=stats)
+        state["last_http_status"] = response.status_code
+        stats.incr("feed_bytes", len(response.content))
+        stats.feed(feed_url, http_status=response.status_code, bytes=len(response.content),
+                   download_seconds=round(timing["seconds"], 4))
+        
+        if response.status_code == 304:
+            print(f"  💤 Not modified: {feed_url}")
+            state["last_status"] = "not_modified"
+            stats.incr("feeds_not_modified")
+            stats.feed(feed_url, status="not_modified", entries=0)
+            update_schedule(state, state["last_polled"], previous_poll)
+            return []
+        response.raise_for_status()
+        
+        feed = parse_feed_body(feed_url, response.content, stats, {
+            **{name.lower(): value for name, value in response.headers.items()},
+            "content-location": response.url,
+        }, digest=cache_raw(feed_url, response.content, "feed"))
         
         if feed.bozo:
             print(f"⚠️ Warning: Feed may have parsing issues - {feed.bozo_exception}")
         
-        articles = []
-        for entry in feed.entries:  # Limit to 10 articles per feed for demo
-            
-            # Get basic RSS data
-            rss_title = getattr(entry, 'title', 'No Title')
-            link = getattr(entry, 'link', '')
-            
-            if not link:
-                print(f"  ⏭️ Skipping article with no link: {rss_title[:50]}...")
-                continue
-            
-            print(f"  📄 Processing: {rss_title[:60]}...")
-            
-            # Extract enhanced data with newspaper3k
-            newspaper_data = extract_with_newspaper3k(link)
-            
-            if not newspaper_data:
-                # Fallback to RSS data if newspaper3k fails
-                articles.append({
-                    "title": rss_title,
-                    "link": link,
-                    "summary": getattr(entry, 'summary', ''),
-                    "content": '',
-                    "author": getattr(entry, 'author', None),
-                    "published_parsed": getattr(entry, 'published_parsed', None),
-                    "updated_parsed": getattr(entry, 'updated_parsed', None),
-                    "categories": ','.join([tag.term for tag in getattr(entry, 'tags', [])]),
-                    "source_feed": feed_url,
-                    "guid": getattr(entry, 'id', link),
-                    "language": getattr(entry, 'language', None),
-                    "thumbnail_url": None,
-                    "keywords": None
-                })
-                continue
-            
-            # Combine RSS metadata with newspaper3k content
-            articles.append({
-                "title": newspaper_data['title'] or rss_title,
-                "link": link,
-                "summary": newspaper_data['summary'][:1000] if newspaper_data['summary'] else getattr(entry, 'summary', '')[:1000],
-                "content": newspaper_data['text'][:5000] if newspaper_data['text'] else '',  # Limit content length
-                "author": ', '.join(newspaper_data['authors'][:2]) if newspaper_data['authors'] else getattr(entry, 'author', None),
-                "published_parsed": getattr(entry, 'published_parsed', None),  # Use RSS date as primary
-                "newspaper_date": newspaper_data['publish_date'],  # Keep newspaper3k date as backup
-                "updated_parsed": getattr(entry, 'updated_parsed', None),
-                "categories": ','.join([tag.term for tag in getattr(entry, 'tags', [])]) or None,
-                "source_feed": feed_url,
-                "guid": getattr(entry, 'id', link),
-                "language": getattr(entry, 'language', None),
-                "thumbnail_url": newspaper_data['top_image'][:1000] if newspaper_data['top_image'] else None,
-                "keywords": ', '.join(newspaper_data['keywords'][:10]) if newspaper_data['keywords'] else None
-            })
+        seen = set(state["seen_guids"])
+        guids = [getattr(entry, 'id', None) or getattr(entry, 'link', '') for entry in feed.entries]
+        entries = [entry for entry, guid in zip(feed.entries, guids) if guid not in seen]
+        stats.incr("entries_unchanged", len(feed.entries) - len(entries))
+        stats.feed(feed_url, status="ok", entries=len(feed.entries), new_entries=len(entries))
         
-        #print(f"  📊 Successfully processed {len(articles)} articles from this feed")
-        return articles
+        state.update(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            seen_guids=[guid for guid in guids if guid],
+            min_interval=advertised_interval(feed),
+            last_status="ok",
+        )
+        update_schedule(state, state["last_polled"], previous_poll, len(entries), entry_times(feed.entries))
+        return entries
         
     except Exception as e:
         print(f"  ❌ Error parsing feed {feed_url}: {e}")
+        state["last_status"] = f"error: {e}"[:200]
+        stats.incr("feed_errors")
+        stats.feed(feed_url, status=state["last_status"])
+        update_schedule(state, state["last_polled"], previous_poll, error=True)
         return []
 
-def save_articles_to_db(articles):
-    """Save all articles to database with enhanced metadata"""
-    print(f"💾 Saving {len(articles)} articles to database...")
+def schedule_extractions(feed_url, entries, engine, extractor, stats, known_links=None, state=None):
+    """Submit download and extraction for every new linked entry, keeping entry order"""
+    jobs = []
+    for entry in entries:
+        rss_title = getattr(entry, 'title', 'No Title')
+        link = getattr(entry, 'link', '')
+        
+        if not link:
+            print(f"  ⏭️ Skipping article with no link: {rss_title[:50]}...")
+            continue
+        
+        if is_expired(entry):
+            stats.incr("links_expired")
+            continue
+        
+        if known_links is not None and not known_links.claim(link, canonical_url(link)):
+            stats.incr("links_skipped")
+            continue
+        
+        nlp = wants_nlp(entry, state)
+        if not nlp:
+            stats.incr("nlp_skipped")
+        jobs.append((entry, engine.submit(link, download_for_extraction, link, extractor, nlp, stats)))
+    return jobs
+
+def make_thumbnail(url, stats):
+    """Download and resize one article image in a fetch thread"""
+    with stats.time("thumbnail"):
+        return fetch_thumbnail(url, stats)
+
+def schedule_thumbnails(articles, engine, stats):
+    """Submit thumbnail downloads for records with an image; returns [(record, future)]"""
+    if get_thumbnail_cache() is None:
+        return []
+    return [
+        (article, engine.submit(article["thumbnail_url"], make_thumbnail, article["thumbnail_url"], stats))
+        for article in articles
+        if article.get("thumbnail_url")
+    ]
+
+def attach_thumbnails(jobs):
+    """Wait for scheduled thumbnails and store their hashes on the records"""
+    for article, future in jobs:
+        try:
+            article["thumbnail_hash"] = future.result()
+        except Exception as e:
+            print(f"  ⚠️ Thumbnail crashed for {article['thumbnail_url']}: {e}")
+
+def collect_articles(feed_url, jobs, extractor, stats):
+    """Wait for scheduled extractions and build article records in entry order"""
+    articles = []
+    for entry, future in jobs:
+        try:
+            parse_future = future.result()
+        except Exception as e:
+            print(f"  ⚠️ Extraction crashed for {entry.link}: {e}")
+            parse_future = None
+        newspaper_data = extractor.result(parse_future, entry.link, stats) if parse_future else None
+        
+        if newspaper_data:
+            stats.incr("articles_extracted")
+        else:
+            stats.incr("articles_failed")
+        articles.append(build_article_record(feed_url, entry, newspaper_data))
+    
+    #print(f"  📊 Successfully processed {len(articles)} articles from this feed")
+    return articles
+
+def build_article_record(feed_url, entry, newspaper_data):
+    """Combine RSS entry metadata with newspaper3k output into one article record"""
+    rss_title = getattr(entry, 'title', 'No Title')
+    link = getattr(entry, 'link', '')
+    print(f"  📄 Processed: {rss_title[:60]}...")
+    
+    if not newspaper_data:
+        # Fallback to RSS data if newspaper3k fails
+        return {
+            "title": rss_title,
+            "link": link,
+            "summary": getattr(entry, 'summary', ''),
+            "content": '',
+            "author": getattr(entry, 'author', None),
+            "published_parsed": getattr(entry, 'published_parsed', None),
+            "updated_parsed": getattr(entry, 'updated_parsed', None),
+            "categories": ','.join([tag.term for tag in getattr(entry, 'tags', [])]),
+            "source_feed": feed_url,
+            "guid": getattr(entry, 'id', link),
+            "language": getattr(entry, 'language', None),
+            "canonical_link": choose_canonical(link),
+            "thumbnail_url": None,
+            "keywords": None
+        }
     
-    # First, clean the table completely
-    truncate_articles()
+    # Combine RSS metadata with newspaper3k content
+    return {
+        "title": newspaper_data['title'] or rss_title,
+        "link": link,
+        "summary": newspaper_data['summary'][:1000] if newspaper_data['summary'] else getattr(entry, 'summary', '')[:1000],
+        "content": newspaper_data['text'][:5000] if newspaper_data['text'] else '',  # Limit content length
+        "author": ', '.join(newspaper_data['authors'][:2]) if newspaper_data['authors'] else getattr(entry, 'author', None),
+        "published_parsed": getattr(entry, 'published_parsed', None),  # Use RSS date as primary
+        "newspaper_date": newspaper_data['publish_date'],  # Keep newspaper3k date as backup
+        "updated_parsed": getattr(entry, 'updated_parsed', None),
+        "categories": ','.join([tag.term for tag in getattr(entry, 'tags', [])]) or None,
+        "source_feed": feed_url,
+        "guid": getattr(entry, 'id', link),
+        "language": getattr(entry, 'language', None),
+        "canonical_link": choose_canonical(link, newspaper_data.get('canonical_link')),
+        "thumbnail_url": newspaper_data['top_image'][:1000] if newspaper_data['top_image'] else None,
+        "keywords": ', '.join(newspaper_data['keywords'][:10]) if newspaper_data['keywords'] else None
+    }
+
+def fetch_articles_from_feed(feed_url, engine=None, stats=None, known_links=None, extractor=None):
+    """Fetch one feed and extract its new articles concurrently"""
+    stats = stats or RunStats()
+    if extractor is None:
+        with ExtractionPool() as extractor:
+            return fetch_articles_from_feed(feed_url, engine, stats, known_links, extractor)
+    if engine is None:
+        with FetchEngine() as engine:
+            return fetch_articles_from_feed(feed_url, engine, stats, known_links, extractor)
     
-    app = create_app()
-    with app.app_context():
-        session = get_db_session()
-        saved_count = 0
+    entries = parse_feed(feed_url, stats)
+    jobs = schedule_extractions(feed_url, entries, engine, extractor, stats, known_links)
+    articles = collect_articles(feed_url, jobs, extractor, stats)
+    attach_thumbnails(schedule_thumbnails(articles, engine, stats))
+    return articles
+
+def fetch_all_feeds(feed_urls, stats=None, known_links=None, feed_states=None, on_feed_done=None):
+    """Fetch feeds through one shared engine, yielding (url, articles) as each feed completes.
+
+    Feeds and pages are downloaded concurrently by the fetch threads and
+    pages are parsed by the ExtractionPool processes. Each feed's articles
+    are scheduled as soon as that feed is parsed, then its article images
+    once its pages are done; a feed is yielded when both are finished, with
+    records in entry order. Work keeps running in the background while the
+    caller handles a feed.
+    ``on_feed_done(url, result)`` is called as each feed's articles are
+    collected.
+    """
+    stats = stats or RunStats()
+    feed_states = feed_states if feed_states is not None else {}
+    # (feed index, feed poll future or None) for every finished poll, page download and thumbnail
+    finished = queue.Queue()
+    with ExtractionPool() as extractor, FetchEngine() as engine:
+        outstanding = {}
+        for index, url in enumerate(feed_urls):
+            outstanding[index] = 1
+            engine.submit(url, parse_feed, url, stats, feed_states.get(url))\
+                .add_done_callback(lambda future, index=index: finished.put((index, future)))
         
-        try:
-            for article_data in articles:
-                # Parse dates
-                published_date = None
-                if article_data["published_parsed"]:
-                    try:
-                        published_date = datetime(*article_data["published_parsed"][:6])
-                    except (TypeError, ValueError):
-                        pass
-                
-                # Fallback to newspaper3k date
-                if not published_date and article_data.get("newspaper_date"):
-                    published_date = article_data["newspaper_date"]
-                
-                updated_date = None
-                if article_data["updated_parsed"]:
-                    try:
-                        updated_date = datetime(*article_data["updated_parsed"][:6])
-                    except (TypeError, ValueError):
-                        pass
-                
-                # Create enhanced article object
-                article = ArticleModel(
-                    title=article_data["title"][:500],
-                    link=article_data["link"][:200],
-                    summary=article_data["summary"],  # Clean text from newspaper3k
-                    content=article_data["content"],  # Clean full text from newspaper3k
-                    author=article_data["author"][:200] if article_data["author"] else None,
-                    published=published_date or datetime.utcnow(),
-                    updated=updated_date,
-                    categories=article_data["categories"][:100] if article_data["categories"] else None,
-                    thumbnail_url=article_data["thumbnail_url"][:200] if article_data["thumbnail_url"] else None
+        jobs_by_feed = [[] for _ in feed_urls]
+        collected, thumbnails = {}, {}
+        done = 0
+        while outstanding:
+            index, feed_future = finished.get()
+            if feed_future is not None:
+                jobs = schedule_extractions(
+                    feed_urls[index], feed_future.result(), engine, extractor, stats, known_links,
+                    feed_states.get(feed_urls[index])
                 )
-                
-                session.merge(article)
-                saved_count += 1
+                jobs_by_feed[index] = jobs
+                outstanding[index] += len(jobs)
+                for _, future in jobs:
+                    future.add_done_callback(lambda _, index=index: finished.put((index, None)))
+            outstanding[index] -= 1
+            if outstanding[index]:
+                continue
             
-            # Commit all articles at once
-            session.commit()
-            print(f"🎉 Successfully saved {saved_count} articles with enhanced metadata!")
+            url = feed_urls[index]
+            if index not in collected:
+                # Pages are done: build the records, then wait for their images the same way
+                collected[index] = collect_articles(url, jobs_by_feed[index], extractor, stats)
+                jobs_by_feed[index] = None
+                thumbnails[index] = schedule_thumbnails(collected[index], engine, stats)
+                if thumbnails[index]:
+                    outstanding[index] = len(thumbnails[index])
+                    for _, future in thumbnails[index]:
+                        future.add_done_callback(lambda _, index=index: finished.put((index, None)))
+                    continue
             
-        except Exception as e:
-            session.rollback()
-            print(f"❌ Error saving articles to database: {e}")
+            del outstanding[index]
+            articles = collected.pop(index)
+            attach_thumbnails(thumbnails.pop(index))
+            done += 1
+            if on_feed_done:
+                state = feed_states.get(url) or {}
+                on_feed_done(url, {
+                    "status": state.get("last_status") or "ok",
+                    "articles": len(articles),
+                    "done": done,
+                    "total": len(feed_urls),
+                })
+            yield url, articles
+
+def micro_batches(feed_articles, max_articles=FETCH_COMMIT_ARTICLES, max_seconds=FETCH_COMMIT_SECONDS):
+    """Group (url, articles) pairs into ([urls], [articles]) batches of whole feeds.
+
+    A batch is closed once it holds ``max_articles`` articles or
+    ``max_seconds`` have passed since the previous one, so a feed's
+    articles are always committed together with its polling state.
+    """
+    urls, articles, started = [], [], time.monotonic()
+    for url, records in feed_articles:
+        urls.append(url)
+        articles.extend(records)
+        if len(articles) >= max_articles or time.monotonic() - started >= max_seconds:
+            yield urls, articles
+            urls, articles, started = [], [], time.monotonic()
+    if urls:
+        yield urls, articles
+
+def get_session():
+    """Return a database session; only the database layer is set up, never the Flask app"""
+    init_engine()
+    return get_db_session()
+
+def retention_cutoff():
+    """Oldest publish date kept by the retention policy, or None to keep everything"""
+    if ARTICLE_RETENTION_DAYS <= 0:
+        return None
+    return datetime.utcnow() - timedelta(days=ARTICLE_RETENTION_DAYS)
+
+def is_expired(entry):
+    """True if a feed entry is already older than the retention window"""
+    cutoff = retention_cutoff()
+    published = getattr(entry, 'published_parsed', None)
+    if not cutoff or not published:
+        return False
+    try:
+        return datetime(*published[:6]) < cutoff
+    except (TypeError, ValueError):
+        return False
+
+def article_row(article_data):
+    """Convert a fetched article record into an articles table row"""
+    # Parse dates
+    published_date = None
+    if article_data["published_parsed"]:
+        try:
+            published_date = datetime(*article_data["published_parsed"][:6])
+        except (TypeError, ValueError):
+            pass
+    
+    # Fallback to newspaper3k date
+    if not published_date and article_data.get("newspaper_date"):
+        published_date = article_data["newspaper_date"]
+    
+    updated_date = None
+    if article_data["updated_parsed"]:
+        try:
+            updated_date = datetime(*article_data["updated_parsed"][:6])
+        except (TypeError, ValueError):
+            pass
+    
+    return {
+        "title": article_data["title"][:500],
+        "link": article_data["link"][:200],
+        "summary": article_data["summary"],  # Clean text from newspaper3k
+        "content": article_data["content"],  # Clean full text from newspaper3k
+        "author": article_data["author"][:200] if article_data["author"] else None,
+        "published": published_date or datetime.utcnow(),
+        "updated": updated_date,
+        "categories": article_data["categories"][:100] if article_data["categories"] else None,
+        "thumbnail_url": article_data["thumbnail_url"][:200] if article_data["thumbnail_url"] else None,
+        "thumbnail_hash": article_data.get("thumbnail_hash"),
+        "canonical_link": (article_data.get("canonical_link") or choose_canonical(article_data["link"]))[:1000],
+        "fingerprint": minhash(dedup_text(article_data)),
+        "created_at": datetime.utcnow(),
+    }
+
+def upsert_rows(session, table, rows, key, keep=()):
+    """Bulk INSERT ... ON CONFLICT (key) DO UPDATE, touching only changed rows.
+
+    Columns in ``keep`` are written on insert but never overwritten.
+    Databases without ON CONFLICT go through merge_rows() instead.
+    """
+    dialect = session.bind.dialect.name
+    columns = [name for name in rows[0] if name != key and name not in keep]
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        return merge_rows(session, table, rows, key, columns)
+    
+    changed = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = insert(table).values(rows[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[key]],
+            set_={name: stmt.excluded[name] for name in columns},
+            where=or_(*[table.c[name].is_distinct_from(stmt.excluded[name]) for name in columns]),
+        )
+        changed += session.execute(stmt).rowcount
+    return changed
+
+def merge_rows(session, table, rows, key, columns):
+    """Portable upsert: select the stored rows by key, insert new ones and update changed ``columns``"""
+    update = table.update()\
+        .where(table.c[key] == bindparam("_key"))\
+        .values({name: bindparam(f"_{name}") for name in columns})
+    changed = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        stored = {
+            row[0]: tuple(row[1:]) for row in session.execute(
+                select(table.c[key], *[table.c[name] for name in columns])
+                .where(table.c[key].in_([row[key] for row in batch]))
+            )
+        }
+        inserts = [row for row in batch if row[key] not in stored]
+        updates = [
+            dict({f"_{name}": row[name] for name in columns}, _key=row[key])
+            for row in batch
+            if row[key] in stored and stored[row[key]] != tuple(row[name] for name in columns)
+        ]
+        if inserts:
+            session.execute(table.insert(), inserts)
+        if updates:
+            session.execute(update, updates)
+        changed += len(inserts) + len(updates)
+    return changed
+
+def upsert_articles(session, rows):
+    """Upsert article rows by link, keeping the original created_at"""
+    return upsert_rows(session, ArticleModel.__table__, rows, "link", keep=("created_at",))
+
+def upsert_feed_states(session, feed_states):
+    """Persist polling state for every feed that was polled this run"""
+    rows = [
+        dict(state, seen_guids=json.dumps(state["seen_guids"][:500]))
+        for state in feed_states.values()
+        if state["last_polled"]
+    ]
+    return upsert_rows(session, FeedState.__table__, rows, "feed_url", keep=("nlp",)) if rows else 0
+
+def save_feed_states(feed_states):
+    """Commit feed polling state on its own, for feeds with no articles to save; None on failure"""
+    session = get_session()
+    try:
+        saved_count = upsert_feed_states(session, feed_states)
+        session.commit()
+        return saved_count
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error saving feed state: {e}")
+        return None
+    finally:
+        session.close()
+
+def apply_retention(session):
+    """Delete articles published before the retention cutoff"""
+    cutoff = retention_cutoff()
+    if not cutoff:
+        return 0
+    expired = session.query(ArticleModel).filter(ArticleModel.published < cutoff)
+    delete_article_tags(session, expired.with_entities(ArticleModel.id))
+    search.delete_postings(session, expired.with_entities(ArticleModel.id))
+    delete_fingerprints(session, expired.with_entities(ArticleModel.id))
+    return expired.delete(synchronize_session=False)
+
+def bump_ingest_state(session):
+    """Advance the ingest version and record the new article total"""
+    values = {
+        "article_count": session.query(func.count(ArticleModel.id)).scalar(),
+        "updated_at": datetime.utcnow(),
+    }
+    updated = session.query(IngestState)\
+        .filter(IngestState.id == 1)\
+        .update(dict(values, version=IngestState.version + 1), synchronize_session=False)
+    if not updated:
+        session.add(IngestState(id=1, version=1, **values))
+
+def save_articles_to_db(articles, feed_states=None, stats=None):
+    """Upsert articles and apply the retention policy in one short transaction.
+
+    Existing rows stay visible to readers throughout; only new or changed
+    articles are written and old ones are removed by retention, never by a
+    full truncate. Feed polling state is committed with the articles so a
+    failed save never marks entries as seen. Returns the number of rows
+    written, or None if the transaction failed.
+    """
+    print(f"💾 Saving {len(articles)} articles to database...")
+    stats = stats or RunStats()
+    
+    # Build rows up front so the transaction only covers the writes;
+    # the last record wins when a link appears twice
+    rows = list({row["link"]: row for row in map(article_row, articles)}.values())
+    
+    session = get_session()
+    
+    try:
+        with stats.time("db_upsert"):
+            saved_count = upsert_articles(session, rows) if rows else 0
+        with stats.time("db_index_tags"):
+            index_article_tags(session, rows)
+        with stats.time("db_index_search"):
+            search.index_articles(session, rows)
+        with stats.time("db_index_duplicates"):
+            duplicate_count = index_duplicates(session, rows)
+        with stats.time("db_retention"):
+            expired_count = apply_retention(session)
+        if feed_states:
+            upsert_feed_states(session, feed_states)
+        if saved_count or expired_count:
+            bump_ingest_state(session)
+        with stats.time("db_commit"):
+            session.commit()
+        stats.incr("rows_written", saved_count)
+        stats.incr("rows_expired", expired_count)
+        stats.incr("duplicates_found", duplicate_count)
+        cache.invalidate()
+        if saved_count:
+            # The batch is committed either way; a lost notification only delays changefeed clients
+            try:
+                changes.publish(session)
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️ Could not notify changefeed clients: {e}")
+        print(f"🎉 Successfully saved {saved_count} new or changed articles with enhanced metadata!")
+        if expired_count:
+            print(f"🧹 Removed {expired_count} articles older than {ARTICLE_RETENTION_DAYS} days")
+        return saved_count
+        
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error saving articles to database: {e}")
+        return None
+        
+    finally:
+        session.close()
+
+def rebuild_indexes(batch_size=UPSERT_BATCH_SIZE):
+    """Backfill category/author link tables, search postings and story clusters for every stored article"""
+    session = get_session()
+    try:
+        columns = (ArticleModel.id, ArticleModel.link, ArticleModel.categories, ArticleModel.author,
+                   ArticleModel.title, ArticleModel.summary, ArticleModel.content, ArticleModel.canonical_link)
+        table = ArticleModel.__table__
+        store_fingerprint = table.update().where(table.c.id == bindparam("_id"))\
+            .values(canonical_link=bindparam("_canonical"), fingerprint=bindparam("_fingerprint"))
+        last_id, total = 0, 0
+        while True:
+            batch = session.query(*columns)\
+                .filter(ArticleModel.id > last_id)\
+                .order_by(ArticleModel.id)\
+                .limit(batch_size)\
+                .all()
+            if not batch:
+                break
+            rows = [row._asdict() for row in batch]
+            for row in rows:
+                row["canonical_link"] = row["canonical_link"] or canonical_url(row["link"])
+                row["fingerprint"] = minhash(dedup_text(row))
+            session.execute(store_fingerprint, [
+                {"_id": row["id"], "_canonical": row["canonical_link"], "_fingerprint": row["fingerprint"]}
+                for row in rows
+            ])
+            index_article_tags(session, rows)
+            search.index_articles(session, rows)
+            index_duplicates(session, rows)
+            session.commit()
+            last_id, total = batch[-1].id, total + len(batch)
+        cache.invalidate()
+        print(f"🏷️ Indexed categories, authors, search terms and story clusters for {total} articles")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error rebuilding indexes: {e}")
+    finally:
+        session.close()
+
+def reextract_from_cache(batch_size=UPSERT_BATCH_SIZE):
+    """Rebuild article records from cached feed bodies and article HTML, offline.
+
+    Every cached feed body is replayed oldest first so each link keeps its
+    latest RSS entry; links whose HTML is not cached are left untouched.
+    Records are saved in batches through the normal upsert path.
+    """
+    raw_cache = get_raw_cache()
+    if raw_cache is None:
+        print("❌ Raw cache is disabled (RAW_CACHE_DIR is empty)")
+        return
+    
+    stats = RunStats()
+    entries = {}
+    for feed_url, digest in raw_cache.entries("feed"):
+        body = raw_cache.get_blob(digest)
+        if body is None:
+            continue
+        for entry in parse_feed_body(feed_url, body, stats, digest=digest).entries:
+            link = getattr(entry, 'link', '')
+            if link:
+                entries.pop(link, None)
+                entries[link] = (feed_url, entry)
+    print(f"🗄️ {len(entries)} entries found in {len(raw_cache.entries('feed'))} cached feed bodies")
+    
+    feed_states = load_feed_states(sorted({feed_url for feed_url, _ in entries.values()}))
+    items = list(entries.values())
+    with ExtractionPool() as extractor:
+        for start in range(0, len(items), batch_size):
+            jobs = []
+            for feed_url, entry in items[start:start + batch_size]:
+                if is_expired(entry):
+                    stats.incr("links_expired")
+                    continue
+                html = raw_cache.get(entry.link, "article")
+                if html is None:
+                    stats.incr("cache_misses")
+                    continue
+                nlp = wants_nlp(entry, feed_states.get(feed_url))
+                jobs.append((feed_url, entry, extractor.submit(entry.link, html.decode("utf-8"), nlp)))
             
-        finally:
-            session.close()
+            articles = []
+            for feed_url, entry, future in jobs:
+                newspaper_data = extractor.result(future, entry.link, stats)
+                if not newspaper_data:
+                    # Keep the stored record rather than fall back to RSS data
+                    stats.incr("articles_failed")
+                    continue
+                stats.incr("articles_extracted")
+                article = build_article_record(feed_url, entry, newspaper_data)
+                # Offline: only thumbnails that are already cached
+                article["thumbnail_hash"] = fetch_thumbnail(article["thumbnail_url"], stats, download=False)
+                articles.append(article)
+            if articles:
+                with stats.time("db_write"):
+                    save_articles_to_db(articles, stats=stats)
+    
+    print(f"♻️ Re-extracted {stats.counters['articles_extracted']} articles from cache "
+          f"({stats.counters['cache_misses']} links had no cached HTML)")
+    stats.print_report()
+    return stats.report()
 
-def main1():
-    """Main execution function"""
+def main1(on_feed_done=None, stats=None, checkpoint=None):
+    """Run one scheduler tick over the due feeds; returns the run report.
+
+    Articles are committed in micro-batches of whole feeds as they
+    complete. Pass a RunStats as ``stats`` to watch the run's metrics while
+    it is in progress, and a RunCheckpoint as ``checkpoint`` to persist
+    progress; a checkpoint saved by an interrupted run resumes it.
+    """
+    
+    stats = stats or RunStats()
     
     # Get RSS feeds from database
     feeds = get_rss_feeds()
     
     if not feeds:
         print("❌ No RSS feeds found in database 'rss' table!")
-        return
+        return stats.report()
     
-    # Fetch articles from all feeds
-    all_articles = []
-    for (url,) in feeds:
-        articles = fetch_articles_from_feed(url)
-        all_articles.extend(articles)
+    # Load links we already have so they are not downloaded again
+    checkpoint = checkpoint or RunCheckpoint()
+    with stats.time("known_links_load"):
+        known_links = KnownLinkIndex.load()
+    print(f"📚 {len(known_links)} known article links loaded")
     
-    print(f"\n📊 Total articles processed: {len(all_articles)}")
-    
-    if all_articles:
-        save_articles_to_db(all_articles)
+    with stats.time("feed_state_load"):
+        feed_states = load_feed_states([url for (url,) in feeds])
+    if checkpoint.resumed:
+        # Pick up the interrupted run's remaining feeds (unless they were removed since)
+        due_urls = [url for url in checkpoint.remaining() if url in feed_states]
+        stats.incr("feeds_resumed", len(checkpoint.finished))
+        print(f"🔁 Resuming run: {len(checkpoint.finished)} of {len(checkpoint.feeds)} feeds "
+              f"already committed, {len(due_urls)} to go")
     else:
+        # Poll the feeds whose next poll time has come, most overdue first, within the tick budget
+        due_urls, due_count = due_feeds(feed_states, budget=SCHEDULE_TICK_BUDGET)
+        stats.incr("feeds_deferred", len(feeds) - due_count)
+        stats.incr("feeds_over_budget", due_count - len(due_urls))
+        print(f"🗓️ Polling {len(due_urls)} of {len(feeds)} feeds "
+              f"({due_count} due, tick budget {SCHEDULE_TICK_BUDGET})")
+        checkpoint.plan(due_urls)
+    
+    # Fetch feeds and commit their articles a micro-batch at a time
+    total_articles = 0
+    feed_articles = fetch_all_feeds(due_urls, stats, known_links, feed_states, on_feed_done)
+    for urls, articles in micro_batches(feed_articles):
+        if checkpoint.stopped.is_set():
+            raise RunStopped(f"Run stopped with {len(checkpoint.remaining())} feeds uncommitted")
+        batch_states = {url: feed_states[url] for url in urls}
+        with stats.time("db_write"):
+            if articles:
+                saved = save_articles_to_db(articles, batch_states, stats)
+            else:
+                saved = save_feed_states(batch_states)
+        total_articles += len(articles)
+        if saved is None:
+            # These feeds stay unfinished and due, so the next run polls them again
+            stats.incr("batches_failed")
+            continue
+        stats.incr("batches_committed")
+        checkpoint.commit(urls, len(articles))
+    
+    print(f"\n📊 Total articles processed: {total_articles}")
+    print(f"⏭️ Skipped {stats.counters['links_skipped']} known links, "
+          f"extracted {stats.counters['articles_extracted']} "
+          f"({stats.counters['articles_failed']} fell back to RSS data)")
+    if not total_articles:
         print("⚠️ No articles to save.")
     
+    stats.print_report()
     print("✨ Enhanced article fetch completed!")
+    return stats.report()
 
 if __name__ == "__main__":
-    main1()
+    import sys
+    
+    if "--reindex" in sys.argv[1:]:
+        rebuild_indexes()
+    elif "--from-cache" in sys.argv[1:]:
+        reextract_from_cache()
+    else:
+        main1()
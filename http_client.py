@@ -0,0 +1,214 @@
+"""
+Shared HTTP Client
+
+One pooled requests.Session for feed and article downloads, so
+connections to a publisher are kept alive and reused across the run.
+Every request gets separate connect and read timeouts; 429/503 answers
+with a short Retry-After are retried after waiting that long.
+
+Each host has a circuit breaker: after BREAKER_FAILURES consecutive
+failures (connection errors, timeouts, 5xx, 429) the host is left alone
+for BREAKER_COOLDOWN seconds, or for as long as its Retry-After asks,
+then one trial request decides whether it is back.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds to establish a connection and to wait between bytes of the response
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+
+# Retries per request, and the longest Retry-After that is waited out rather than treated as a failure
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "30"))
+
+# Kept-alive connections per host, and how many hosts keep a pool
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "4"))
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "100"))
+
+# Consecutive failures that open a host's circuit, and seconds it stays open
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "300"))
+
+RETRY_STATUSES = (429, 503)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+def retry_after(response):
+    """Seconds asked for by a Retry-After header (delta or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def is_failure(response):
+    """Responses that say the host is down or throttling, as opposed to a bad URL"""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open trial → closed or open again"""
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.max_failures = max(1, failures)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Whether a request may be sent now; only one trial request is let through when half-open"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() >= self.open_until:
+                self.state = "half_open"
+                return True
+            if self.state == "closed":
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def failure(self, wait=None):
+        """Count a failure; ``wait`` is a Retry-After too long to wait out, which opens the circuit at once"""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.max_failures or wait is not None:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.open_until = time.monotonic() + max(self.cooldown if wait is None else 0, wait or 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "open_seconds": round(max(self.open_until - time.monotonic(), 0), 1) if self.state == "open" else 0,
+            }
+
+
+class HttpClient:
+    """Thread-safe GET with keep-alive pools, timeouts, Retry-After and per-host circuit breakers"""
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 retries=HTTP_MAX_RETRIES, max_retry_after=HTTP_MAX_RETRY_AFTER):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.max_retry_after = max_retry_after
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def get(self, url, headers=None, read_timeout=None, stats=None, stream=False):
+        """GET ``url`` and return the response; raises CircuitOpenError or a requests error.
+
+        Dropped connections are retried, and so are 429/503 answers whose
+        Retry-After is at most ``max_retry_after``. A longer Retry-After
+        opens the host's circuit for that long. ``stats`` (a fetch.RunStats)
+        counts retries, failures and rejected requests. With ``stream`` the
+        body is left unread, and the caller must close the response.
+        """
+        host = urlparse(url).netloc.lower()
+        breaker = self.breaker(host)
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                _incr(stats, "http_circuit_rejected")
+                raise CircuitOpenError(f"Circuit open for {host}")
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout, stream=stream)
+            except requests.RequestException as e:
+                breaker.failure()
+                _incr(stats, "http_failures")
+                # Dropped connections are retried; a timeout has already cost the full timeout
+                if attempt < self.retries and isinstance(e, requests.ConnectionError) \
+                        and not isinstance(e, requests.Timeout):
+                    _incr(stats, "http_retries")
+                    continue
+                raise
+
+            if not is_failure(response):
+                breaker.success()
+                return response
+
+            _incr(stats, "http_failures")
+            wait = retry_after(response) if response.status_code in RETRY_STATUSES else None
+            if wait is not None and wait <= self.max_retry_after and attempt < self.retries:
+                breaker.failure()
+                _incr(stats, "http_retries")
+                response.close()
+                time.sleep(wait)
+                continue
+            breaker.failure(wait if wait is not None and wait > self.max_retry_after else None)
+            return response
+
+    def breaker_report(self):
+        """{host: breaker snapshot} for hosts that are failing now or were cut off since the process started"""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        report = {}
+        for host, breaker in breakers:
+            snapshot = breaker.snapshot()
+            if snapshot["state"] != "closed" or snapshot["failures"] or snapshot["rejected"]:
+                report[host] = snapshot
+        return report
+
+
+def _incr(stats, counter):
+    if stats is not None:
+        stats.incr(counter)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide HTTP client, shared by every fetch thread"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Database Migration
+
+Creates missing tables, columns and indexes. The web app and fetch
+pipeline no longer touch the schema at startup, so run this once after
+deploying a change to the models.
+
+Usage:
+    python migrate.py
+"""
+
+from app import migrate
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,188 @@
+"""
+Raw Download Cache
+
+Keeps downloaded article HTML and feed XML on disk so extraction can be
+re-run without downloading anything again (``python fetch.py --from-cache``).
+
+Bodies are stored once per content hash, zlib-compressed, under
+RAW_CACHE_DIR; a small SQLite index maps (url, hash) to them and tracks
+access times so the least recently used bodies are evicted once the
+cache grows past RAW_CACHE_MAX_MB. Parsed feedparser results are cached
+by body hash too, so a feed body that hasn't changed is never re-parsed.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache location (empty disables the cache) and size limit
+RAW_CACHE_DIR = os.getenv("RAW_CACHE_DIR", ".raw_cache")
+RAW_CACHE_MAX_MB = int(os.getenv("RAW_CACHE_MAX_MB", "512"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_blobs_last_access ON blobs (last_access);
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (url, hash)
+);
+CREATE INDEX IF NOT EXISTS ix_entries_kind_fetched ON entries (kind, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_entries_hash ON entries (hash);
+"""
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class RawCache:
+    """Content-addressed, compressed, size-bounded LRU store of raw downloads"""
+
+    def __init__(self, directory=RAW_CACHE_DIR, max_bytes=RAW_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _path(self, digest):
+        return os.path.join(self.directory, "blobs", digest[:2], digest + ".z")
+
+    def _write_blob(self, digest, data):
+        """Store compressed ``data`` under ``digest`` unless it is already there"""
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row:
+            return
+        compressed = zlib.compress(data, 6)
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+        with self._lock, self._db:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO blobs (hash, size, last_access) VALUES (?, ?, ?)",
+                (digest, len(compressed), time.time()),
+            ).rowcount
+            self._size += len(compressed) if inserted else 0
+
+    def _read_blob(self, digest):
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        with self._lock, self._db:
+            self._db.execute("UPDATE blobs SET last_access = ? WHERE hash = ?", (time.time(), digest))
+        return data
+
+    def put(self, url, body, kind):
+        """Store a downloaded body (bytes or str) for ``url``; returns its content hash"""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = content_hash(body)
+        self._write_blob(digest, body)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (url, hash, kind, fetched_at) VALUES (?, ?, ?, ?)",
+                (url, digest, kind, time.time()),
+            )
+        self.evict()
+        return digest
+
+    def get(self, url, kind=None):
+        """Most recently stored body for ``url`` as bytes, or None"""
+        query = "SELECT hash FROM entries WHERE url = ?"
+        params = [url]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            row = self._db.execute(query + " ORDER BY fetched_at DESC LIMIT 1", params).fetchone()
+        return self._read_blob(row[0]) if row else None
+
+    def get_blob(self, digest):
+        return self._read_blob(digest)
+
+    def entries(self, kind):
+        """(url, hash) for every stored body of ``kind``, oldest first"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, hash FROM entries WHERE kind = ? ORDER BY fetched_at, url", (kind,)
+            ).fetchall()
+
+    def get_parsed(self, digest, version):
+        """Cached parse result for body ``digest`` from parser ``version``, or None"""
+        data = self._read_blob(content_hash(f"parsed:{version}:{digest}".encode()))
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            return None
+
+    def put_parsed(self, digest, version, parsed):
+        try:
+            data = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return  # Some parse results carry exceptions that don't pickle
+        self._write_blob(content_hash(f"parsed:{version}:{digest}".encode()), data)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used bodies until the cache fits in max_bytes"""
+        if self._size <= self.max_bytes:
+            return 0
+        removed = 0
+        with self._lock, self._db:
+            rows = self._db.execute("SELECT hash, size FROM blobs ORDER BY last_access").fetchall()
+            for digest, size in rows:
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                self._db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                self._db.execute("DELETE FROM entries WHERE hash = ?", (digest,))
+                try:
+                    os.remove(self._path(digest))
+                except OSError:
+                    pass
+                self._size -= size
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            blobs = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            entries = dict(self._db.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {"blobs": blobs, "bytes": self._size, "max_bytes": self.max_bytes, "entries": entries}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_raw_cache():
+    """Process-wide raw cache, or None when RAW_CACHE_DIR is empty"""
+    global _cache
+    if not RAW_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = RawCache()
+        return _cache
@@ -0,0 +1,105 @@
+"""
+Feed Scheduler
+
+Keeps a next-poll time per feed, worked out from the feed's observed
+publish rate, its error history and the interval it advertises. Each
+fetch run is one tick: only feeds that are due are polled, most overdue
+first, and at most SCHEDULE_TICK_BUDGET of them.
+"""
+
+import heapq
+import os
+import random
+from datetime import datetime, timedelta
+
+# Poll intervals in seconds: new feeds start at the default, known ones stay within min/max
+SCHEDULE_MIN_INTERVAL = int(os.getenv("SCHEDULE_MIN_INTERVAL", "600"))
+FEED_MAX_POLL_INTERVAL = int(os.getenv("FEED_MAX_POLL_INTERVAL", str(24 * 3600)))
+SCHEDULE_DEFAULT_INTERVAL = int(os.getenv("SCHEDULE_DEFAULT_INTERVAL", "3600"))
+
+# Poll when about this many new entries are expected
+SCHEDULE_TARGET_ENTRIES = float(os.getenv("SCHEDULE_TARGET_ENTRIES", "3"))
+
+# Feeds polled per tick at most; due feeds over the budget wait for the next tick
+SCHEDULE_TICK_BUDGET = int(os.getenv("SCHEDULE_TICK_BUDGET", "50"))
+
+# Longest wait after repeated errors (seconds)
+SCHEDULE_MAX_BACKOFF = int(os.getenv("SCHEDULE_MAX_BACKOFF", str(24 * 3600)))
+
+# Weight of the newest publish-rate observation, and the +/- spread applied to each interval
+RATE_SMOOTHING = 0.3
+JITTER = 0.1
+
+
+def observed_rate(now, entry_times, new_entries, elapsed):
+    """Entries per hour seen in one poll, or None when there is nothing to go on.
+
+    Dated entries in the feed body give the rate directly, measured up to
+    now so a feed that stopped publishing reads as slow; otherwise the
+    number of new entries since the previous poll is used.
+    """
+    if entry_times:
+        span = max((now - min(entry_times)).total_seconds(), 60)
+        return len(entry_times) * 3600 / span
+    if elapsed:
+        return new_entries * 3600 / max(elapsed, 60)
+    return None
+
+
+def healthy_interval(rate, advertised=None):
+    """Seconds between polls for a feed publishing ``rate`` entries per hour"""
+    if rate is None:
+        interval = SCHEDULE_DEFAULT_INTERVAL
+    elif rate <= 0:
+        interval = FEED_MAX_POLL_INTERVAL
+    else:
+        interval = SCHEDULE_TARGET_ENTRIES * 3600 / rate
+    # Never poll more often than the feed's <ttl> / sy:updatePeriod asks for
+    interval = max(interval, advertised or 0, SCHEDULE_MIN_INTERVAL)
+    return int(min(interval, FEED_MAX_POLL_INTERVAL))
+
+
+def backoff_interval(interval, error_count):
+    """Wait after ``error_count`` consecutive errors: the usual interval, doubled per error"""
+    return int(min(max(interval, SCHEDULE_MIN_INTERVAL) * 2 ** min(error_count, 16), SCHEDULE_MAX_BACKOFF))
+
+
+def update_schedule(state, now, previous_poll=None, new_entries=0, entry_times=(), error=False):
+    """Record one poll's outcome in a feed state and set its next_poll_at"""
+    if error:
+        state["error_count"] = (state.get("error_count") or 0) + 1
+        interval = state.get("poll_interval") or SCHEDULE_DEFAULT_INTERVAL
+        wait = backoff_interval(interval, state["error_count"])
+    else:
+        state["error_count"] = 0
+        elapsed = (now - previous_poll).total_seconds() if previous_poll else None
+        rate = observed_rate(now, entry_times, new_entries, elapsed)
+        if rate is not None:
+            previous_rate = state.get("publish_rate")
+            state["publish_rate"] = rate if previous_rate is None \
+                else RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * previous_rate
+        state["poll_interval"] = healthy_interval(state.get("publish_rate"), state.get("min_interval"))
+        wait = state["poll_interval"]
+    state["next_poll_at"] = now + timedelta(seconds=wait * random.uniform(1 - JITTER, 1 + JITTER))
+    return state
+
+
+def priority(state, now):
+    """How overdue a feed is, in multiples of its poll interval; never-polled feeds come first"""
+    if not state.get("next_poll_at"):
+        return float("inf")
+    interval = state.get("poll_interval") or SCHEDULE_DEFAULT_INTERVAL
+    return (now - state["next_poll_at"]).total_seconds() / interval
+
+
+def due_feeds(feed_states, now=None, budget=SCHEDULE_TICK_BUDGET):
+    """Feed URLs to poll this tick, most overdue first, and how many were due in total"""
+    now = now or datetime.utcnow()
+    queue = [
+        (-priority(state, now), -(state.get("publish_rate") or 0), url)
+        for url, state in feed_states.items()
+        if not state.get("next_poll_at") or state["next_poll_at"] <= now
+    ]
+    heapq.heapify(queue)
+    selected = [heapq.heappop(queue)[2] for _ in range(min(max(budget, 0), len(queue)))]
+    return selected, len(selected) + len(queue)
@@ -0,0 +1,98 @@
+"""
+Test fixtures
+
+Tests run against a throwaway SQLite database by default. Set
+TEST_DATABASE_URL to a scratch PostgreSQL database to also run the
+PostgreSQL-only tests; every table in it is emptied between tests.
+"""
+
+import os
+import sys
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="news-tests-")
+
+# Configure the app before anything imports it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{TEST_DIR}/test.sqlite"
+os.environ.setdefault("RSS_FEEDS", "http://feeds.test/rss")
+os.environ["RAW_CACHE_DIR"] = ""
+os.environ["THUMB_CACHE_DIR"] = os.path.join(TEST_DIR, "thumbs")
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+
+import pytest
+from datetime import datetime, timedelta
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app import init_engine, migrate
+    migrate()
+    return init_engine()
+
+
+@pytest.fixture
+def db(engine):
+    """A session on an empty database"""
+    from app import Base, cache, get_db_session
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    cache.invalidate()
+    session = get_db_session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    from app import create_app
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def publisher():
+    """A local synthetic publisher; yields (publisher, feed URLs)"""
+    from bench.server import SyntheticPublisher, start_servers, stop_servers
+    synthetic = SyntheticPublisher(feeds=2, items=5, page_kb=2, latency=0)
+    feed_urls, servers = start_servers(synthetic)
+    yield synthetic, feed_urls
+    stop_servers(servers)
+
+
+def article_row(n, **values):
+    """An article row as fetch.article_row() builds it"""
+    row = {
+        "title": f"Article {n}",
+        "link": f"http://publisher.test/article/{n}",
+        "summary": f"Summary of article {n}",
+        "content": f"Content of article {n}",
+        "author": "Jane Doe",
+        "published": NOW - timedelta(hours=n),
+        "updated": None,
+        "categories": "World",
+        "thumbnail_url": None,
+        "thumbnail_hash": None,
+        "canonical_link": f"http://publisher.test/article/{n}",
+        "fingerprint": None,
+        "created_at": NOW,
+    }
+    row.update(values)
+    return row
+
+
+def store_articles(session, rows):
+    """Upsert article rows and commit them as one ingest, the way save_articles_to_db does"""
+    import fetch
+    from app import cache, search
+    fetch.upsert_articles(session, rows)
+    fetch.index_article_tags(session, rows)
+    search.index_articles(session, rows)
+    fetch.index_duplicates(session, rows)
+    fetch.bump_ingest_state(session)
+    session.commit()
+    cache.invalidate()
@@ -0,0 +1,71 @@
+from app import routes
+from app.cache import ArticleCache
+from app.models import Article
+from conftest import article_row, store_articles
+
+
+def article_ids(db):
+    """{title: id} of the stored articles"""
+    return dict(db.query(Article.title, Article.id))
+
+
+def test_batch_keeps_request_order_and_lists_missing_ids(db, client):
+    store_articles(db, [article_row(n) for n in range(3)])
+    ids = article_ids(db)
+    unknown = max(ids.values()) + 100
+
+    data = client.get(f"/api/articles/batch?ids={ids['Article 2']},{unknown}&ids={ids['Article 0']}").get_json()
+
+    assert [article["title"] for article in data["articles"]] == ["Article 2", "Article 0"]
+    assert data["missing"] == [unknown]
+
+
+def test_batch_fields_and_single_article(db, client):
+    store_articles(db, [article_row(0)])
+    article_id = article_ids(db)["Article 0"]
+
+    data = client.get(f"/api/articles/batch?ids={article_id}&fields=title").get_json()
+    assert data["articles"] == [{"title": "Article 0"}] and data["fields"] == ["title"]
+
+    assert client.get(f"/api/articles/{article_id}").get_json()["content"] == "Content of article 0"
+    assert client.get(f"/api/articles/{article_id + 100}").status_code == 404
+
+
+def test_batch_rejects_bad_and_too_many_ids(db, client, monkeypatch):
+    monkeypatch.setattr(routes, "ARTICLE_BATCH_MAX", 3)
+
+    assert client.get("/api/articles/batch").status_code == 400
+    assert client.get("/api/articles/batch?ids=1,x").status_code == 400
+    assert client.get("/api/articles/batch?ids=1,2,3,4").status_code == 400
+    # Repeated ids count once
+    assert client.get("/api/articles/batch?ids=1,2,3,3,2").status_code == 200
+
+
+def test_missing_article_is_found_after_the_next_ingest(db, client):
+    store_articles(db, [article_row(0)])
+    next_id = article_ids(db)["Article 0"] + 1
+
+    assert client.get(f"/api/articles/batch?ids={next_id}").get_json()["missing"] == [next_id]
+
+    store_articles(db, [article_row(1)])
+    assert article_ids(db)["Article 1"] == next_id
+    data = client.get(f"/api/articles/batch?ids={next_id}").get_json()
+    assert [article["title"] for article in data["articles"]] == ["Article 1"] and data["missing"] == []
+
+
+def test_article_cache_loads_only_misses_once(db):
+    article_cache = ArticleCache(max_entries=2)
+    loads = []
+
+    def load(missing):
+        loads.append(missing)
+        return {article_id: {"id": article_id} for article_id in missing if article_id != 3}
+
+    assert article_cache.get_many(db, [1, 3], load) == {1: {"id": 1}, 3: None}
+    assert article_cache.get_many(db, [3, 1], load) == {1: {"id": 1}, 3: None}
+    assert loads == [[1, 3]]
+
+    # Least recently used id is dropped once the cache is full
+    article_cache.get_many(db, [2], load)
+    article_cache.get_many(db, [1, 3], load)
+    assert loads == [[1, 3], [2], [3]]
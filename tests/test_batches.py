@@ -0,0 +1,61 @@
+import fetch
+from app.models import Article, FeedState
+
+
+def test_micro_batches_close_on_size_and_keep_feeds_whole():
+    feed_articles = [("a", [1, 2]), ("b", [3]), ("c", [4, 5, 6]), ("d", [])]
+
+    batches = list(fetch.micro_batches(iter(feed_articles), max_articles=3, max_seconds=60))
+
+    assert batches == [(["a", "b"], [1, 2, 3]), (["c"], [4, 5, 6]), (["d"], [])]
+
+
+def test_micro_batches_close_on_time():
+    batches = list(fetch.micro_batches(iter([("a", [1]), ("b", [2])]), max_articles=100, max_seconds=0))
+
+    assert batches == [(["a"], [1]), (["b"], [2])]
+
+
+def test_checkpoint_round_trip():
+    saved = []
+    checkpoint = fetch.RunCheckpoint(save=saved.append)
+    checkpoint.plan(["a", "b", "c"])
+    checkpoint.commit(["a"], 4)
+
+    resumed = fetch.RunCheckpoint(saved[-1])
+
+    assert resumed.resumed and resumed.remaining() == ["b", "c"] and resumed.links == 4
+    assert len(saved) == 2 and saved[-1] == {"feeds": ["a", "b", "c"], "finished": ["a"], "links": 4}
+    assert not fetch.RunCheckpoint().resumed
+
+
+def test_failed_batch_leaves_its_feeds_due(db, publisher, monkeypatch):
+    _, feed_urls = publisher
+    monkeypatch.setattr(fetch, "get_rss_feeds", lambda: [(url,) for url in feed_urls])
+    micro_batches = fetch.micro_batches
+    monkeypatch.setattr(fetch, "micro_batches", lambda feed_articles: micro_batches(feed_articles, max_articles=1))
+    save_articles_to_db = fetch.save_articles_to_db
+    calls = []
+
+    def fail_first(articles, feed_states=None, stats=None):
+        calls.append(list(feed_states))
+        return None if len(calls) == 1 else save_articles_to_db(articles, feed_states, stats)
+
+    monkeypatch.setattr(fetch, "save_articles_to_db", fail_first)
+    checkpoint = fetch.RunCheckpoint()
+
+    report = fetch.main1(checkpoint=checkpoint)
+
+    assert report["counters"]["batches_failed"] == 1 and report["counters"]["batches_committed"] == 1
+    assert checkpoint.remaining() == calls[0]
+    assert db.query(Article).count() == 5
+    # The failed feed's polling state was not saved, so the next tick polls it again
+    assert [url for (url,) in db.query(FeedState.feed_url)] == calls[1]
+
+
+def test_run_without_feeds_still_returns_a_report(db, monkeypatch):
+    monkeypatch.setattr(fetch, "get_rss_feeds", lambda: [])
+
+    report = fetch.main1()
+
+    assert report["counters"] == {} and "wall_seconds" in report
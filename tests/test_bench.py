@@ -0,0 +1,51 @@
+import urllib.request
+
+from bench.compare import compare
+from bench.run import latency_summary, percentile
+from bench.server import SyntheticPublisher
+
+
+def test_synthetic_content_is_deterministic_per_seed():
+    first, second = SyntheticPublisher(seed=1), SyntheticPublisher(seed=1)
+
+    assert first.feed_xml("http://a.test", 3) == second.feed_xml("http://a.test", 3)
+    assert first.article_html("http://a.test", 3, 4) == second.article_html("http://a.test", 3, 4)
+    assert SyntheticPublisher(seed=2).feed_xml("http://a.test", 3) != first.feed_xml("http://a.test", 3)
+
+
+def test_feeds_honour_if_none_match(publisher):
+    _, (url, _) = publisher
+    etag = urllib.request.urlopen(url).headers["ETag"]
+
+    request = urllib.request.Request(url, headers={"If-None-Match": etag})
+    try:
+        status = urllib.request.urlopen(request).status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    assert status == 304
+
+
+def test_latency_summary_uses_nearest_rank_percentiles():
+    samples = [n / 1000 for n in range(1, 101)]
+
+    assert percentile(samples, 50) == 0.05
+    assert latency_summary(samples)["p99_ms"] == 99.0
+
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    def results(wall, rows, p95):
+        return {
+            "refresh": {"warm": {"wall_seconds": wall}},
+            "ingest": {"1000": {"rows_per_second": rows}},
+            "routes": {"small": {"routes": {"/api/articles": {"p50_ms": 1, "p95_ms": p95, "p99_ms": 5}}}},
+        }
+
+    rows = {name: regressed for name, _, _, _, regressed in compare(results(10, 1000, 2), results(11, 700, 2), 0.15)}
+
+    assert rows == {
+        "refresh.warm.wall_seconds": False,
+        "ingest.1000.rows_per_second": True,
+        "routes.small./api/articles.p50_ms": False,
+        "routes.small./api/articles.p95_ms": False,
+        "routes.small./api/articles.p99_ms": False,
+    }
@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import timedelta
+
+import fetch
+from app import changes
+from app.models import Article
+from conftest import NOW, article_row, store_articles
+
+
+def record(n):
+    """A fetched article record, as build_article_record() returns it"""
+    return {
+        "title": f"Article {n}", "link": f"http://publisher.test/article/{n}", "summary": f"Summary {n}",
+        "content": f"Content {n}", "author": None, "published_parsed": None, "updated_parsed": None,
+        "categories": None, "thumbnail_url": None,
+    }
+
+
+def test_articles_since_pages_through_new_articles(db):
+    store_articles(db, [article_row(n) for n in range(5)])
+    first_id = db.query(Article.id).filter(Article.link == "http://publisher.test/article/0").scalar()
+
+    articles, cursor, has_more = changes.articles_since(db, ("id", "title"), since=first_id, limit=3)
+    assert [article["title"] for article in articles] == ["Article 1", "Article 2", "Article 3"]
+    assert has_more and cursor == articles[-1]["id"]
+
+    articles, cursor, has_more = changes.articles_since(db, ("id", "title"), since=cursor, limit=3)
+    assert [article["title"] for article in articles] == ["Article 4"] and not has_more
+    assert changes.articles_since(db, ("id",), since=cursor) == ([], cursor, False)
+
+
+def test_changes_endpoint_starts_from_now(db, client):
+    store_articles(db, [article_row(0)])
+
+    start = client.get("/api/changes").get_json()
+    assert start["articles"] == [] and start["cursor"] == changes.latest_id(db)
+
+    store_articles(db, [article_row(1)])
+    data = client.get(f"/api/changes?since={start['cursor']}&fields=title").get_json()
+    assert [article["title"] for article in data["articles"]] == ["Article 1"]
+    assert data["fields"] == ["id", "title"]
+    assert client.get("/api/changes?since=yesterday").status_code == 400
+
+
+def test_long_poll_returns_when_an_ingest_commits(db):
+    store_articles(db, [article_row(0)])
+    since = changes.latest_id(db)
+    threading.Timer(0.3, fetch.save_articles_to_db, args=([record(1)],)).start()
+    started = time.monotonic()
+
+    articles, cursor, _ = changes.poll_changes(("id", "link"), since, wait=10)
+
+    assert [article["link"] for article in articles] == ["http://publisher.test/article/1"]
+    assert time.monotonic() - started < 5
+
+
+def test_stream_sends_articles_as_sse_events(db, client):
+    store_articles(db, [article_row(0), article_row(1)])
+    first_id = db.query(Article.id).filter(Article.link == "http://publisher.test/article/0").scalar()
+
+    response = client.get("/api/changes?fields=title", headers={"Accept": "text/event-stream",
+                                                                "Last-Event-ID": str(first_id)})
+    stream = iter(response.response)
+    messages = [next(stream).decode(), next(stream).decode()]
+    response.close()
+
+    assert response.mimetype == "text/event-stream"
+    assert messages[0].startswith("retry: ")
+    assert messages[1] == f'id: {first_id + 1}\nevent: article\ndata: {{"id":{first_id + 1},"title":"Article 1"}}\n\n'
+
+
+def test_failed_notification_does_not_fail_a_committed_batch(db, monkeypatch):
+    def unavailable(session):
+        raise RuntimeError("NOTIFY failed")
+
+    monkeypatch.setattr(changes, "publish", unavailable)
+
+    assert fetch.save_articles_to_db([record(0), record(1)]) == 2
+    assert db.query(Article).count() == 2
+
+
+def test_stream_from_a_time_cursor_waits_between_keep_alives(db, monkeypatch):
+    store_articles(db, [article_row(0)])
+    monkeypatch.setattr(changes, "KEEPALIVE_SECONDS", 0.2)
+    articles_since = changes.articles_since
+    polls = []
+
+    def counting_articles_since(*args, **kwargs):
+        polls.append(1)
+        return articles_since(*args, **kwargs)
+
+    monkeypatch.setattr(changes, "articles_since", counting_articles_since)
+
+    messages = list(changes.stream_changes(("id",), None, since_time=NOW + timedelta(days=1), seconds=1))
+
+    assert set(messages[1:]) == {": keep-alive\n\n"}
+    # About one query per keep-alive interval, not a busy loop
+    assert len(polls) <= 10
@@ -0,0 +1,39 @@
+import fetch
+from app import cache
+from conftest import article_row, store_articles
+
+
+def test_count_is_cached_until_the_ingest_version_changes(db):
+    calls = []
+    count = lambda: calls.append(1) or len(calls)
+
+    assert cache.count_cache.get(db, ('author', 'x'), count) == 1
+    assert cache.count_cache.get(db, ('author', 'x'), count) == 1
+
+    store_articles(db, [article_row(0)])
+    assert cache.count_cache.get(db, ('author', 'x'), count) == 2
+
+
+def test_version_bump_from_another_process_is_seen_after_the_ttl(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_VERSION_TTL", 0)
+    store_articles(db, [article_row(0)])
+    version = cache.current_version(db)
+
+    # Another process ingests: no invalidate() in this one
+    fetch.bump_ingest_state(db)
+    db.commit()
+    assert cache.current_version(db) == version + 1
+
+
+def test_listing_total_uses_the_ingest_counter(db, client):
+    store_articles(db, [article_row(n) for n in range(3)])
+    assert client.get('/api/articles').get_json()['pagination']['total'] == 3
+
+    store_articles(db, [article_row(n) for n in range(3, 5)])
+    assert client.get('/api/articles').get_json()['pagination']['total'] == 5
+
+
+def test_include_total_false_skips_counting(db, client):
+    store_articles(db, [article_row(n) for n in range(3)])
+    pagination = client.get('/api/articles?include_total=false').get_json()['pagination']
+    assert pagination['total'] is None and pagination['has_next'] is False
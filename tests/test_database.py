@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+import database
+from database import ConnectionPool, PoolTimeout, engine_pool_stats
+
+DSN = os.getenv("TEST_DATABASE_URL")
+postgres_only = pytest.mark.skipif(not (DSN or "").startswith("postgres"),
+                                   reason="needs TEST_DATABASE_URL on PostgreSQL")
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, args=None):
+        if not self.conn.alive:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for ConnectionPool; ``alive = False`` plays a dropped backend"""
+
+    def __init__(self, dsn):
+        self.closed = 0
+        self.alive = True
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(database.psycopg2, "connect", FakeConnection)
+    pool = ConnectionPool("postgresql://fake", size=1, max_overflow=1, timeout=0.2, recycle=1800, pre_ping=True)
+    yield pool
+    pool.closeall()
+
+
+@pytest.fixture
+def pg_pool():
+    pool = ConnectionPool(DSN, size=1, max_overflow=1, timeout=0.2, recycle=1800, pre_ping=True)
+    yield pool
+    pool.closeall()
+
+
+def test_idle_connection_is_reused(pool):
+    first = pool.getconn()
+    pool.putconn(first)
+    second = pool.getconn()
+    pool.putconn(second)
+
+    assert second is first
+    stats = pool.stats()
+    assert (stats["connects"], stats["checkouts"], stats["checkins"], stats["idle"]) == (1, 2, 2, 1)
+
+
+def test_overflow_then_timeout_when_exhausted(pool):
+    held = [pool.getconn(), pool.getconn()]
+    assert pool.stats()["overflow"] == 1
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert time.monotonic() - started >= 0.2
+
+    for conn in held:
+        pool.putconn(conn)
+    stats = pool.stats()
+    assert (stats["waits"], stats["timeouts"], stats["overflow_peak"]) == (1, 1, 1)
+    # Only ``size`` connections stay open once the burst is over
+    assert (stats["open"], stats["idle"]) == (1, 1)
+    assert held[1].closed
+
+
+def test_waiter_gets_the_connection_returned_to_the_pool(pool):
+    pool.timeout = 5
+    held = [pool.getconn(), pool.getconn()]
+    threading.Timer(0.1, pool.putconn, args=(held[0],)).start()
+
+    conn = pool.getconn()
+
+    assert conn is held[0]
+    pool.putconn(conn)
+    pool.putconn(held[1])
+    stats = pool.stats()
+    assert stats["waits"] == 1 and stats["timeouts"] == 0
+    assert 0.05 <= stats["wait_seconds"] < 5
+
+
+def test_dead_connection_is_replaced_on_checkout(pool):
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.alive = False
+
+    replacement = pool.getconn()
+
+    assert replacement is not conn and conn.closed
+    assert pool.stats()["invalidated"] == 1 and pool.stats()["connects"] == 2
+    # The pre-ping's own transaction is not left open on the checked-out connection
+    assert replacement.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+
+def test_old_connection_is_recycled(pool):
+    pool.recycle = 0.05
+    first = pool.getconn()
+    pool.putconn(first)
+    time.sleep(0.1)
+
+    second = pool.getconn()
+    pool.putconn(second)
+
+    assert second is not first
+    assert first.closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_connection_is_rolled_back_before_it_is_reused(pool):
+    with pytest.raises(ZeroDivisionError):
+        with pool.connection() as conn:
+            conn.cursor().execute("INSERT INTO articles DEFAULT VALUES")
+            1 / 0
+    assert conn.rollbacks == 1
+
+    # Returned mid-transaction without the context manager
+    conn = pool.getconn()
+    conn.cursor().execute("SELECT 1")
+    pool.putconn(conn)
+    assert conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.getconn() is conn
+
+
+@postgres_only
+def test_terminated_backend_is_replaced_on_checkout(pg_pool):
+    conn = pg_pool.getconn()
+    backend = conn.get_backend_pid()
+    pg_pool.putconn(conn)
+    admin = psycopg2.connect(DSN)
+    with admin, admin.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(%s)", (backend,))
+    admin.close()
+
+    with pg_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_backend_pid()")
+            assert cur.fetchone()[0] != backend
+
+    assert pg_pool.stats()["invalidated"] == 1
+
+
+@postgres_only
+def test_connection_block_rolls_back_on_error(pg_pool):
+    with pytest.raises(ZeroDivisionError):
+        with pg_pool.connection() as conn:
+            conn.cursor().execute("CREATE TEMP TABLE pool_probe (id int)")
+            1 / 0
+
+    with pg_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('pg_temp.pool_probe')")
+            assert cur.fetchone()[0] is None
+
+
+def test_engine_pool_stats_count_checkouts(engine):
+    before = engine_pool_stats(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+    after = engine_pool_stats(engine)
+    assert after["checkouts"] - before.get("checkouts", 0) == 1
+    assert after["checkins"] - before.get("checkins", 0) == 1
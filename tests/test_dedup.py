@@ -0,0 +1,99 @@
+import random
+
+from app.dedup import (
+    DEDUP_THRESHOLD, canonical_url, choose_canonical, delete_fingerprints, minhash, signature, similarity,
+)
+from app.models import Article, FingerprintBand
+from bench.server import WORDS
+from conftest import article_row, store_articles
+
+
+def story(seed, words=80):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(50)) for _ in range(words))
+
+
+def rewrite(text, changes=2):
+    """The same story with a couple of words edited, as another outlet might run it"""
+    words = text.split()
+    for n in range(changes):
+        words[len(words) // (n + 2)] = f"edited{n}"
+    return " ".join(words)
+
+
+def story_row(n, text, **values):
+    """An article row carrying ``text`` and its fingerprint, as fetch.article_row() builds it"""
+    return article_row(n, content=text, fingerprint=minhash(text), **values)
+
+
+def leaders(session):
+    return dict(session.query(Article.link, Article.duplicate_of))
+
+
+def test_canonical_url_drops_tracking_and_normalizes_host():
+    assert canonical_url("HTTPS://News.Example.com:443/a?utm_source=rss&id=7&fbclid=x#top") == \
+        "https://news.example.com/a?id=7"
+    assert choose_canonical("http://a.test/story?utm_medium=rss", "https://a.test/") == "http://a.test/story"
+    assert choose_canonical("http://a.test/story", "https://b.test/original") == "https://b.test/original"
+
+
+def test_minhash_estimates_similarity():
+    text = story(1)
+
+    assert minhash("too short to fingerprint") is None
+    assert similarity(signature(minhash(text)), signature(minhash(rewrite(text)))) >= DEDUP_THRESHOLD
+    assert similarity(signature(minhash(text)), signature(minhash(story(2)))) < 0.3
+
+
+def test_near_duplicates_join_the_oldest_story(db, client):
+    text = story(1)
+    store_articles(db, [
+        story_row(0, text),
+        story_row(1, rewrite(text)),
+        story_row(2, story(2)),
+    ])
+    store_articles(db, [story_row(3, rewrite(text, changes=3))])
+    ids = dict(db.query(Article.link, Article.id))
+    first, second, other, late = (ids[f"http://publisher.test/article/{n}"] for n in range(4))
+
+    assert leaders(db) == {
+        "http://publisher.test/article/0": None,
+        "http://publisher.test/article/1": first,
+        "http://publisher.test/article/2": None,
+        "http://publisher.test/article/3": first,
+    }
+    # Only cluster leaders are in the band index
+    assert {article_id for (article_id,) in db.query(FingerprintBand.article_id).distinct()} == {first, other}
+
+    collapsed = client.get("/api/articles?collapse=1&fields=id").get_json()["articles"]
+    assert {article["id"]: article["duplicate_count"] for article in collapsed} == {first: 2, other: 0}
+    story_ids = {article["id"] for article in client.get(f"/api/articles?story={first}&fields=id").get_json()["articles"]}
+    assert story_ids == {first, second, late}
+
+
+def test_shared_canonical_link_makes_a_duplicate(db):
+    store_articles(db, [
+        article_row(0, canonical_link="http://publisher.test/original"),
+        article_row(1, link="http://mirror.test/copy", canonical_link="http://publisher.test/original"),
+    ])
+
+    assert leaders(db)["http://mirror.test/copy"] == db.query(Article.id).filter(
+        Article.link == "http://publisher.test/article/0").scalar()
+
+
+def test_deleted_leader_hands_its_story_to_the_oldest_duplicate(db):
+    text = story(1)
+    store_articles(db, [story_row(n, rewrite(text, changes=n)) for n in range(3)])
+    ids = [article_id for (article_id,) in db.query(Article.id).order_by(Article.id)]
+
+    expired = db.query(Article).filter(Article.id == ids[0])
+    delete_fingerprints(db, expired.with_entities(Article.id))
+    expired.delete(synchronize_session=False)
+    db.commit()
+
+    assert dict(db.query(Article.id, Article.duplicate_of)) == {ids[1]: None, ids[2]: ids[1]}
+    assert {article_id for (article_id,) in db.query(FingerprintBand.article_id).distinct()} == {ids[1]}
+
+    # The new leader is found through the band index by articles stored later
+    store_articles(db, [story_row(5, rewrite(text, changes=4))])
+    assert leaders(db)["http://publisher.test/article/5"] == ids[1]
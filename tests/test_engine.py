@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import fetch
+from bench import server
+
+
+def test_engine_caps_each_host_and_lets_other_hosts_through():
+    lock = threading.Lock()
+    active, peak, finished = Counter(), Counter(), []
+
+    def job(host, n):
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+        time.sleep(0.2)
+        with lock:
+            active[host] -= 1
+            finished.append(host)
+        return n
+
+    with fetch.FetchEngine(max_workers=8, per_host_limit=2) as engine:
+        slow = [engine.submit(f"http://slow.test/{n}", job, "slow", n) for n in range(6)]
+        other = engine.submit("http://other.test/", job, "other", 0)
+
+        # The other host isn't queued behind the slow host's backlog
+        assert other.result() == 0
+        assert finished.count("slow") <= 2
+
+    assert [future.result() for future in slow] == list(range(6))
+    assert peak == {"slow": 2, "other": 1}
+
+
+def test_leaving_the_engine_waits_for_queued_work():
+    with fetch.FetchEngine(max_workers=4, per_host_limit=1) as engine:
+        futures = [engine.submit("http://slow.test/", time.sleep, 0.05) for _ in range(4)]
+
+    assert all(future.done() and not future.cancelled() for future in futures)
+
+
+def test_abandoned_engine_cancels_work_that_has_not_started():
+    with pytest.raises(RuntimeError):
+        with fetch.FetchEngine(max_workers=1, per_host_limit=1) as engine:
+            futures = [engine.submit(f"http://host{n % 2}.test/", time.sleep, 0.2) for n in range(6)]
+            raise RuntimeError("consumer stopped")
+
+    # Nothing is left pending: queued per-host work and runs still in the pool's queue are cancelled
+    assert all(future.done() for future in futures)
+    assert sum(future.cancelled() for future in futures) == 5
+
+
+def test_feed_pages_respect_the_host_limit_and_keep_entry_order(publisher, monkeypatch):
+    synthetic, feed_urls = publisher
+    synthetic.latency = 0.05
+    lock = threading.Lock()
+    requests = {"active": 0, "peak": 0}
+    do_GET = server.Handler.do_GET
+
+    def counting_do_GET(self):
+        with lock:
+            requests["active"] += 1
+            requests["peak"] = max(requests["peak"], requests["active"])
+        try:
+            do_GET(self)
+        finally:
+            with lock:
+                requests["active"] -= 1
+
+    monkeypatch.setattr(server.Handler, "do_GET", counting_do_GET)
+
+    with fetch.FetchEngine(max_workers=8, per_host_limit=2) as engine:
+        articles = fetch.fetch_articles_from_feed(feed_urls[1], engine=engine)
+
+    base_url = feed_urls[1].rsplit("/feed/", 1)[0]
+    assert [article["link"] for article in articles] == [f"{base_url}/article/1/{item}" for item in range(5)]
+    assert requests["peak"] == 2
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.export import EXPORT_COLUMNS, export_chunks, parse_columns, parse_since, stream_articles
+from app.dedup import minhash
+from app.models import Article
+from conftest import NOW, article_row, store_articles
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_ndjson_export_streams_every_article_in_id_order(db, client):
+    store_articles(db, [article_row(n) for n in range(7)])
+
+    response = client.get("/api/export?batch_size=3")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == "attachment; filename=articles.ndjson"
+    rows = ndjson(response)
+    assert [row["link"] for row in rows] == [f"http://publisher.test/article/{n}" for n in range(7)]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert rows[0]["published"] == NOW.isoformat()
+
+
+def test_csv_export_with_selected_columns(db, client):
+    store_articles(db, [article_row(n, title=f'Title, "quoted" {n}') for n in range(3)])
+
+    response = client.get("/api/export?format=csv&columns=title,link,title")
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ["title", "link"]
+    assert rows[1:] == [[f'Title, "quoted" {n}', f"http://publisher.test/article/{n}"] for n in range(3)]
+
+
+def test_since_limits_export_to_newer_articles(db, client):
+    store_articles(db, [article_row(0, created_at=NOW.replace(year=NOW.year - 1)), article_row(1)])
+    since = NOW.replace(year=NOW.year - 1).isoformat() + "Z"
+
+    rows = ndjson(client.get(f"/api/export?columns=link&since={since}"))
+
+    assert rows == [{"link": "http://publisher.test/article/1"}]
+
+
+def test_invalid_arguments_return_400(db, client):
+    assert client.get("/api/export?format=xml").status_code == 400
+    assert client.get("/api/export?columns=title,password").status_code == 400
+    assert client.get("/api/export?since=yesterday").status_code == 400
+
+
+def test_stream_articles_yields_batches(db):
+    store_articles(db, [article_row(n) for n in range(5)])
+
+    batches = list(stream_articles(db, ["link"], batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    chunks = list(export_chunks(iter(batches), ["link"], "csv"))
+    assert chunks[0] == "link\r\n" and len(chunks) == 4
+
+
+def test_parse_helpers():
+    assert parse_columns("link, title ,link") == ["link", "title"]
+    assert parse_since("2024-05-01T12:00:00+02:00").isoformat() == "2024-05-01T10:00:00"
+
+
+def test_export_leaves_out_internal_columns(db, client):
+    # Long enough to get a binary MinHash fingerprint and to join the first article's story
+    text = " ".join(f"word{n} climate{n % 7}" for n in range(60))
+    store_articles(db, [article_row(n, content=text, fingerprint=minhash(text)) for n in range(2)])
+    assert db.query(Article).filter(Article.fingerprint.isnot(None)).count() == 2
+
+    rows = ndjson(client.get("/api/export"))
+    assert len(rows) == 2
+    assert set(rows[0]) == set(EXPORT_COLUMNS)
+    assert not {"fingerprint", "duplicate_of", "thumbnail_hash"} & set(rows[0])
+
+    header = client.get("/api/export?format=csv").get_data(as_text=True).splitlines()[0]
+    assert header.split(",") == list(EXPORT_COLUMNS)
+    assert client.get("/api/export?columns=fingerprint").status_code == 400
+
+
+def test_failing_row_aborts_the_export(db, client, monkeypatch):
+    from app import export
+    store_articles(db, [article_row(n) for n in range(3)])
+    value = export._value
+
+    def failing_value(column_value):
+        if column_value == "Article 1":
+            raise ValueError("row can't be encoded")
+        return value(column_value)
+
+    monkeypatch.setattr(export, "_value", failing_value)
+    chunks = iter(client.get("/api/export?batch_size=1").response)
+
+    assert json.loads(next(chunks))["title"] == "Article 0"
+    # The transfer is cut off instead of ending as if the file were complete
+    with pytest.raises(ValueError):
+        next(chunks)
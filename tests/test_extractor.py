@@ -0,0 +1,120 @@
+import signal
+import threading
+import time
+
+import pytest
+
+import article_extractor
+from article_extractor import ExtractionPool, ExtractionTimeout, parse_article
+from fetch import RunStats
+
+PAGE = """<html><head><title>Storm hits the coast</title></head><body><article>
+<h1>Storm hits the coast</h1>
+<p>A powerful storm reached the coast on Monday, bringing heavy rain and strong winds to several towns.</p>
+<p>Officials said the storm would move inland overnight and weaken by the end of the week.</p>
+</article></body></html>"""
+
+
+def slow_parse(url, html, nlp=True, timeout=None):
+    """Stand-in for parse_article taking ``html`` seconds; "stuck" ignores SIGALRM like code in C would"""
+    if html == "stuck":
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(60)
+    time.sleep(float(html))
+    return {"title": url}, {"article_parse": float(html)}
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """A factory for pools whose forked workers run slow_parse, with no grace period"""
+    monkeypatch.setattr(article_extractor, "EXTRACT_START_METHOD", "fork")
+    monkeypatch.setattr(article_extractor, "EXTRACT_GRACE", 0)
+    monkeypatch.setattr(article_extractor, "parse_article", slow_parse)
+    pools = []
+
+    def make(workers, timeout):
+        pools.append(ExtractionPool(workers=workers, timeout=timeout))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def wait_all(pool, futures, stats):
+    """Wait on each future from its own thread, as fetch threads do"""
+    results = [None] * len(futures)
+
+    def wait(index):
+        results[index] = pool.result(futures[index], f"url-{index}", stats)
+
+    threads = [threading.Thread(target=wait, args=(index,)) for index in range(len(futures))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_parse_article_extracts_text():
+    data, timings = parse_article("http://publisher.test/storm", PAGE, nlp=False)
+
+    assert data["title"] == "Storm hits the coast"
+    assert "heavy rain" in data["text"]
+    assert data["canonical_link"] == "http://publisher.test/storm"
+    assert set(timings) == {"article_parse"}
+
+
+def test_parse_article_times_out_with_alarm(monkeypatch):
+    class SlowArticle:
+        def __init__(self, url):
+            pass
+
+        def download(self, input_html):
+            pass
+
+        def parse(self):
+            time.sleep(5)
+
+    monkeypatch.setattr(article_extractor, "Article", SlowArticle)
+    started = time.monotonic()
+
+    with pytest.raises(ExtractionTimeout):
+        parse_article("http://publisher.test/slow", PAGE, timeout=0.2)
+    assert time.monotonic() - started < 2
+
+
+def test_inline_pool_parses_in_the_calling_thread():
+    stats = RunStats()
+    pool = ExtractionPool(workers=0)
+
+    data = pool.result(pool.submit("http://publisher.test/storm", PAGE, nlp=False), "storm", stats)
+
+    assert data["title"] == "Storm hits the coast"
+    assert stats.stages["article_parse"]["count"] == 1
+
+
+def test_queued_articles_do_not_use_up_their_deadline(fake_pool):
+    # Each article is well within the timeout, but the last ones wait in the queue for longer than it
+    pool, stats = fake_pool(workers=1, timeout=1), RunStats()
+    futures = [pool.submit(f"url-{n}", "0.8") for n in range(4)]
+
+    results = wait_all(pool, futures, stats)
+
+    assert results == [{"title": f"url-{n}"} for n in range(4)]
+    assert stats.counters["extract_timeouts"] == 0
+    assert stats.stages["article_parse"]["count"] == 4
+
+
+def test_stuck_worker_is_killed_and_the_pool_rebuilt(fake_pool):
+    pool, stats = fake_pool(workers=1, timeout=0.5), RunStats()
+    stuck = pool.submit("stuck", "stuck")
+    started = time.monotonic()
+
+    assert pool.result(stuck, "stuck", stats) is None
+    assert time.monotonic() - started < 5
+    assert stats.counters["extract_timeouts"] == 1
+
+    assert pool.result(pool.submit("after", "0"), "after", stats) == {"title": "after"}
+    assert pool._executor is not stuck.executor
+    assert pool._starts == {}
@@ -0,0 +1,89 @@
+import feedparser
+
+import fetch
+from conftest import article_row, store_articles
+
+
+def test_feed_state_makes_the_next_poll_conditional(db, publisher):
+    _, (url, _) = publisher
+    stats = fetch.RunStats()
+    state = fetch.new_feed_state(url)
+
+    assert len(fetch.parse_feed(url, stats, state)) == 5
+    assert state["etag"] and state["last_status"] == "ok"
+
+    assert fetch.parse_feed(url, stats, state) == []
+    assert state["last_http_status"] == 304
+    assert stats.counters["feeds_not_modified"] == 1
+
+
+def test_entries_seen_in_the_previous_body_are_dropped(db, publisher):
+    _, (url, _) = publisher
+    stats = fetch.RunStats()
+    state = fetch.new_feed_state(url)
+    fetch.parse_feed(url, stats, state)
+
+    state["etag"] = None
+    assert fetch.parse_feed(url, stats, state) == []
+    assert stats.counters["entries_unchanged"] == 5
+
+
+def test_feed_is_parsed_with_its_content_type(db, publisher, monkeypatch):
+    _, (url, _) = publisher
+    parsed = []
+    parse_feed_body = fetch.parse_feed_body
+    monkeypatch.setattr(fetch, "parse_feed_body", lambda *args, **kwargs: parsed.append(
+        parse_feed_body(*args, **kwargs)) or parsed[-1])
+
+    fetch.parse_feed(url, fetch.RunStats(), fetch.new_feed_state(url))
+    assert not parsed[0].bozo
+
+
+def test_feed_state_round_trips_through_the_database(db, publisher):
+    _, (url, _) = publisher
+    state = fetch.new_feed_state(url)
+    fetch.parse_feed(url, fetch.RunStats(), state)
+
+    assert fetch.save_feed_states({url: state}) == 1
+    loaded = fetch.load_feed_states([url])[url]
+    assert (loaded["etag"], loaded["seen_guids"]) == (state["etag"], state["seen_guids"])
+
+
+def test_stored_links_and_their_canonical_variants_are_not_extracted_again(db, publisher):
+    _, (_, url) = publisher
+    base_url = url.rsplit("/feed/", 1)[0]
+    store_articles(db, [
+        article_row(0, link=f"{base_url}/article/1/0"),
+        # Stored under a tracking URL; the feed lists the clean one
+        article_row(1, link=f"{base_url}/article/1/1?utm_source=rss", canonical_link=f"{base_url}/article/1/1"),
+    ])
+    stats = fetch.RunStats()
+
+    articles = fetch.fetch_articles_from_feed(url, stats=stats, known_links=fetch.KnownLinkIndex.load())
+
+    assert [article["link"] for article in articles] == [f"{base_url}/article/1/{item}" for item in (2, 3, 4)]
+    assert stats.counters["links_skipped"] == 2
+    assert stats.counters["articles_extracted"] == 3
+
+
+def test_tracking_variants_of_known_links_are_skipped():
+    feed = feedparser.parse(
+        "<rss version='2.0'><channel><title>Feed</title>"
+        "<item><title>Known</title><link>http://Publisher.test/a?utm_source=rss#top</link></item>"
+        "<item><title>New</title><link>http://publisher.test/b?utm_medium=feed</link></item>"
+        "<item><title>Again</title><link>http://publisher.test/b</link></item>"
+        "</channel></rss>"
+    )
+    submitted = []
+
+    class Engine:
+        def submit(self, url, fn, *args):
+            submitted.append(url)
+
+    stats = fetch.RunStats()
+    known_links = fetch.KnownLinkIndex(["http://publisher.test/a"])
+
+    fetch.schedule_extractions("http://publisher.test/rss", feed.entries, Engine(), None, stats, known_links)
+
+    assert submitted == ["http://publisher.test/b?utm_medium=feed"]
+    assert stats.counters["links_skipped"] == 2
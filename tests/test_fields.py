@@ -0,0 +1,51 @@
+from app.models import ARTICLE_FIELDS, ARTICLE_LIST_FIELDS, Article, article_columns, article_serializer
+from conftest import article_row, store_articles
+
+
+def test_default_projection_leaves_out_content(db, client):
+    store_articles(db, [article_row(0)])
+
+    article = client.get("/api/articles").get_json()["articles"][0]
+
+    assert set(article) == set(ARTICLE_LIST_FIELDS)
+    assert "content" not in article
+
+
+def test_fields_selects_only_the_requested_fields(db, client):
+    store_articles(db, [article_row(n) for n in range(3)])
+
+    data = client.get("/api/articles?fields=title,id").get_json()
+
+    assert [set(article) for article in data["articles"]] == [{"id", "title"}] * 3
+    assert [article["title"] for article in data["articles"]] == ["Article 0", "Article 1", "Article 2"]
+
+
+def test_cursor_still_works_without_sort_keys_in_fields(db, client, monkeypatch):
+    from app.config import Config
+    monkeypatch.setattr(Config, "ARTICLES_PER_PAGE", 2)
+    store_articles(db, [article_row(n) for n in range(3)])
+
+    first = client.get("/api/articles?fields=title").get_json()
+    second = client.get(f"/api/articles?fields=title&cursor={first['pagination']['next_cursor']}").get_json()
+
+    assert [article["title"] for article in first["articles"] + second["articles"]] == \
+        ["Article 0", "Article 1", "Article 2"]
+
+
+def test_all_fields_and_unknown_fields(db, client):
+    store_articles(db, [article_row(0)])
+
+    assert set(client.get("/api/articles?fields=all").get_json()["articles"][0]) == set(ARTICLE_FIELDS)
+    response = client.get("/api/articles?fields=title,password")
+    assert response.status_code == 400
+    assert "password" in response.get_json()["error"]
+
+
+def test_serializer_matches_to_dict(db):
+    store_articles(db, [article_row(0, updated=None)])
+    article = db.query(Article).one()
+    row = db.query(*article_columns(ARTICLE_FIELDS)).one()
+
+    serialized = article_serializer(ARTICLE_FIELDS)(row)
+
+    assert serialized == {name: value for name, value in article.to_dict().items() if name in ARTICLE_FIELDS}
@@ -0,0 +1,136 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, retry_after
+
+
+class Handler(BaseHTTPRequestHandler):
+    """/ok, /fail (500), /flaky (503 with Retry-After: 0 once, then 200) and /throttle (429, long Retry-After)"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.ports.add(self.client_address[1])
+            flaky_calls = server.requests.count("/flaky")
+        if self.path == "/ok" or (self.path == "/flaky" and flaky_calls > 1):
+            status, headers = 200, {}
+        elif self.path == "/flaky":
+            status, headers = 503, {"Retry-After": "0"}
+        elif self.path == "/throttle":
+            status, headers = 429, {"Retry-After": "3600"}
+        else:
+            status, headers = 500, {}
+        self.send_response(status)
+        for name, value in dict(headers, **{"Content-Length": "2"}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock, server.requests, server.ports = threading.Lock(), [], set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = "http://127.0.0.1:%d" % server.server_address[1]
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_breaker_opens_after_repeated_failures_then_half_opens(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("http_client.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failures=2, cooldown=30)
+
+    breaker.failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow() and breaker.state == "half_open"
+    # Only the one trial request goes through
+    assert not breaker.allow()
+
+    breaker.failure()
+    assert breaker.state == "open" and breaker.trips == 2
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.snapshot() == {"state": "closed", "failures": 0, "trips": 2, "rejected": 2, "open_seconds": 0}
+
+
+def test_long_retry_after_opens_the_breaker_for_that_long(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("http_client.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failures=5, cooldown=30)
+
+    breaker.failure(wait=600)
+
+    clock[0] = 599
+    assert not breaker.allow()
+    clock[0] = 600
+    assert breaker.allow()
+
+
+def test_connections_are_kept_alive(server):
+    client = HttpClient()
+    for _ in range(3):
+        assert client.get(server.url + "/ok").status_code == 200
+
+    assert len(server.ports) == 1
+
+
+def test_short_retry_after_is_waited_out(server):
+    client, stats = HttpClient(), fetch.RunStats()
+
+    response = client.get(server.url + "/flaky", stats=stats)
+
+    assert response.status_code == 200
+    assert server.requests == ["/flaky", "/flaky"]
+    assert stats.counters["http_retries"] == 1
+    assert client.breaker_report() == {}
+
+
+def test_failing_host_is_cut_off(server):
+    client, stats = HttpClient(), fetch.RunStats()
+    host = server.url.split("//")[1]
+    client.breaker(host).max_failures = 2
+
+    assert client.get(server.url + "/fail", stats=stats).status_code == 500
+    assert client.get(server.url + "/fail", stats=stats).status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url + "/ok", stats=stats)
+
+    assert server.requests == ["/fail", "/fail"]
+    assert stats.counters["http_circuit_rejected"] == 1
+    assert client.breaker_report()[host]["state"] == "open"
+
+
+def test_long_retry_after_is_not_waited_out(server):
+    client = HttpClient(max_retry_after=30)
+
+    assert client.get(server.url + "/throttle").status_code == 429
+    assert server.requests == ["/throttle"]
+    assert client.breaker(server.url.split("//")[1]).state == "open"
+
+
+def test_retry_after_parses_seconds_and_dates():
+    class Response:
+        def __init__(self, value):
+            self.headers = {"Retry-After": value} if value else {}
+
+    assert retry_after(Response("120")) == 120
+    assert retry_after(Response("Wed, 21 Oct 2015 07:28:00 GMT")) == 0
+    assert retry_after(Response("soon")) is None
+    assert retry_after(Response(None)) is None
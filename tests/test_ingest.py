@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import fetch
+from app.models import Article
+from conftest import article_row
+
+
+def stored(session):
+    return {article.link: article for article in session.query(Article).order_by(Article.id)}
+
+
+def test_upsert_inserts_then_only_counts_changed_rows(db):
+    rows = [article_row(n) for n in range(3)]
+    assert fetch.upsert_articles(db, rows) == 3
+    db.commit()
+
+    assert fetch.upsert_articles(db, [article_row(n) for n in range(3)]) == 0
+    changed = [article_row(0), article_row(1, title="New title"), article_row(3)]
+    assert fetch.upsert_articles(db, changed) == 2
+    db.commit()
+
+    articles = stored(db)
+    assert len(articles) == 4
+    assert articles[rows[1]["link"]].title == "New title"
+
+
+def test_upsert_keeps_original_created_at(db):
+    first = datetime(2026, 1, 1)
+    fetch.upsert_articles(db, [article_row(0, created_at=first)])
+    db.commit()
+    fetch.upsert_articles(db, [article_row(0, title="Edited", created_at=datetime(2026, 2, 1))])
+    db.commit()
+
+    article = db.query(Article).one()
+    assert (article.title, article.created_at) == ("Edited", first)
+
+
+def test_merge_rows_matches_on_conflict_upsert(db):
+    table = Article.__table__
+    columns = [name for name in article_row(0) if name != "link"]
+    assert fetch.merge_rows(db, table, [article_row(n) for n in range(3)], "link", columns) == 3
+    db.commit()
+
+    rows = [article_row(0), article_row(1, summary="Changed"), article_row(2)]
+    for row in rows:
+        row["created_at"] = db.query(Article.created_at).filter(Article.link == row["link"]).scalar()
+    assert fetch.merge_rows(db, table, rows + [article_row(3)], "link", columns) == 2
+    db.commit()
+
+    articles = stored(db)
+    assert len(articles) == 4
+    assert articles[rows[1]["link"]].summary == "Changed"
+
+
+def test_retention_removes_only_expired_articles(db, monkeypatch):
+    monkeypatch.setattr(fetch, "ARTICLE_RETENTION_DAYS", 7)
+    old = datetime.utcnow() - timedelta(days=8)
+    fetch.upsert_articles(db, [article_row(0), article_row(1, published=old)])
+    db.commit()
+
+    assert fetch.apply_retention(db) == 1
+    db.commit()
+    assert list(stored(db)) == [article_row(0)["link"]]
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import fetch
+import worker
+from app import jobs
+from app.models import Article, FetchJob
+
+
+def expire_lease(session, job_id):
+    session.query(FetchJob).filter(FetchJob.id == job_id)\
+        .update({FetchJob.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    session.commit()
+
+
+def test_only_one_active_job_per_kind(db):
+    job, created = jobs.enqueue_job(db)
+    again, created_again = jobs.enqueue_job(db)
+    assert created and not created_again and again.id == job.id
+
+
+def test_claimed_job_is_leased_to_one_worker(db):
+    job, _ = jobs.enqueue_job(db)
+    claimed = jobs.claim_job(db, "worker-a")
+    assert (claimed.id, claimed.status, claimed.worker_id, claimed.attempts) == (job.id, "running", "worker-a", 1)
+    assert jobs.claim_job(db, "worker-b") is None
+    assert jobs.heartbeat(db, job.id, "worker-a", progress={"done": 1, "total": 2})
+
+
+def test_expired_lease_is_reclaimed_with_its_checkpoint(db):
+    job, _ = jobs.enqueue_job(db)
+    jobs.claim_job(db, "worker-a")
+    jobs.heartbeat(db, job.id, "worker-a", checkpoint={"feeds": ["a", "b"], "finished": ["a"], "links": 3})
+    expire_lease(db, job.id)
+
+    reclaimed = jobs.job_to_dict(jobs.claim_job(db, "worker-b"))
+    assert (reclaimed["worker_id"], reclaimed["attempts"]) == ("worker-b", 2)
+    assert fetch.RunCheckpoint(reclaimed["checkpoint"]).remaining() == ["b"]
+    assert not jobs.heartbeat(db, job.id, "worker-a")
+
+
+def test_job_out_of_attempts_fails(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 1)
+    job, _ = jobs.enqueue_job(db)
+    jobs.claim_job(db, "worker-a")
+    expire_lease(db, job.id)
+
+    assert jobs.claim_job(db, "worker-b") is None
+    db.expire_all()
+    assert db.query(FetchJob.status).filter(FetchJob.id == job.id).scalar() == "failed"
+
+
+def test_lost_lease_stops_the_run_and_its_writes(db, monkeypatch):
+    job, _ = jobs.enqueue_job(db)
+    claimed = jobs.job_to_dict(jobs.claim_job(db, worker.WORKER_ID))
+    commits = []
+
+    def run(on_feed_done, stats, checkpoint):
+        # Another worker reclaims the job while this one is still running it
+        expire_lease(db, claimed["id"])
+        jobs.claim_job(db, "worker-b")
+        checkpoint.plan(["a", "b"])
+        assert checkpoint.stopped.is_set()
+        commits.append("a")
+        checkpoint.commit(["a"], 1)
+        raise fetch.RunStopped("stopped")
+
+    monkeypatch.setattr(worker, "main1", run)
+    worker.run_job(claimed)
+
+    db.expire_all()
+    row = db.query(FetchJob).get(job.id)
+    assert (row.status, row.worker_id, row.checkpoint, row.finished_at) == ("running", "worker-b", None, None)
+    assert commits == ["a"]
+
+
+def test_stopped_checkpoint_ends_the_run_before_the_next_batch(db, publisher, monkeypatch):
+    _, feed_urls = publisher
+    monkeypatch.setattr(fetch, "get_rss_feeds", lambda: [(url,) for url in feed_urls])
+    micro_batches = fetch.micro_batches
+    monkeypatch.setattr(fetch, "micro_batches", lambda feed_articles: micro_batches(feed_articles, max_articles=1))
+    checkpoint = fetch.RunCheckpoint(save=lambda data: data["finished"] and checkpoint.stop())
+
+    with pytest.raises(fetch.RunStopped):
+        fetch.main1(checkpoint=checkpoint)
+    assert len(checkpoint.finished) == 1 and len(checkpoint.remaining()) == 1
+    assert db.query(Article).count() == 5
+
+
+def test_resumed_run_polls_only_unfinished_feeds(db, publisher, monkeypatch):
+    _, feed_urls = publisher
+    monkeypatch.setattr(fetch, "get_rss_feeds", lambda: [(url,) for url in feed_urls])
+    checkpoint = fetch.RunCheckpoint({"feeds": feed_urls, "finished": feed_urls[:1], "links": 5})
+
+    report = fetch.main1(checkpoint=checkpoint)
+    assert report["counters"]["feeds_resumed"] == 1
+    assert list(report["feeds"]) == feed_urls[1:]
+    assert checkpoint.remaining() == []
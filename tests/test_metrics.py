@@ -0,0 +1,60 @@
+import fetch
+from app import jobs
+from app.metrics import Histogram, Registry
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {"buckets": [[0.1, 2], [1.0, 3], ["+Inf", 4]], "sum": 3.65, "count": 4}
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    registry.observe("latency_seconds", 0.2, "Latency", endpoint="main.index")
+    registry.incr("requests_total", 2, "Requests", path='say "hi"\n')
+
+    lines = registry.render()
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{endpoint="main.index",le="0.25"} 1' in lines
+    assert 'latency_seconds_count{endpoint="main.index"} 1' in lines
+    assert 'requests_total{path="say \\"hi\\"\\n"} 2' in lines
+
+
+def test_run_stats_report_stage_histograms_and_counters():
+    stats = fetch.RunStats()
+    with stats.time("feed_download"):
+        pass
+    stats.record("feed_download", 0.3)
+    stats.incr("feed_bytes", 512)
+    stats.feed("http://a.test/feed", http_status=200)
+
+    report = stats.report()
+
+    assert report["stages"]["feed_download"]["count"] == 2
+    assert report["histograms"]["feed_download"]["count"] == 2
+    assert report["counters"] == {"feed_bytes": 512}
+    assert report["feeds"] == {"http://a.test/feed": {"http_status": 200}}
+
+
+def test_metrics_endpoint_serves_requests_and_the_latest_fetch_report(db, client):
+    stats = fetch.RunStats()
+    stats.record("article_parse", 0.02)
+    stats.incr("articles_failed")
+    job, _ = jobs.enqueue_job(db)
+    jobs.claim_job(db, "worker-a")
+    jobs.finish_job(db, job.id, "worker-a", "succeeded", stats.report())
+    client.get("/api/articles")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    # The web registry is shared by every test in the process
+    assert 'news_http_requests_total{endpoint="main.api_articles",status="200"} ' in body
+    assert 'news_fetch_stage_seconds_count{stage="article_parse"} 1' in body
+    assert 'news_fetch_events_total{event="articles_failed"} 1' in body
+    assert 'news_fetch_job_running 0' in body
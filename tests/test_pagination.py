@@ -0,0 +1,102 @@
+import html
+import re
+from datetime import timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor, paginate_list
+from app.models import Article
+from conftest import NOW, article_row, store_articles
+
+
+def walk(client, url, direction='next_cursor', cursor=None):
+    """Article ids of every page reached by following ``direction`` cursors"""
+    pages = []
+    while True:
+        data = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        pages.append([article['id'] for article in data['articles']])
+        cursor = data['pagination'][direction]
+        if not cursor:
+            return pages
+
+
+def test_cursor_walk_visits_every_article_once_in_order(db, client):
+    # Pairs of articles share a publish time, so the id tie-break is exercised
+    store_articles(db, [article_row(n, published=NOW - timedelta(minutes=n // 2)) for n in range(25)])
+    pages = walk(client, '/api/articles?include_total=false&fields=id,published')
+
+    ids = [article_id for page in pages for article_id in page]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sorted(ids) == sorted(set(ids)) and len(ids) == 25
+
+    rows = client.get('/api/articles?page=1&fields=id,published').get_json()['articles']
+    assert [row['id'] for row in rows] == pages[0]
+
+
+def test_prev_cursor_returns_the_previous_page(db, client):
+    store_articles(db, [article_row(n) for n in range(25)])
+    first = client.get('/api/articles?fields=id').get_json()
+    second = client.get(f"/api/articles?fields=id&cursor={first['pagination']['next_cursor']}").get_json()
+    back = client.get(f"/api/articles?fields=id&cursor={second['pagination']['prev_cursor']}").get_json()
+
+    assert [row['id'] for row in back['articles']] == [row['id'] for row in first['articles']]
+    assert back['pagination']['has_prev'] is False
+
+
+def test_invalid_cursor_is_a_bad_request(db, client):
+    assert client.get('/api/articles?cursor=not-a-cursor').status_code == 400
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['2026-01-01T00:00:00', 7], 'prev')) == (['2026-01-01T00:00:00', 7], 'prev')
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([], 'sideways'))
+
+
+def test_paginate_list_follows_the_same_contract():
+    items = list(range(25, 0, -1))
+    first = paginate_list(items, 10, key_of=lambda item: [item])
+    second = paginate_list(items, 10, cursor=first['next_cursor'], key_of=lambda item: [item])
+
+    assert first['items'] == list(range(25, 15, -1))
+    assert second['items'] == list(range(15, 5, -1)) and second['has_next']
+
+
+def page_titles(client, url):
+    """Article titles on every homepage page reached by following Next → links, and the Next URLs"""
+    titles, next_urls = [], []
+    while url:
+        page = client.get(url).get_data(as_text=True)
+        titles += re.findall(r'>\s*(Article \d+)\s*<', page)
+        match = re.search(r'href="([^"]*)"\s*class="pagination-btn">Next', page)
+        url = html.unescape(match.group(1)) if match else None
+        next_urls += [url] if url else []
+    return titles, next_urls
+
+
+def test_homepage_next_links_keep_every_filter(db, client, monkeypatch):
+    from app.config import Config
+    monkeypatch.setattr(Config, "ARTICLES_PER_PAGE", 1)
+    store_articles(db, [article_row(n, categories="World" if n % 2 else "Sport") for n in range(4)]
+                   + [article_row(4, categories="Tech")])
+
+    titles, next_urls = page_titles(client, "/?category=world&category=sport&match=any&collapse=1")
+
+    assert sorted(titles) == ["Article 0", "Article 1", "Article 2", "Article 3"]
+    args = parse_qs(urlsplit(next_urls[0]).query)
+    assert args["category"] == ["world", "sport"] and args["match"] == ["any"] and args["collapse"] == ["1"]
+    assert args["cursor"] and "page" not in args
+
+
+def test_homepage_next_links_stay_in_the_story(db, client, monkeypatch):
+    from app.config import Config
+    monkeypatch.setattr(Config, "ARTICLES_PER_PAGE", 1)
+    store_articles(db, [article_row(n, canonical_link="http://publisher.test/original") for n in range(2)]
+                   + [article_row(2)])
+    story = db.query(Article.id).filter(Article.title == "Article 0").scalar()
+
+    titles, next_urls = page_titles(client, f"/?story={story}")
+
+    assert sorted(titles) == ["Article 0", "Article 1"]
+    assert parse_qs(urlsplit(next_urls[0]).query)["story"] == [str(story)]
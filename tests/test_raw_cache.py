@@ -0,0 +1,96 @@
+import random
+from email.utils import format_datetime
+
+import pytest
+
+import fetch
+from app.models import Article
+from article_extractor import ExtractionPool
+from conftest import NOW
+from raw_cache import RawCache, content_hash
+
+PAGE = """<html><head><title>{title}</title></head><body><article><h1>{title}</h1>
+<p>A powerful storm reached the coast on Monday, bringing heavy rain and strong winds to several towns.</p>
+<p>Officials said the storm would move inland overnight and weaken by the end of the week.</p>
+</article></body></html>"""
+
+
+def feed_xml(*links):
+    items = "".join(
+        f"<item><title>Item {n}</title><link>{link}</link><guid>{link}</guid>"
+        f"<description>Summary {n}</description><pubDate>{format_datetime(NOW)}</pubDate></item>"
+        for n, link in enumerate(links)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>{items}</channel></rss>'
+
+
+@pytest.fixture
+def raw_cache(tmp_path):
+    return RawCache(str(tmp_path / "raw"), max_bytes=1024 * 1024)
+
+
+def test_bodies_are_stored_once_per_content_hash(raw_cache):
+    digest = raw_cache.put("http://a.test/1", "<html>same</html>", "article")
+    assert raw_cache.put("http://a.test/2", b"<html>same</html>", "article") == digest == \
+        content_hash(b"<html>same</html>")
+
+    assert raw_cache.get("http://a.test/2") == b"<html>same</html>"
+    assert raw_cache.get("http://a.test/1", "feed") is None
+    assert raw_cache.stats()["blobs"] == 1
+    assert raw_cache.stats()["entries"] == {"article": 2}
+
+
+def test_latest_body_for_a_url_wins_and_survives_reopening(raw_cache):
+    raw_cache.put("http://a.test/feed", "<rss>old</rss>", "feed")
+    raw_cache.put("http://a.test/feed", "<rss>new</rss>", "feed")
+
+    reopened = RawCache(raw_cache.directory)
+
+    assert reopened.get("http://a.test/feed") == b"<rss>new</rss>"
+    assert [url for url, _ in reopened.entries("feed")] == ["http://a.test/feed"] * 2
+    assert reopened.stats()["bytes"] == raw_cache.stats()["bytes"]
+
+
+def test_least_recently_used_bodies_are_evicted(tmp_path):
+    raw_cache = RawCache(str(tmp_path / "raw"), max_bytes=3500)
+    # Random bytes, so each compressed body stays about 1000 bytes
+    bodies = {n: random.Random(n).randbytes(1000) for n in range(4)}
+    for n in range(3):
+        raw_cache.put(f"http://a.test/{n}", bodies[n], "article")
+    raw_cache.get("http://a.test/0")
+
+    raw_cache.put("http://a.test/3", bodies[3], "article")
+
+    assert raw_cache.get("http://a.test/1") is None
+    assert raw_cache.get("http://a.test/0") == bodies[0]
+    assert raw_cache.get("http://a.test/3") == bodies[3]
+    assert raw_cache.stats()["bytes"] <= 3500
+
+
+def test_parsed_feed_is_reused_for_an_unchanged_body(raw_cache, monkeypatch):
+    monkeypatch.setattr(fetch, "get_raw_cache", lambda: raw_cache)
+    body = feed_xml("http://a.test/1").encode()
+    stats = fetch.RunStats()
+
+    first = fetch.parse_feed_body("http://a.test/feed", body, stats)
+    second = fetch.parse_feed_body("http://a.test/feed", body, stats)
+
+    assert [entry.link for entry in second.entries] == [entry.link for entry in first.entries] == ["http://a.test/1"]
+    assert stats.counters["feed_parse_cached"] == 1
+    assert raw_cache.get_parsed(content_hash(body), "other-version") is None
+
+
+def test_reextract_rebuilds_articles_from_cached_html(db, raw_cache, monkeypatch):
+    monkeypatch.setattr(fetch, "get_raw_cache", lambda: raw_cache)
+    monkeypatch.setattr(fetch, "ExtractionPool", lambda: ExtractionPool(workers=0))
+    links = ["http://publisher.test/storm", "http://publisher.test/uncached"]
+    raw_cache.put("http://publisher.test/feed", feed_xml(*links), "feed")
+    raw_cache.put(links[0], PAGE.format(title="Storm hits the coast"), "article")
+
+    report = fetch.reextract_from_cache()
+
+    assert report["counters"]["articles_extracted"] == 1
+    assert report["counters"]["cache_misses"] == 1
+    article = db.query(Article).one()
+    assert (article.link, article.title) == (links[0], "Storm hits the coast")
+    assert "heavy rain" in article.content
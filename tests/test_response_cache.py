@@ -0,0 +1,61 @@
+import fetch
+from app import cache
+from conftest import article_row, store_articles
+
+
+def test_responses_are_served_from_cache_until_the_next_ingest(db, client):
+    store_articles(db, [article_row(0)])
+    assert len(client.get('/api/articles').get_json()['articles']) == 1
+
+    # Rows written without an ingest bump stay invisible: the cached response is served
+    fetch.upsert_articles(db, [article_row(1)])
+    db.commit()
+    assert len(client.get('/api/articles').get_json()['articles']) == 1
+
+    store_articles(db, [article_row(2)])
+    assert len(client.get('/api/articles').get_json()['articles']) == 3
+
+
+def test_conditional_request_gets_304(db, client):
+    store_articles(db, [article_row(0)])
+    response = client.get('/api/articles')
+    assert response.headers['ETag'] and response.headers['Cache-Control'] == 'public, max-age=60'
+
+    again = client.get('/api/articles', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+    store_articles(db, [article_row(1)])
+    assert client.get('/api/articles', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+
+def test_error_responses_are_not_cached(db, client):
+    assert client.get('/api/articles?cursor=bad').status_code == 400
+    assert not any('cursor' in key for key in cache.response_cache._entries)
+
+
+def test_cache_key_ignores_argument_order_and_empty_values():
+    from flask import Flask
+    app = Flask(__name__)
+    with app.test_request_context('/api/articles?b=2&a=1&c='):
+        first = cache.response_key(1)
+    with app.test_request_context('/api/articles?a=1&b=2'):
+        assert cache.response_key(1) == first
+
+
+def test_views_handle_database_errors_when_the_ingest_stamp_fails(db, client, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    def unavailable(*args, **kwargs):
+        raise OperationalError("SELECT version FROM ingest_state", {}, Exception("database is down"))
+
+    store_articles(db, [article_row(0)])
+    monkeypatch.setattr(cache, "ingest_stamp", unavailable)
+
+    # The view runs uncached; its own error handling answers, not an unhandled 500
+    response = client.get('/api/articles')
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Error loading articles'}
+
+    response = client.get('/api/articles?include_total=false')
+    assert response.status_code == 200 and len(response.get_json()['articles']) == 1
+    assert not cache.response_cache._entries
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import fetch
+import scheduler
+from app.models import FeedState
+from scheduler import backoff_interval, due_feeds, healthy_interval, observed_rate, update_schedule
+
+NOW = datetime(2025, 1, 1, 12)
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(scheduler, "JITTER", 0)
+
+
+def test_rate_from_dated_entries_is_measured_up_to_now():
+    entry_times = [NOW - timedelta(hours=hours) for hours in (1, 2, 4)]
+
+    assert observed_rate(NOW, entry_times, 0, None) == 0.75
+    assert observed_rate(NOW, [], 6, 3 * 3600) == 2
+    assert observed_rate(NOW, [], 0, None) is None
+
+
+def test_interval_targets_a_few_entries_within_limits():
+    assert healthy_interval(None) == scheduler.SCHEDULE_DEFAULT_INTERVAL
+    assert healthy_interval(3) == 3600
+    assert healthy_interval(1000) == scheduler.SCHEDULE_MIN_INTERVAL
+    assert healthy_interval(0) == scheduler.FEED_MAX_POLL_INTERVAL
+    # A feed's advertised <ttl> is never undercut
+    assert healthy_interval(3, advertised=7200) == 7200
+
+
+def test_busy_feed_is_polled_more_often_than_a_quiet_one():
+    busy = update_schedule({}, NOW, entry_times=[NOW - timedelta(minutes=10 * n) for n in range(1, 13)])
+    quiet = update_schedule({}, NOW, entry_times=[NOW - timedelta(days=2)])
+
+    assert busy["poll_interval"] < quiet["poll_interval"]
+    assert busy["next_poll_at"] == NOW + timedelta(seconds=busy["poll_interval"])
+
+
+def test_publish_rate_is_smoothed():
+    state = update_schedule({"publish_rate": 10.0}, NOW, entry_times=[NOW - timedelta(hours=1)])
+
+    assert state["publish_rate"] == pytest.approx(0.3 * 1 + 0.7 * 10)
+
+
+def test_errors_back_off_exponentially_and_reset_on_success():
+    state = {"poll_interval": 1800}
+    waits = []
+    for _ in range(3):
+        update_schedule(state, NOW, error=True)
+        waits.append((state["next_poll_at"] - NOW).total_seconds())
+
+    assert waits == [3600, 7200, 14400]
+    assert backoff_interval(1800, 40) == scheduler.SCHEDULE_MAX_BACKOFF
+
+    update_schedule(state, NOW, previous_poll=NOW - timedelta(hours=1), new_entries=3)
+    assert state["error_count"] == 0 and state["poll_interval"] == 3600
+
+
+def test_due_feeds_are_most_overdue_first_within_the_budget():
+    states = {
+        "new": {},
+        "late": {"next_poll_at": NOW - timedelta(hours=2), "poll_interval": 3600},
+        "slightly_late": {"next_poll_at": NOW - timedelta(hours=2), "poll_interval": 7200},
+        "not_due": {"next_poll_at": NOW + timedelta(minutes=1), "poll_interval": 3600},
+    }
+
+    assert due_feeds(states, NOW) == (["new", "late", "slightly_late"], 3)
+    assert due_feeds(states, NOW, budget=2) == (["new", "late"], 3)
+
+
+def test_fetch_tick_polls_only_due_feeds(db, publisher, monkeypatch):
+    _, feed_urls = publisher
+    monkeypatch.setattr(fetch, "get_rss_feeds", lambda: [(url,) for url in feed_urls])
+
+    first = fetch.main1()
+    second = fetch.main1()
+
+    assert sorted(first["feeds"]) == sorted(feed_urls)
+    assert second["feeds"] == {} and second["counters"]["feeds_deferred"] == 2
+    next_polls = [next_poll for (next_poll,) in db.query(FeedState.next_poll_at)]
+    assert len(next_polls) == 2 and all(next_poll > datetime.utcnow() for next_poll in next_polls)
@@ -0,0 +1,94 @@
+import pytest
+
+from app.search import make_snippet, search_articles, tokenize, uses_tsvector
+from conftest import article_row, store_articles
+
+
+def walk(client, q, limit=20):
+    """Result ids of every page reached through next cursors; fails if the cursor stops advancing"""
+    pages, cursor = [], None
+    for _ in range(limit):
+        data = client.get(f"/api/search?q={q}&include_total=false" + (f"&cursor={cursor}" if cursor else "")).get_json()
+        pages.append([result['id'] for result in data['results']])
+        cursor = data['pagination']['next_cursor']
+        if not cursor:
+            return pages
+    pytest.fail(f"next cursor still returned after {limit} pages: {pages[-2:]}")
+
+
+def varied_articles(count):
+    """Articles mentioning "climate" with ranks that are not exact in float4, several of them tied"""
+    return [
+        article_row(n, title=f"Report {n}", summary=" ".join(["climate"] * (1 + n % 4) + ["policy"] * (n % 7)),
+                    content="Energy and climate " * (n % 3))
+        for n in range(27)
+    ]
+
+
+def test_cursor_walk_returns_every_match_once(db, client):
+    store_articles(db, varied_articles(27))
+    pages = walk(client, "climate")
+
+    ids = [article_id for page in pages for article_id in page]
+    assert len(ids) == len(set(ids)) == 27
+    assert [len(page) for page in pages] == [10, 10, 7]
+
+
+def test_prev_cursor_walks_back_to_the_first_page(db, client):
+    store_articles(db, varied_articles(27))
+    first = client.get("/api/search?q=climate&include_total=false").get_json()
+    data = client.get(f"/api/search?q=climate&cursor={first['pagination']['next_cursor']}").get_json()
+    data = client.get(f"/api/search?q=climate&cursor={data['pagination']['prev_cursor']}").get_json()
+
+    assert [result['id'] for result in data['results']] == [result['id'] for result in first['results']]
+
+
+def test_pages_are_ordered_by_score(db, client):
+    store_articles(db, varied_articles(27))
+    data = client.get("/api/search?q=climate").get_json()
+    scores = [result['score'] for result in data['results']]
+    assert scores == sorted(scores, reverse=True)
+    assert data['pagination']['total'] == 27
+
+
+def test_every_term_must_match(db, client):
+    store_articles(db, [article_row(0, title="Climate talks"), article_row(1, title="Climate policy talks")])
+    data = client.get("/api/search?q=climate policy").get_json()
+    assert [result['title'] for result in data['results']] == ["Climate policy talks"]
+
+
+def test_missing_query_is_a_bad_request(db, client):
+    assert client.get("/api/search?q=").status_code == 400
+
+
+def test_snippet_escapes_html_and_marks_terms():
+    article = article_row(0, summary="<b>Climate</b> talks resume", content="", title="")
+    snippet = make_snippet(type("Row", (), article), tokenize("climate"))
+    assert snippet == "&lt;b&gt;<mark>Climate</mark>&lt;/b&gt; talks resume"
+
+
+def test_tsvector_search_is_used_on_postgresql(db):
+    if not uses_tsvector(db):
+        pytest.skip("PostgreSQL only")
+    assert db.execute("SELECT indexname FROM pg_indexes WHERE indexname = 'ix_articles_search'").scalar()
+
+
+def test_search_snippets_escape_article_html_on_either_backend(db, client):
+    store_articles(db, [article_row(0, title="Climate talks", summary="<script>alert(1)</script> climate < 5% deal",
+                                    content="")])
+
+    snippet = client.get("/api/search?q=climate").get_json()["results"][0]["snippet"]
+
+    assert "&lt; 5%" in snippet
+    assert snippet.replace("<mark>", "").replace("</mark>", "").count("<") == 0
+
+
+def test_headline_is_escaped_except_for_match_markers(db):
+    if not uses_tsvector(db):
+        pytest.skip("PostgreSQL only")
+    store_articles(db, [article_row(0, title="Climate costs", summary="Up < 5% & rising <img src=x", content="")])
+
+    snippet = search_articles(db, "climate", 10)["results"][0][2]
+
+    assert snippet.startswith("<mark>Climate</mark> costs")
+    assert "&lt; 5% &amp; rising" in snippet and "<img" not in snippet
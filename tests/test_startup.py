@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from bench.coldstart import PROBES, run_probe
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_fetch_startup_does_not_load_flask(engine):
+    modules = run_probe(PROBES["fetch_startup"], ROOT)["modules"]
+
+    assert "flask" not in modules and "jinja2" not in modules
+
+
+def test_web_boot_does_not_load_the_extraction_stack(engine):
+    modules = run_probe(PROBES["web_boot"], ROOT)["modules"]
+
+    assert "flask" in modules
+    assert not {"newspaper", "nltk", "lxml", "feedparser"} & set(modules)
+
+
+def test_create_app_leaves_schema_changes_to_migrate(tmp_path):
+    database_url = f"sqlite:///{tmp_path}/fresh.sqlite"
+    code = (
+        "from sqlalchemy import inspect\n"
+        "import app\n"
+        "app.create_app()\n"
+        "print('tables', len(inspect(app.init_engine()).get_table_names()))\n"
+        "app.migrate()\n"
+        "print('tables', len(inspect(app.init_engine()).get_table_names()))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, DATABASE_URL=database_url)).stdout
+    before, after = [int(line.split()[1]) for line in output.splitlines() if line.startswith("tables ")]
+
+    assert before == 0 and after > 0
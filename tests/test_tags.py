@@ -0,0 +1,39 @@
+from app.tags import split_tags
+from conftest import article_row, store_articles
+
+
+def ids(client, url):
+    return sorted(article['id'] for article in client.get(url).get_json()['articles'])
+
+
+def test_split_tags_normalizes_and_dedupes():
+    assert split_tags(' World ,world,  Middle   East,,') == {'world': 'World', 'middle east': 'Middle East'}
+    assert split_tags(None) == {}
+
+
+def test_filters_match_exact_tags(db, client):
+    store_articles(db, [
+        article_row(0, categories='World, Politics', author='Jane Doe'),
+        article_row(1, categories='World', author='John Roe'),
+        article_row(2, categories='Worldwide', author='Jane Doe'),
+    ])
+    first, second, third = ids(client, '/api/articles?fields=id')
+
+    assert ids(client, '/api/articles?category=world') == [first, second]
+    assert ids(client, '/api/articles?category=World,Politics') == [first]
+    assert ids(client, '/api/articles?category=Politics,Worldwide&match=any') == [first, third]
+    assert ids(client, '/api/articles?author=jane%20doe&category=World') == [first]
+
+
+def test_retagged_article_moves_between_filters(db, client):
+    store_articles(db, [article_row(0, categories='World')])
+    store_articles(db, [article_row(0, categories='Sport')])
+
+    assert ids(client, '/api/articles?category=World') == []
+    assert len(ids(client, '/api/articles?category=Sport')) == 1
+
+
+def test_facet_counts(db, client):
+    store_articles(db, [article_row(0, categories='World, Politics'), article_row(1, categories='World')])
+    facets = client.get('/api/facets?type=category').get_json()
+    assert {facet['name']: facet['count'] for facet in facets['facets']} == {'World': 2, 'Politics': 1}
@@ -0,0 +1,185 @@
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+import fetch
+import thumbnails
+from app import routes
+from bench.server import SyntheticPublisher, image_jpeg, start_servers, stop_servers
+from conftest import article_row, store_articles
+from thumbnails import THUMB_SIZES, ThumbnailCache, ThumbnailError, download_image, fetch_thumbnail, image_hash, render
+
+
+@pytest.fixture
+def thumbnail_cache(tmp_path, monkeypatch):
+    thumbnail_cache = ThumbnailCache(str(tmp_path / "thumbs"), max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(thumbnails, "get_thumbnail_cache", lambda: thumbnail_cache)
+    monkeypatch.setattr(routes, "get_thumbnail_cache", lambda: thumbnail_cache)
+    return thumbnail_cache
+
+
+@pytest.fixture
+def image_url():
+    """URL of a JPEG served by a local synthetic publisher"""
+    feed_urls, servers = start_servers(SyntheticPublisher(feeds=1, items=1, latency=0, image_kb=16))
+    yield feed_urls[0].replace("/feed/", "/image/")
+    stop_servers(servers)
+
+
+class OversizedImageHandler(BaseHTTPRequestHandler):
+    """/declared announces a body over the limit; /endless streams one without a Content-Length"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        if self.path == "/declared":
+            self.send_header("Content-Length", str(1024 * 1024 * 1024))
+        self.end_headers()
+        try:
+            while True:
+                self.wfile.write(b"\0" * 65536)
+                self.server.sent += 65536
+                if self.path == "/declared":
+                    time.sleep(0.1)
+        except OSError:
+            pass
+
+
+@pytest.fixture
+def oversized_server(monkeypatch):
+    monkeypatch.setattr(thumbnails, "THUMB_MAX_SOURCE_MB", 1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OversizedImageHandler)
+    server.daemon_threads, server.sent = True, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def broken_png():
+    """A PNG whose IDAT length is zeroed, which Pillow reports with SyntaxError rather than OSError"""
+    out = io.BytesIO()
+    Image.new("RGB", (50, 50), "red").save(out, "PNG")
+    body = bytearray(out.getvalue())
+    idat = body.index(b"IDAT")
+    body[idat - 4:idat] = b"\0\0\0\0"
+    return bytes(body)
+
+
+def evict_one_size(thumbnail_cache, digest):
+    """Evict a single (hash, size) entry, as the LRU does when only part of an image is old"""
+    with thumbnail_cache._lock:
+        thumbnail_cache._db.execute("UPDATE thumbs SET last_access = 0 WHERE hash = ? AND size_name = 'list'",
+                                    (digest,))
+    thumbnail_cache.max_bytes = thumbnail_cache._size - 1
+    assert thumbnail_cache.evict() == 1
+    thumbnail_cache.max_bytes = 10 * 1024 * 1024
+
+
+def test_render_makes_every_size():
+    rendered = render(image_jpeg(16, 0))
+
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in rendered.items()}
+    assert set(sizes) == set(THUMB_SIZES)
+    assert sizes["list"] == (360, 240)
+    assert sizes["detail"][0] <= 960 and sizes["detail"][1] <= 720
+    with pytest.raises(ThumbnailError):
+        render(b"not an image")
+    with pytest.raises(ThumbnailError):
+        render(broken_png())
+
+
+def test_same_image_is_stored_once(thumbnail_cache):
+    body = image_jpeg(16, 0)
+
+    digest = thumbnail_cache.put("http://a.test/1.jpg", body)
+
+    assert thumbnail_cache.put("http://b.test/2.jpg", body) == digest == image_hash(body)
+    assert thumbnail_cache.hash_for("http://b.test/2.jpg") == digest
+    assert thumbnail_cache.stats()["images"] == 1
+    assert all(thumbnail_cache.get(digest, name) for name in THUMB_SIZES)
+
+
+def test_partially_evicted_image_is_rendered_again(thumbnail_cache):
+    body = image_jpeg(16, 0)
+    digest = thumbnail_cache.put("http://a.test/1.jpg", body)
+    evict_one_size(thumbnail_cache, digest)
+
+    assert thumbnail_cache.missing_sizes(digest) == ["list"] and not thumbnail_cache.has(digest)
+
+    thumbnail_cache.put("http://a.test/1.jpg", body)
+    assert thumbnail_cache.has(digest)
+    assert thumbnail_cache.get(digest, "list")
+
+
+def test_fetch_thumbnail_downloads_again_after_partial_eviction(thumbnail_cache, image_url):
+    digest = fetch_thumbnail(image_url)
+    evict_one_size(thumbnail_cache, digest)
+
+    stats = fetch.RunStats()
+    assert fetch_thumbnail(image_url, stats) == digest
+    assert stats.counters["thumbnails_created"] == 1 and "thumbnails_cached" not in stats.counters
+    assert fetch_thumbnail(image_url, stats) == digest
+    assert stats.counters["thumbnails_cached"] == 1
+
+
+def test_thumb_route_rebuilds_an_evicted_size(thumbnail_cache, image_url, client):
+    digest = fetch_thumbnail(image_url)
+    evict_one_size(thumbnail_cache, digest)
+
+    response = client.get(f"/thumb/{digest}?size=list")
+
+    assert response.status_code == 200
+    assert Image.open(io.BytesIO(response.data)).size == (360, 240)
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert client.get(f"/thumb/{digest}?size=detail").data == thumbnail_cache.get(digest, "detail")
+
+
+def test_thumb_route_never_sends_an_empty_immutable_response(thumbnail_cache, image_url, client, monkeypatch):
+    digest = fetch_thumbnail(image_url)
+    evict_one_size(thumbnail_cache, digest)
+    # The rebuilt file is gone again before it can be read
+    monkeypatch.setattr(thumbnail_cache, "get", lambda digest, size_name: None)
+
+    response = client.get(f"/thumb/{digest}?size=list")
+
+    assert response.status_code == 502
+    assert "immutable" not in response.headers.get("Cache-Control", "")
+
+
+def test_thumb_route_reports_a_malformed_source_image(thumbnail_cache, db, client, monkeypatch):
+    digest = "a" * 64
+    store_articles(db, [article_row(0, thumbnail_url="http://publisher.test/broken.png", thumbnail_hash=digest)])
+    monkeypatch.setattr(routes, "download_image", lambda url: broken_png())
+
+    response = client.get(f"/thumb/{digest}?size=list")
+
+    assert response.status_code == 502
+    assert "immutable" not in response.headers.get("Cache-Control", "")
+
+
+def test_thumb_route_rejects_unknown_images(thumbnail_cache, client):
+    assert client.get("/thumb/" + "0" * 64).status_code == 404
+    assert client.get("/thumb/not-a-hash").status_code == 404
+    assert client.get("/thumb/" + "0" * 64 + "?size=huge").status_code == 404
+
+
+def test_oversized_downloads_are_dropped_without_reading_them_whole(oversized_server):
+    server, url = oversized_server
+    started = time.monotonic()
+
+    with pytest.raises(ThumbnailError, match="too large"):
+        download_image(url + "/declared")
+    with pytest.raises(ThumbnailError, match="too large"):
+        download_image(url + "/endless")
+
+    assert time.monotonic() - started < 5
+    # Reading stopped just past the 1 MB limit, give or take the socket buffers
+    assert server.sent < 16 * 1024 * 1024
@@ -0,0 +1,298 @@
+"""
+Thumbnail Cache
+
+Article images are downloaded once, during ingestion, and resized with
+Pillow to the fixed sizes the pages show (THUMB_SIZES). The resized JPEGs
+are stored under THUMB_CACHE_DIR by the hash of the source image, so the
+same picture used by several articles is kept once, and served locally
+from /thumb/<hash>. A small SQLite index tracks access times so the least
+recently used thumbnails are evicted past THUMB_CACHE_MAX_MB, and maps
+source URLs to hashes so an image is never downloaded twice.
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache location (empty disables local thumbnails; pages then hotlink the publisher image) and size limit
+THUMB_CACHE_DIR = os.getenv("THUMB_CACHE_DIR", ".thumb_cache")
+THUMB_CACHE_MAX_MB = int(os.getenv("THUMB_CACHE_MAX_MB", "256"))
+
+# Source images larger than this are not kept (megabytes) or decoded (pixels)
+THUMB_MAX_SOURCE_MB = float(os.getenv("THUMB_MAX_SOURCE_MB", "10"))
+THUMB_MAX_PIXELS = 50_000_000
+# Longest a whole source image download may take (seconds); the read timeout only bounds each chunk
+THUMB_DOWNLOAD_SECONDS = float(os.getenv("THUMB_DOWNLOAD_SECONDS", "30"))
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# (width, height, crop): listing cards are cropped to fill the box, detail images keep their shape
+THUMB_SIZES = {
+    "list": (360, 240, True),
+    "detail": (960, 720, False),
+}
+THUMB_QUALITY = 80
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbs (
+    hash TEXT NOT NULL,
+    size_name TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (hash, size_name)
+);
+CREATE INDEX IF NOT EXISTS ix_thumbs_last_access ON thumbs (last_access);
+CREATE TABLE IF NOT EXISTS sources (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sources_hash ON sources (hash);
+"""
+
+
+class ThumbnailError(Exception):
+    """The source image could not be downloaded or decoded"""
+
+
+def image_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def render(body):
+    """Resize a source image to every THUMB_SIZES entry; returns {size name: JPEG bytes}"""
+    # Imported here so the web app and fetch CLI don't load Pillow until a thumbnail is made
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(body))
+        if image.width * image.height > THUMB_MAX_PIXELS:
+            raise ThumbnailError(f"Image too large ({image.width}x{image.height})")
+        # JPEGs can be decoded at a fraction of their size, which is much faster than decoding in full
+        image.draft(None, (max(size[0] for size in THUMB_SIZES.values()),
+                           max(size[1] for size in THUMB_SIZES.values())))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", image.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+
+        rendered = {}
+        for name, (width, height, crop) in THUMB_SIZES.items():
+            if crop:
+                resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            else:
+                resized = image.copy()
+                resized.thumbnail((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, "JPEG", quality=THUMB_QUALITY, optimize=True, progressive=True)
+            rendered[name] = out.getvalue()
+        return rendered
+    except ThumbnailError:
+        raise
+    # Pillow raises SyntaxError, struct.error, IndexError and others for malformed files, not only OSError
+    except Exception as e:
+        raise ThumbnailError(f"Unreadable image: {e}")
+
+
+class ThumbnailCache:
+    """Content-addressed, size-bounded LRU store of resized images"""
+
+    def __init__(self, directory=THUMB_CACHE_DIR, max_bytes=THUMB_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._size = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbs").fetchone()[0]
+
+    def _path(self, digest, size_name):
+        return os.path.join(self.directory, digest[:2], f"{digest}-{size_name}.jpg")
+
+    def hash_for(self, url):
+        """Hash of the image already stored for source ``url``, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM sources WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def source_url(self, digest):
+        """A source URL the image ``digest`` was downloaded from, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT url FROM sources WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def missing_sizes(self, digest):
+        """THUMB_SIZES names not stored for image ``digest``; eviction removes sizes one at a time"""
+        with self._lock:
+            stored = {row[0] for row in self._db.execute("SELECT size_name FROM thumbs WHERE hash = ?", (digest,))}
+        return [size_name for size_name in THUMB_SIZES if size_name not in stored]
+
+    def has(self, digest):
+        """Whether every size of image ``digest`` is stored"""
+        return not self.missing_sizes(digest)
+
+    def put(self, url, body):
+        """Resize and store a downloaded source image for ``url``, filling in any missing sizes; returns its hash"""
+        digest = image_hash(body)
+        missing = self.missing_sizes(digest)
+        if missing:
+            rendered = {size_name: data for size_name, data in render(body).items() if size_name in missing}
+            for size_name, data in rendered.items():
+                path = self._path(digest, size_name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            with self._lock, self._db:
+                now = time.time()
+                for size_name, data in rendered.items():
+                    inserted = self._db.execute(
+                        "INSERT OR IGNORE INTO thumbs (hash, size_name, bytes, last_access) VALUES (?, ?, ?, ?)",
+                        (digest, size_name, len(data), now),
+                    ).rowcount
+                    self._size += len(data) if inserted else 0
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO sources (url, hash) VALUES (?, ?)", (url, digest))
+        self.evict()
+        return digest
+
+    def get(self, digest, size_name):
+        """Stored JPEG bytes of one size of image ``digest``, or None"""
+        try:
+            with open(self._path(digest, size_name), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE thumbs SET last_access = ? WHERE hash = ? AND size_name = ?", (time.time(), digest, size_name)
+            )
+        return data
+
+    def evict(self):
+        """Remove least recently used thumbnails until the cache fits in max_bytes"""
+        if self._size <= self.max_bytes:
+            return 0
+        removed = 0
+        with self._lock, self._db:
+            rows = self._db.execute("SELECT hash, size_name, bytes FROM thumbs ORDER BY last_access").fetchall()
+            for digest, size_name, size in rows:
+                if self._size <= self.max_bytes * 0.9:
+                    break
+                self._db.execute("DELETE FROM thumbs WHERE hash = ? AND size_name = ?", (digest, size_name))
+                try:
+                    os.remove(self._path(digest, size_name))
+                except OSError:
+                    pass
+                self._size -= size
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            images = self._db.execute("SELECT COUNT(DISTINCT hash) FROM thumbs").fetchone()[0]
+        return {"images": images, "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+def download_image(url, stats=None):
+    """Source image bytes through the shared HTTP client; raises ThumbnailError"""
+    # Imported here so the web app only loads requests when it has to fill a cache miss
+    from http_client import get_client
+
+    max_bytes = int(THUMB_MAX_SOURCE_MB * 1024 * 1024)
+    try:
+        response = get_client().get(url, headers={"Accept": "image/*"}, stats=stats, stream=True)
+    except Exception as e:
+        raise ThumbnailError(f"Download failed: {e}")
+    # The body is read in chunks, so an oversized or endless image is dropped before it is buffered
+    with response:
+        try:
+            response.raise_for_status()
+            declared = response.headers.get("Content-Length", "")
+            if declared.isdigit() and int(declared) > max_bytes:
+                raise ThumbnailError(f"Image too large ({declared} bytes)")
+            deadline = time.monotonic() + THUMB_DOWNLOAD_SECONDS
+            body = bytearray()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise ThumbnailError(f"Image too large (over {max_bytes} bytes)")
+                if time.monotonic() > deadline:
+                    raise ThumbnailError(f"Download took over {THUMB_DOWNLOAD_SECONDS:g}s")
+        except ThumbnailError:
+            raise
+        except Exception as e:
+            raise ThumbnailError(f"Download failed: {e}")
+    return bytes(body)
+
+
+def fetch_thumbnail(url, stats=None, download=True):
+    """Hash of the thumbnails for image ``url``, downloading and resizing it unless it is already cached.
+
+    Returns None when the cache is disabled, the image can't be used, or
+    it isn't cached and ``download`` is False.
+    """
+    thumbnail_cache = get_thumbnail_cache()
+    if thumbnail_cache is None or not url:
+        return None
+    # Articles of one feed often share an image; the first thread downloads it, the others wait for it
+    with _url_lock(url):
+        digest = thumbnail_cache.hash_for(url)
+        if digest and thumbnail_cache.has(digest):
+            if stats is not None:
+                stats.incr("thumbnails_cached")
+            return digest
+        if not download:
+            return None
+        try:
+            digest = thumbnail_cache.put(url, download_image(url, stats))
+        except ThumbnailError as e:
+            print(f"  ⚠️ No thumbnail for {url}: {e}")
+            if stats is not None:
+                stats.incr("thumbnail_errors")
+            return None
+    if stats is not None:
+        stats.incr("thumbnails_created")
+    return digest
+
+
+_url_locks = {}
+_url_locks_lock = threading.Lock()
+
+@contextlib.contextmanager
+def _url_lock(url):
+    """Hold a lock on ``url`` while its image is looked up or downloaded"""
+    with _url_locks_lock:
+        lock, waiters = _url_locks.get(url, (threading.Lock(), 0))
+        _url_locks[url] = (lock, waiters + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _url_locks_lock:
+            lock, waiters = _url_locks[url]
+            if waiters == 1:
+                del _url_locks[url]
+            else:
+                _url_locks[url] = (lock, waiters - 1)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache, or None when THUMB_CACHE_DIR is empty"""
+    global _cache
+    if not THUMB_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
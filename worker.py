@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Fetch Worker
+
+Runs queued fetch jobs outside the web process. Jobs are enqueued by
+/cron/fetch/ into the fetch_jobs table and claimed here with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can run
+side by side without fetching twice. Each committed batch of feeds is
+checkpointed on the job row; when a worker dies, the next one to claim
+the job resumes from that checkpoint.
+
+Usage:
+    python worker.py          # Run forever
+    python worker.py --once   # Run at most one job, then exit
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+from app.jobs import JOB_LEASE_SECONDS, claim_job, finish_job, heartbeat, job_to_dict
+from fetch import RunCheckpoint, RunStats, RunStopped, get_session, main1
+
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "10"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+stopping = threading.Event()
+
+
+class JobTracker:
+    """Collects per-feed progress and live metrics from a run and heartbeats them to the job row"""
+
+    def __init__(self, job_id, worker_id=WORKER_ID, interval=JOB_LEASE_SECONDS / 3, resume=None):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.progress = {"done": 0, "total": None}
+        self.feed_results = {}
+        self.stats = RunStats()
+        # ``resume`` is the job dict of an interrupted attempt; its finished feeds count as done
+        self.checkpoint = RunCheckpoint((resume or {}).get("checkpoint"), save=self.save_checkpoint)
+        self.resumed = len(self.checkpoint.finished)
+        previous = (resume or {}).get("feed_results") or {}
+        self.feed_results.update((url, previous[url]) for url in self.checkpoint.finished if url in previous)
+        # Set once another worker may own the job; the run stops and writes nothing more to it
+        self.lease_lost = threading.Event()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._beat, name=f"heartbeat-{job_id}", daemon=True)
+
+    def feed_done(self, url, result):
+        """Progress callback passed to fetch.main1"""
+        with self.lock:
+            self.progress = {"done": result["done"] + self.resumed, "total": result["total"] + self.resumed}
+            self.feed_results[url] = {"status": result["status"], "articles": result["articles"]}
+
+    def lose_lease(self):
+        """Stop the run: the job may already be running on the worker that reclaimed it"""
+        if not self.lease_lost.is_set():
+            print(f"⚠️ Lost lease on job {self.job_id}, stopping the run")
+        self.lease_lost.set()
+        self.checkpoint.stop()
+
+    def save_checkpoint(self, checkpoint):
+        """Store the run's checkpoint on the job row as soon as a batch is committed"""
+        if self.lease_lost.is_set():
+            return
+        session = get_session()
+        try:
+            progress, feed_results = self.snapshot()
+            if not heartbeat(session, self.job_id, self.worker_id, progress, feed_results, checkpoint=checkpoint):
+                self.lose_lease()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Checkpoint failed for job {self.job_id}: {e}")
+        finally:
+            session.close()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.progress), dict(self.feed_results)
+
+    def _beat(self):
+        while not self.lease_lost.is_set() and not self.done.wait(self.interval):
+            session = get_session()
+            try:
+                progress, feed_results = self.snapshot()
+                if not heartbeat(session, self.job_id, self.worker_id, progress, feed_results,
+                                 self.stats.report()):
+                    self.lose_lease()
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️ Heartbeat failed for job {self.job_id}: {e}")
+            finally:
+                session.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join()
+
+
+def run_job(job):
+    """Run one claimed job (as a job_to_dict dict) and record its outcome"""
+    print(f"🚀 Worker {WORKER_ID} starting {job['kind']} job {job['id']} (attempt {job['attempts']})")
+    status, report, error = "succeeded", None, None
+
+    with JobTracker(job['id'], resume=job) as tracker:
+        try:
+            report = main1(on_feed_done=tracker.feed_done, stats=tracker.stats, checkpoint=tracker.checkpoint)
+        except RunStopped as e:
+            print(f"🛑 Job {job['id']} stopped: {e}")
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"❌ Job {job['id']} failed: {e}")
+
+    if tracker.lease_lost.is_set():
+        # The job belongs to whichever worker reclaimed it; its outcome is theirs to record
+        return
+    progress, feed_results = tracker.snapshot()
+    session = get_session()
+    try:
+        finish_job(session, job['id'], WORKER_ID, status, report, error, progress, feed_results)
+    finally:
+        session.close()
+    print(f"✅ Job {job['id']} {status}")
+
+
+def run_once():
+    """Claim and run one job; False if the queue was empty"""
+    session = get_session()
+    try:
+        job = claim_job(session, WORKER_ID)
+        job = job_to_dict(job) if job is not None else None
+    finally:
+        session.close()
+
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def main(once=False):
+    """Poll the job queue until stopped"""
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    print(f"👷 Fetch worker {WORKER_ID} started")
+
+    while not stopping.is_set():
+        try:
+            ran = run_once()
+        except Exception as e:
+            print(f"❌ Error claiming job: {e}")
+            ran = False
+        if once:
+            break
+        if not ran:
+            stopping.wait(WORKER_POLL_INTERVAL)
+
+    print(f"👋 Fetch worker {WORKER_ID} stopped")
+
+
+if __name__ == "__main__":
+    main(once="--once" in sys.argv[1:])